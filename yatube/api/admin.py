@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import Token
+
+
+class TokenAdmin(admin.ModelAdmin):
+    list_display = ('user', 'created')
+    raw_id_fields = ('user',)
+    readonly_fields = ('key',)
+
+
+admin.site.register(Token, TokenAdmin)
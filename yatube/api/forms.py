@@ -0,0 +1,9 @@
+from django import forms
+
+from posts.models import Group
+
+
+class GroupForm(forms.ModelForm):
+    class Meta:
+        model = Group
+        fields = ('title', 'slug', 'description')
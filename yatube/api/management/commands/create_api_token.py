@@ -0,0 +1,20 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Token
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Выпускает токен API для пользователя и печатает его'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError('Такого пользователя нет')
+        self.stdout.write(Token.objects.create(user=user).key)
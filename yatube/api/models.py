@@ -0,0 +1,29 @@
+import secrets
+
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class Token(models.Model):
+    """Ключ доступа к API для программ-клиентов."""
+
+    key = models.CharField(max_length=40, primary_key=True)
+    user = models.ForeignKey(
+        User,
+        related_name='api_tokens',
+        on_delete=models.CASCADE
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = 'Токены API'
+
+    def save(self, *args, **kwargs):
+        if not self.key:
+            self.key = secrets.token_hex(20)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f'{self.user} ({self.key[:6]}…)'
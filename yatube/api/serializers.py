@@ -0,0 +1,109 @@
+"""Сериализация ответов API без моделей и форм.
+
+Поля ресурса описаны путями ORM, поэтому выборка берёт только нужные
+столбцы через values_list (связанные объекты — тем же запросом через
+JOIN), а ответ собирается прямо из кортежей. ?fields= сужает набор
+полей, а вместе с ним и сам SQL.
+"""
+from collections import namedtuple
+
+from django.core.files.storage import default_storage
+
+from posts.utils import COMMENT_ORDERING, GROUP_ORDERING, CursorPaginator
+
+PAGE_SIZE = 50
+
+Field = namedtuple('Field', 'lookup convert', defaults=(None,))
+
+
+class FieldsError(ValueError):
+    """В ?fields= указаны поля, которых у ресурса нет."""
+
+
+def media_url(name):
+    return default_storage.url(name) if name else None
+
+
+class RowCursorPaginator(CursorPaginator):
+    """Курсорный паджинатор по кортежам: ключ — последние столбцы."""
+
+    def position_of(self, obj):
+        return tuple(obj[-len(self.key_fields):])
+
+
+class Resource:
+    def __init__(self, fields, ordering):
+        self.fields = fields
+        self.ordering = ordering
+
+    def field_names(self, request):
+        requested = request.GET.get('fields')
+        if not requested:
+            return list(self.fields)
+        names = [name.strip() for name in requested.split(',')]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise FieldsError(', '.join(unknown))
+        return names
+
+    def rows(self, queryset, names):
+        """Кортежи: поля names, затем ключ сортировки для курсора."""
+        keys = [name.lstrip('-') for name in self.ordering]
+        return queryset.values_list(
+            *(self.fields[name].lookup for name in names), *keys)
+
+    def paginator(self, queryset, names):
+        return RowCursorPaginator(
+            self.rows(queryset, names), PAGE_SIZE, ordering=self.ordering)
+
+    def serialize(self, rows, names):
+        converters = [
+            (index, self.fields[name].convert)
+            for index, name in enumerate(names)
+            if self.fields[name].convert
+        ]
+        result = []
+        for row in rows:
+            values = list(row[:len(names)])
+            for index, convert in converters:
+                values[index] = convert(values[index])
+            result.append(dict(zip(names, values)))
+        return result
+
+
+POSTS = Resource({
+    'id': Field('pk'),
+    'text': Field('text'),
+    'pub_date': Field('pub_date'),
+    'updated': Field('updated'),
+    'author': Field('author__username'),
+    'group': Field('group__slug'),
+    'image': Field('image', media_url),
+    'image_width': Field('image_width'),
+    'image_height': Field('image_height'),
+    'comments_count': Field('comments_count'),
+}, ordering=('-pub_date', '-pk'))
+
+COMMENTS = Resource({
+    'id': Field('pk'),
+    'post': Field('post_id'),
+    'author': Field('author__username'),
+    'text': Field('text'),
+    'created': Field('created'),
+}, ordering=COMMENT_ORDERING)
+
+GROUPS = Resource({
+    'id': Field('pk'),
+    'title': Field('title'),
+    'slug': Field('slug'),
+    'description': Field('description'),
+    'posts_count': Field('posts_count'),
+    'authors_count': Field('authors_count'),
+    'last_post_date': Field('last_post_date'),
+}, ordering=GROUP_ORDERING)
+
+# Порядок подписок совпадает с уникальным индексом (user, author)
+FOLLOWS = Resource({
+    'id': Field('pk'),
+    'author': Field('author__username'),
+}, ordering=('author_id', 'pk'))
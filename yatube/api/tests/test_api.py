@@ -0,0 +1,174 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from api.models import Token
+from api.serializers import PAGE_SIZE
+from posts.models import Comment, Follow, Group, Post
+from posts.tests.utils import assert_query_budget
+
+User = get_user_model()
+
+
+class ApiReadTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create(
+            Post(text=f'Запись {number}', author=cls.author, group=cls.group)
+            for number in range(PAGE_SIZE + 5)
+        )
+        cls.post = Post.objects.create(
+            text='Последняя', author=cls.author, group=cls.group)
+        Comment.objects.create(
+            post=cls.post, author=cls.author, text='Комментарий')
+
+    def test_posts_pages(self):
+        """Список листается курсором, все записи по одному разу."""
+        ids = []
+        url = reverse('api:posts')
+        while url:
+            with assert_query_budget(self, 1):
+                data = self.client.get(url).json()
+            ids += [post['id'] for post in data['results']]
+            url = data['next']
+        self.assertEqual(ids, list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True)))
+
+    def test_post_fields(self):
+        data = self.client.get(
+            reverse('api:post_detail', args=[self.post.pk])).json()
+        self.assertEqual(data['text'], 'Последняя')
+        self.assertEqual(data['author'], 'author')
+        self.assertEqual(data['group'], 'group')
+        self.assertEqual(data['comments_count'], 1)
+        self.assertIsNone(data['image'])
+
+    def test_field_selection(self):
+        response = self.client.get(
+            reverse('api:posts'), {'fields': 'id,author', 'group': 'group'})
+        self.assertEqual(
+            set(response.json()['results'][0]), {'id', 'author'})
+        self.assertIn('fields=id%2Cauthor', response.json()['next'])
+        response = self.client.get(reverse('api:posts'), {'fields': 'secret'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_other_resources(self):
+        comments = self.client.get(
+            reverse('api:comments', args=[self.post.pk])).json()
+        self.assertEqual(
+            [comment['text'] for comment in comments['results']],
+            ['Комментарий'])
+        group = self.client.get(
+            reverse('api:group_detail', args=['group'])).json()
+        self.assertEqual(group['title'], 'Группа')
+        groups = self.client.get(reverse('api:groups')).json()
+        self.assertEqual(groups['results'][0]['slug'], 'group')
+
+    def test_errors_are_json(self):
+        responses = {
+            reverse('api:post_detail', args=[10 ** 6]): HTTPStatus.NOT_FOUND,
+            reverse('api:posts') + '?group=missing': HTTPStatus.NOT_FOUND,
+            reverse('api:follows'): HTTPStatus.UNAUTHORIZED,
+        }
+        for url, status in responses.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('detail', response.json())
+        response = self.client.delete(reverse('api:posts'))
+        self.assertEqual(response.status_code, HTTPStatus.METHOD_NOT_ALLOWED)
+        self.assertEqual(response['Allow'], 'GET, POST')
+
+
+class ApiWriteTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='client')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(text='Запись', author=cls.author)
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+
+    def post_json(self, url, data, **extra):
+        return self.client.post(
+            url, data, content_type='application/json', **{
+                **self.auth, **extra})
+
+    def test_create_post_and_comment(self):
+        response = self.post_json(
+            reverse('api:posts'), {'text': 'Из API', 'group': self.group.pk})
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        post = Post.objects.get(pk=response.json()['id'])
+        self.assertEqual((post.author, post.group), (self.user, self.group))
+        self.assertEqual(
+            response['Location'], reverse('api:post_detail', args=[post.pk]))
+        response = self.post_json(
+            reverse('api:comments', args=[post.pk]), {'text': 'Ответ'})
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(response.json()['author'], 'client')
+
+    def test_validation_errors(self):
+        response = self.post_json(reverse('api:posts'), {'text': ''})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('text', response.json()['errors'])
+
+    def test_bad_token(self):
+        response = self.post_json(
+            reverse('api:posts'), {'text': 'Запись'},
+            HTTP_AUTHORIZATION='Token wrong')
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        self.assertFalse(Post.objects.filter(author=self.user).exists())
+
+    def test_session_requires_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(
+            reverse('api:posts'), {'text': 'Запись'},
+            content_type='application/json')
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_follow_and_unfollow(self):
+        url = reverse('api:follows')
+        response = self.post_json(url, {'author': 'author'})
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(
+            self.client.get(url, **self.auth).json()['results'],
+            [{'id': response.json()['id'], 'author': 'author'}])
+        self.assertEqual(
+            self.post_json(url, {'author': 'author'}).status_code,
+            HTTPStatus.OK)
+        self.assertEqual(
+            self.post_json(url, {'author': 'client'}).status_code,
+            HTTPStatus.BAD_REQUEST)
+        response = self.client.delete(
+            reverse('api:follow_detail', args=['author']), **self.auth)
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_groups_created_by_staff_only(self):
+        data = {'title': 'Новая', 'slug': 'new', 'description': 'Описание'}
+        response = self.post_json(reverse('api:groups'), data)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        response = self.post_json(reverse('api:groups'), data)
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(response.json()['slug'], 'new')
+
+    @override_settings(THROTTLE_RATES={'add_comment': '1/m'})
+    def test_throttled_json(self):
+        url = reverse('api:comments', args=[self.post.pk])
+        self.post_json(url, {'text': 'Раз'})
+        response = self.post_json(url, {'text': 'Два'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertIn('detail', response.json())
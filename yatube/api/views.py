@@ -0,0 +1,249 @@
+"""JSON API для программ-клиентов: записи, комментарии, группы, подписки.
+
+Повторяет posts.views: списки листаются курсором, записи и
+комментарии создаются теми же формами. Чтение собирается
+api.serializers без моделей. Доступ — по заголовку
+Authorization: Token <ключ> или по сессии сайта (запись — с CSRF).
+"""
+import json
+from functools import wraps
+
+from django.http import Http404, HttpResponse, JsonResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+
+from core.sqlite import save_files, serialized_write
+from core.throttling import throttle
+from posts.forms import CommentForm, PostForm
+from posts.models import Comment, Follow, Group, Post, User
+from posts.utils import get_request_page
+
+from . import serializers
+from .forms import GroupForm
+from .models import Token
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ApiError(Exception):
+    """Ошибка, которая отдаётся клиенту как JSON с кодом status."""
+
+    def __init__(self, status, detail, **extra):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.extra = extra
+
+
+def error_response(status, detail, **extra):
+    return JsonResponse({'detail': detail, **extra}, status=status)
+
+
+def throttled(request, retry_after):
+    response = error_response(429, 'Слишком много запросов')
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def authenticate(request):
+    scheme, _, key = request.META.get('HTTP_AUTHORIZATION', '').partition(
+        ' ')
+    if scheme == 'Token':
+        token = Token.objects.select_related('user').filter(
+            key=key.strip()).first()
+        if token is None or not token.user.is_active:
+            raise ApiError(401, 'Неверный токен')
+        request.user = token.user
+    elif request.method not in SAFE_METHODS and (
+            request.user.is_authenticated):
+        # Сессия браузера: изменения — только с токеном CSRF, как у форм
+        check = CsrfViewMiddleware(lambda request: None)
+        if check.process_view(request, None, (), {}) is not None:
+            raise ApiError(403, 'Ошибка проверки CSRF')
+
+
+def api_view(*methods):
+    """Проверяет метод и авторизацию, ошибки отдаёт JSON, а не HTML."""
+    allowed = set(methods) | ({'HEAD'} if 'GET' in methods else set())
+
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in allowed:
+                response = error_response(405, 'Метод не поддерживается')
+                response['Allow'] = ', '.join(methods)
+                return response
+            try:
+                authenticate(request)
+                return view(request, *args, **kwargs)
+            except ApiError as exc:
+                return error_response(exc.status, exc.detail, **exc.extra)
+            except serializers.FieldsError as exc:
+                return error_response(400, f'Неизвестные поля: {exc}')
+            except Http404:
+                return error_response(404, 'Не найдено')
+        return wrapper
+    return decorator
+
+
+def require_user(request):
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Нужна авторизация')
+
+
+def request_data(request):
+    """Тело запроса: JSON-объект или обычная форма с файлами."""
+    if request.content_type != 'application/json':
+        return request.POST, request.FILES
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ApiError(400, 'Тело запроса — не JSON')
+    if not isinstance(data, dict):
+        raise ApiError(400, 'Ожидается JSON-объект')
+    return data, None
+
+
+def save_form(request, form_class, **attrs):
+    require_user(request)
+    form = form_class(*request_data(request))
+    if not form.is_valid():
+        raise ApiError(
+            400, 'Ошибка в данных', errors=form.errors.get_json_data())
+    obj = form.save(commit=False)
+    for name, value in attrs.items():
+        setattr(obj, name, value)
+    save_files(obj)
+    with serialized_write():
+        obj.save()
+    return obj
+
+
+def cursor_url(request, cursor):
+    params = request.GET.copy()
+    params.pop('page', None)
+    params['cursor'] = cursor
+    return f'{request.path}?{params.urlencode()}'
+
+
+def page_response(request, resource, queryset):
+    names = resource.field_names(request)
+    page_obj = get_request_page(resource.paginator(queryset, names), request)
+    paginator = page_obj.paginator
+    return JsonResponse({
+        'results': resource.serialize(page_obj, names),
+        'next': cursor_url(request, paginator.next_cursor)
+        if page_obj.has_next() else None,
+        'previous': cursor_url(request, paginator.previous_cursor)
+        if page_obj.has_previous() and paginator.previous_cursor else None,
+    })
+
+
+def object_response(request, resource, queryset, status=200, location=None):
+    names = resource.field_names(request)
+    row = resource.rows(queryset, names).first()
+    if row is None:
+        raise Http404
+    response = JsonResponse(
+        resource.serialize([row], names)[0], status=status)
+    if location:
+        response['Location'] = location
+    return response
+
+
+@api_view('GET', 'POST')
+@throttle('post_create', respond=throttled)
+def posts(request):
+    if request.method == 'POST':
+        post = save_form(request, PostForm, author=request.user)
+        return object_response(
+            request, serializers.POSTS, Post.objects.filter(pk=post.pk),
+            status=201, location=reverse('api:post_detail', args=[post.pk]))
+    queryset = Post.objects.all()
+    # Фильтры по id, чтобы выборка шла по индексам лент группы и автора
+    if 'group' in request.GET:
+        queryset = queryset.filter(group=get_object_or_404(
+            Group.objects.only('pk'), slug=request.GET['group']))
+    if 'author' in request.GET:
+        queryset = queryset.filter(author=get_object_or_404(
+            User.objects.only('pk'), username=request.GET['author']))
+    return page_response(request, serializers.POSTS, queryset)
+
+
+@api_view('GET')
+def post_detail(request, post_id):
+    return object_response(
+        request, serializers.POSTS, Post.objects.filter(pk=post_id))
+
+
+@api_view('GET', 'POST')
+@throttle('add_comment', respond=throttled)
+def comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    if request.method == 'POST':
+        comment = save_form(
+            request, CommentForm, author=request.user, post=post)
+        return object_response(
+            request, serializers.COMMENTS,
+            Comment.objects.filter(pk=comment.pk), status=201)
+    return page_response(
+        request, serializers.COMMENTS, Comment.objects.filter(post=post))
+
+
+@api_view('GET', 'POST')
+def groups(request):
+    if request.method == 'POST':
+        require_user(request)
+        if not request.user.is_staff:
+            raise ApiError(403, 'Группы создают только администраторы')
+        group = save_form(request, GroupForm)
+        return object_response(
+            request, serializers.GROUPS, Group.objects.filter(pk=group.pk),
+            status=201,
+            location=reverse('api:group_detail', args=[group.slug]))
+    return page_response(request, serializers.GROUPS, Group.objects.all())
+
+
+@api_view('GET')
+def group_detail(request, slug):
+    return object_response(
+        request, serializers.GROUPS, Group.objects.filter(slug=slug))
+
+
+@api_view('GET', 'POST')
+@throttle('follow', respond=throttled)
+def follows(request):
+    require_user(request)
+    if request.method == 'POST':
+        data, _ = request_data(request)
+        author = get_object_or_404(
+            User.objects.only('pk'), username=data.get('author'))
+        if author == request.user:
+            raise ApiError(400, 'Нельзя подписаться на себя')
+        with serialized_write():
+            follow, created = Follow.objects.get_or_create(
+                user=request.user, author=author)
+        return object_response(
+            request, serializers.FOLLOWS, Follow.objects.filter(pk=follow.pk),
+            status=201 if created else 200)
+    return page_response(
+        request, serializers.FOLLOWS,
+        Follow.objects.filter(user=request.user))
+
+
+@api_view('GET', 'DELETE')
+@throttle('follow', methods=('DELETE',), respond=throttled)
+def follow_detail(request, username):
+    require_user(request)
+    queryset = Follow.objects.filter(
+        user=request.user, author__username=username)
+    if request.method == 'DELETE':
+        with serialized_write():
+            deleted, _ = queryset.delete()
+        if not deleted:
+            raise Http404
+        return HttpResponse(status=204)
+    return object_response(request, serializers.FOLLOWS, queryset)
@@ -0,0 +1,94 @@
+"""Кеш с защитой от одновременной пересборки (cache stampede).
+
+Значение хранится вместе со сроком годности и временем своей сборки.
+Незадолго до срока один из читателей с растущей вероятностью решает
+пересобрать его заранее (алгоритм XFetch), а блокировка через
+cache.add оставляет пересборку одному процессу:
+остальные отдают прежнее значение или коротко ждут нового.
+"""
+import math
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+
+LOCK_TIMEOUT = getattr(settings, 'CACHE_LOCK_TIMEOUT', 30)
+WAIT_TIMEOUT = getattr(settings, 'CACHE_WAIT_TIMEOUT', 2)
+POLL_INTERVAL = 0.05
+BETA = 1.0
+
+
+def lock_key(key):
+    return f'{key}:lock'
+
+
+def _acquire(lock):
+    """Берёт блокировку; True, если она досталась этому вызову.
+
+    В файловом кеше add не атомарен, поэтому победитель проверяется
+    по своему токену, записанному в блокировку.
+    """
+    token = uuid.uuid4().hex
+    return cache.add(lock, token, LOCK_TIMEOUT) and cache.get(lock) == token
+
+
+def _expired(expires, delta, beta):
+    """Решение XFetch: пора ли пересобрать значение заранее."""
+    # 1 - random() лежит в (0, 1], логарифм не уходит в минус бесконечность
+    early = -delta * beta * math.log(1.0 - random.random())
+    return time.time() + early >= expires
+
+
+def _store(key, build, timeout):
+    started = time.monotonic()
+    value = build()
+    delta = time.monotonic() - started
+    if timeout is None:
+        expires, physical = math.inf, None
+    else:
+        # Запись живёт дольше срока, чтобы было что отдать,
+        # пока её пересобирает другой процесс
+        expires, physical = time.time() + timeout, timeout + LOCK_TIMEOUT
+    cache.set(key, (value, delta, expires), physical)
+    return value
+
+
+def _wait(key):
+    """Ждёт значение, которое собирает другой процесс."""
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def get_or_build(key, build, timeout, beta=BETA):
+    """Значение из кеша; build() вызывается не более чем одним процессом.
+
+    Если сборщик не успел за WAIT_TIMEOUT, значение собирается на месте,
+    чтобы зависший процесс не оставил страницу без ответа.
+    """
+    entry = cache.get(key)
+    if entry is not None and not _expired(entry[2], entry[1], beta):
+        metrics.count_cache(hit=True)
+        return entry[0]
+    lock = lock_key(key)
+    if _acquire(lock):
+        metrics.count_cache(hit=False)
+        try:
+            return _store(key, build, timeout)
+        finally:
+            cache.delete(lock)
+    if entry is None:
+        entry = _wait(key)
+    if entry is not None:
+        metrics.count_cache(hit=True)
+        return entry[0]
+    metrics.count_cache(hit=False)
+    return build()
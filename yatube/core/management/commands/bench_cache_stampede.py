@@ -0,0 +1,102 @@
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from core.cache import get_or_build, lock_key
+
+KEY = 'bench:stampede'
+
+
+def naive_get(key, build, timeout):
+    """Обычный get/set — так кеш работал до защиты."""
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, timeout)
+    return value
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает число пересборок фрагмента при одновременных '
+        'запросах: обычный get/set против core.cache.get_or_build'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=16)
+        parser.add_argument('--rounds', type=int, default=10)
+        parser.add_argument(
+            '--render-ms', type=int, default=50,
+            help='Сколько длится сборка фрагмента'
+        )
+        parser.add_argument('--json', action='store_true')
+
+    def prepare(self, scenario):
+        cache.delete_many([KEY, lock_key(KEY)])
+        if scenario == 'stale':
+            # Срок годности прошёл, но запись ещё лежит в кеше
+            cache.set(KEY, ('старый фрагмент', 0.0, time.time() - 1), 60)
+
+    def run_round(self, getter, workers, render_seconds):
+        builds = []
+        barrier = threading.Barrier(workers)
+
+        def build():
+            builds.append(True)
+            time.sleep(render_seconds)
+            return 'фрагмент'
+
+        def request():
+            barrier.wait()
+            started = time.perf_counter()
+            getter(KEY, build, 60)
+            return time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            latencies = list(executor.map(
+                lambda _: request(), range(workers)))
+        return len(builds), latencies
+
+    def handle(self, *args, **options):
+        workers, rounds = options['workers'], options['rounds']
+        render_seconds = options['render_ms'] / 1000
+        results = []
+        for name, getter, scenario in (
+            ('naive', naive_get, 'cold'),
+            ('single-flight', get_or_build, 'cold'),
+            ('single-flight', get_or_build, 'stale'),
+        ):
+            builds, latencies = [], []
+            for _ in range(rounds):
+                self.prepare(scenario)
+                built, round_latencies = self.run_round(
+                    getter, workers, render_seconds)
+                builds.append(built)
+                latencies.extend(round_latencies)
+            latencies.sort()
+            results.append({
+                'strategy': name,
+                'scenario': scenario,
+                'workers': workers,
+                'rebuilds_per_round': statistics.mean(builds),
+                'max_rebuilds': max(builds),
+                'p50_ms': round(statistics.median(latencies) * 1000, 1),
+                'max_ms': round(latencies[-1] * 1000, 1),
+            })
+        cache.delete_many([KEY, lock_key(KEY)])
+        if options['json']:
+            self.stdout.write(json.dumps(results, ensure_ascii=False))
+            return
+        self.stdout.write(f'Кеш: {settings.CACHES["default"]["BACKEND"]}')
+        for row in results:
+            self.stdout.write(
+                '{strategy:>14} {scenario:>6}: пересборок за раунд '
+                '{rebuilds_per_round:.1f} (макс. {max_rebuilds}), '
+                'p50 {p50_ms} мс, макс. {max_ms} мс'.format(**row)
+            )
@@ -0,0 +1,77 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+
+from core.profiling import RenderProfile
+
+
+class Command(BaseCommand):
+    help = (
+        'Отрисовывает страницу несколько раз и выводит время по шаблонам, '
+        'include и тегам в среднем на один запрос'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Адрес страницы, например /')
+        parser.add_argument('--user', help='Открывать страницу от имени')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--limit', type=int, default=25)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед запросом, чтобы фрагменты лент '
+                 'отрисовывались каждый раз'
+        )
+        parser.add_argument('--json', action='store_true')
+
+    def client(self, username):
+        # Адрес не из INTERNAL_IPS: без панели отладки
+        client = Client(REMOTE_ADDR='10.0.0.1')
+        if username:
+            user = get_user_model().objects.filter(username=username).first()
+            if user is None:
+                raise CommandError(f'Нет пользователя {username}')
+            client.force_login(user)
+        return client
+
+    def get(self, client, path, cold):
+        if cold:
+            cache.clear()
+        response = client.get(path)
+        if response.status_code != 200:
+            raise CommandError(f'{path}: ответ {response.status_code}')
+
+    def handle(self, *args, **options):
+        client = self.client(options['user'])
+        path, repeat = options['path'], options['repeat']
+        with override_settings(DEBUG=False):
+            for _ in range(options['warmup']):
+                self.get(client, path, options['cold'])
+            started = time.perf_counter()
+            for _ in range(repeat):
+                self.get(client, path, options['cold'])
+            plain = (time.perf_counter() - started) / repeat
+            with RenderProfile() as profile:
+                for _ in range(repeat):
+                    self.get(client, path, options['cold'])
+        rows = profile.rows(divisor=repeat)[:options['limit']]
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'path': path, 'request_ms': round(plain * 1000, 3),
+                'nodes': rows,
+            }, ensure_ascii=False, indent=2))
+            return
+        self.stdout.write(
+            f'{path}: запрос {plain * 1000:.2f} мс без профиля, '
+            f'в среднем на запрос:')
+        self.stdout.write(
+            f'{"своё, мс":>9} {"всего, мс":>9} {"вызовов":>8}  узел')
+        for row in rows:
+            self.stdout.write(
+                f'{row["self_ms"]:9.3f} {row["total_ms"]:9.3f} '
+                f'{row["calls"]:8g}  {row["template"]}: {row["node"]}')
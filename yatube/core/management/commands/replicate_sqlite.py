@@ -0,0 +1,44 @@
+import sqlite3
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def replicate(source, target):
+    """Копирует файл SQLite целиком через backup API (без остановки)."""
+    with closing(sqlite3.connect(source)) as src, \
+            closing(sqlite3.connect(target)) as dst:
+        src.backup(dst)
+
+
+class Command(BaseCommand):
+    help = (
+        'Заменитель репликации для локальной проверки: копирует основную '
+        'базу SQLite в файлы реплик из DATABASE_REPLICAS, один раз или '
+        'периодически (--interval), изображая отставание реплик'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Повторять копирование раз в столько секунд'
+        )
+
+    def handle(self, *args, **options):
+        source = settings.DATABASES['default']
+        if source['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Команда копирует только базы SQLite')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не заданы: YATUBE_DB_REPLICAS')
+        while True:
+            started = time.perf_counter()
+            for alias in settings.DATABASE_REPLICAS:
+                replicate(source['NAME'], settings.DATABASES[alias]['NAME'])
+            self.stdout.write(
+                f'Реплики обновлены за '
+                f'{(time.perf_counter() - started) * 1000:.0f} мс')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,164 @@
+"""Раздача картинок записей и их миниатюр из MEDIA_ROOT.
+
+Отдаются только файлы с префиксами MEDIA_SERVE_PREFIXES. Ответ
+поддерживает условные запросы (ETag, If-Modified-Since → 304) и
+один диапазон Range (206, для If-Range — только при совпадении
+версии файла).
+
+С MEDIA_SENDFILE = 'x-accel-redirect' (nginx) или 'x-sendfile'
+(Apache, lighttpd) Django только проверяет путь и заголовки, а сам
+файл и диапазоны отдаёт прокси. Иначе файл идёт через FileResponse
+блоками по BLOCK_SIZE: сервер с wsgi.file_wrapper (gunicorn, uWSGI,
+mod_wsgi) передаёт его в сокет через os.sendfile с текущей позиции
+файла и ровно Content-Length байт, в том числе для диапазона.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+BLOCK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+SENDFILE_HEADERS = {
+    'x-accel-redirect': 'X-Accel-Redirect',
+    'x-sendfile': 'X-Sendfile',
+}
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """(начало, конец) байтов из Range или None — отдать файл целиком.
+
+    Несколько диапазонов и неверный синтаксис игнорируются, как
+    разрешает RFC 9110; диапазон за концом файла — RangeNotSatisfiable.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # bytes=-500: последние 500 байт
+        if not int(last):
+            raise RangeNotSatisfiable
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end:
+        if last and int(last) < start:
+            return None
+        raise RangeNotSatisfiable
+    return start, end
+
+
+class RangeFile:
+    """Открытый файл, из которого читаются только байты [start, end].
+
+    Методов tell и seek нет: FileResponse не пересчитывает
+    Content-Length, а os.sendfile у WSGI-сервера начинает с позиции
+    файла и берёт длину из Content-Length.
+    """
+
+    def __init__(self, file, start, end):
+        self.file = file
+        self.remaining = end - start + 1
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+class MediaFileResponse(FileResponse):
+    block_size = BLOCK_SIZE
+
+
+def resolve(path):
+    """Абсолютный путь к файлу по пути из URL или Http404."""
+    path = posixpath.normpath(path).lstrip('/')
+    if not path.startswith(tuple(settings.MEDIA_SERVE_PREFIXES)):
+        raise Http404
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    return path, full_path
+
+
+def set_validators(response, etag, mtime):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    patch_cache_control(
+        response, public=True, max_age=settings.MEDIA_MAX_AGE)
+    return response
+
+
+def range_allowed(request, etag, mtime):
+    """If-Range: диапазон только для той же версии файла."""
+    if_range = request.headers.get('If-Range')
+    if if_range is None:
+        return True
+    return if_range == etag or parse_http_date_safe(if_range) == mtime
+
+
+@require_safe
+def serve(request, path):
+    path, full_path = resolve(path)
+    stat = os.stat(full_path)
+    mtime = int(stat.st_mtime)
+    etag = f'"{mtime:x}-{stat.st_size:x}"'
+    conditional = get_conditional_response(
+        request, etag=etag, last_modified=mtime)
+    if conditional is not None:
+        return set_validators(conditional, etag, mtime)
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    header = SENDFILE_HEADERS.get(settings.MEDIA_SENDFILE)
+    if header is not None:
+        response = HttpResponse(content_type=content_type)
+        if header == 'X-Accel-Redirect':
+            response[header] = settings.MEDIA_ACCEL_PREFIX + quote(path)
+        else:
+            response[header] = full_path
+        return set_validators(response, etag, mtime)
+
+    byte_range = None
+    if 'Range' in request.headers and range_allowed(request, etag, mtime):
+        try:
+            byte_range = parse_range(request.headers['Range'], stat.st_size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+    start, end = byte_range or (0, stat.st_size - 1)
+    response = MediaFileResponse(
+        RangeFile(open(full_path, 'rb'), start, end),
+        content_type=content_type)
+    response['Content-Length'] = end - start + 1
+    response['Accept-Ranges'] = 'bytes'
+    if byte_range is not None:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    return set_validators(response, etag, mtime)
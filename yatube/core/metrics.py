@@ -0,0 +1,278 @@
+"""Метрики запросов: SQL, шаблоны, кеш и общее время по представлениям.
+
+Замеры одного запроса копятся в RequestMetrics (см. MetricsMiddleware),
+а суммы по представлениям — в памяти процесса. Раз в
+METRICS_FLUSH_INTERVAL секунд процесс переносит свои суммы в кеш Django,
+поэтому с общим кешем (file, redis) эндпоинт /metrics/ видит все воркеры.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.base import Template
+
+FLUSH_INTERVAL = getattr(settings, 'METRICS_FLUSH_INTERVAL', 10)
+PREFIX = 'yatube'
+SERIES_KEY = 'metrics:series'
+# Границы гистограммы времени ответа, в секундах
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Замеры одного запроса."""
+
+    __slots__ = (
+        'queries', 'db_time', 'template_time', 'template_depth',
+        'cache_hits', 'cache_misses', 'throttled', 'statements',
+    )
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.throttled = 0
+        # (sql, время) — отпечатки считаются, только если запрос медленный
+        self.statements = []
+
+    def activate(self):
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """Замеряет SQL, если подключение работает на запрос с метриками.
+
+    Текущий запрос берётся из ContextVar, поэтому замеры доходят и из
+    потоков, в которых асинхронные представления выполняют ORM.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        metrics.queries += 1
+        metrics.db_time += duration
+        metrics.statements.append((sql, duration))
+
+
+def instrument_connection(connection, **kwargs):
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+def count_cache(hit):
+    """Отмечает попадание или промах кеша в текущем запросе."""
+    metrics = _current.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+def count_throttled():
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.throttled += 1
+
+
+_original_render = Template.render
+
+
+def _timed_render(self, context):
+    metrics = _current.get()
+    if metrics is None:
+        return _original_render(self, context)
+    # Вложенные шаблоны (include) уже входят во время внешнего
+    metrics.template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        metrics.template_depth -= 1
+        if not metrics.template_depth:
+            metrics.template_time += time.perf_counter() - started
+
+
+def instrument_templates():
+    Template.render = _timed_render
+
+
+SPACES_RE = re.compile(r'\s+')
+PLACEHOLDERS_RE = re.compile(r'\((?:%s|\?)(?:,\s*(?:%s|\?))+\)')
+LITERALS_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def fingerprint(sql):
+    """SQL без значений: одинаковые запросы с разными id совпадают."""
+    sql = LITERALS_RE.sub('?', sql)
+    sql = PLACEHOLDERS_RE.sub('(...)', sql)
+    return SPACES_RE.sub(' ', sql).strip()
+
+
+def top_fingerprints(statements, limit=5):
+    """Самые дорогие отпечатки: (отпечаток, число, суммарное время)."""
+    totals = defaultdict(lambda: [0, 0.0])
+    for sql, duration in statements:
+        total = totals[fingerprint(sql)]
+        total[0] += 1
+        total[1] += duration
+    return sorted(
+        ((sql, count, duration)
+         for sql, (count, duration) in totals.items()),
+        key=lambda item: item[2], reverse=True,
+    )[:limit]
+
+
+def _micro(seconds):
+    return int(seconds * 1_000_000)
+
+
+FIELDS = (
+    'requests', 'duration_us', 'db_queries', 'db_us', 'template_us',
+    'cache_hits', 'cache_misses', 'slow_requests', 'throttled_requests',
+)
+BUCKET_LABELS = [str(bound) for bound in BUCKETS] + ['+Inf']
+
+
+class Registry:
+    """Суммы метрик процесса с периодическим сбросом в кеш."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._flushed_at = time.monotonic()
+
+    def observe(self, view, metrics, duration, slow):
+        values = (
+            1, _micro(duration), metrics.queries, _micro(metrics.db_time),
+            _micro(metrics.template_time), metrics.cache_hits,
+            metrics.cache_misses, int(slow), metrics.throttled,
+        )
+        bucket = len(FIELDS) + bisect_left(BUCKETS, duration)
+        with self._lock:
+            stats = self._pending.get(view)
+            if stats is None:
+                stats = self._pending[view] = [0] * (
+                    len(FIELDS) + len(BUCKET_LABELS))
+            for index, value in enumerate(values):
+                stats[index] += value
+            stats[bucket] += 1
+            due = time.monotonic() - self._flushed_at >= FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def _series(self, pending):
+        """Суммы по представлениям как серии (имя, представление, граница)."""
+        series = {}
+        for view, stats in pending.items():
+            for name, value in zip(FIELDS, stats):
+                series[name, view, ''] = value
+            for label, value in zip(BUCKET_LABELS, stats[len(FIELDS):]):
+                series['duration_bucket', view, label] = value
+        return series
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+        pending = self._series(pending)
+        known = cache.get(SERIES_KEY) or set()
+        if not known.issuperset(pending):
+            cache.set(SERIES_KEY, known | set(pending), None)
+        for series, value in pending.items():
+            key = 'metrics:' + '|'.join(series)
+            try:
+                cache.incr(key, value)
+            except ValueError:
+                if not cache.add(key, value, None):
+                    cache.incr(key, value)
+
+    def collect(self):
+        """Все серии из кеша: {(имя, представление, граница): значение}."""
+        self.flush()
+        series = sorted(cache.get(SERIES_KEY) or ())
+        values = cache.get_many(
+            ['metrics:' + '|'.join(item) for item in series])
+        return {
+            item: values.get('metrics:' + '|'.join(item), 0)
+            for item in series
+        }
+
+
+registry = Registry()
+
+COUNTERS = (
+    ('requests', 'requests_total', 'Число запросов', 1),
+    ('db_queries', 'db_queries_total', 'Число SQL-запросов', 1),
+    ('db_us', 'db_seconds_total', 'Время SQL', 1_000_000),
+    ('template_us', 'template_seconds_total', 'Время шаблонов', 1_000_000),
+    ('cache_hits', 'cache_hits_total', 'Попадания в кеш', 1),
+    ('cache_misses', 'cache_misses_total', 'Промахи кеша', 1),
+    ('slow_requests', 'slow_requests_total', 'Медленные запросы', 1),
+    ('throttled_requests', 'throttled_requests_total',
+     'Запросы, отклонённые ограничением частоты', 1),
+)
+
+
+def _number(value):
+    return f'{value:.6f}'.rstrip('0').rstrip('.') if value % 1 else str(
+        int(value))
+
+
+def _histogram(values, views):
+    name = f'{PREFIX}_request_duration_seconds'
+    lines = [
+        f'# HELP {name} Время ответа',
+        f'# TYPE {name} histogram',
+    ]
+    for view in views:
+        cumulative = 0
+        for bound in BUCKET_LABELS:
+            cumulative += values.get(('duration_bucket', view, bound), 0)
+            lines.append(
+                f'{name}_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+        total = values.get(('duration_us', view, ''), 0) / 1_000_000
+        lines.append(f'{name}_sum{{view="{view}"}} {_number(total)}')
+        lines.append(f'{name}_count{{view="{view}"}} {cumulative}')
+    return lines
+
+
+def render_prometheus():
+    """Метрики в текстовом формате Prometheus."""
+    values = registry.collect()
+    views = sorted({view for _, view, _ in values})
+    lines = []
+    for key, name, help_text, scale in COUNTERS:
+        name = f'{PREFIX}_{name}'
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        lines += [
+            f'{name}{{view="{view}"}} '
+            f'{_number(values.get((key, view, ""), 0) / scale)}'
+            for view in views
+        ]
+    lines += _histogram(values, views)
+    return '\n'.join(lines) + '\n'
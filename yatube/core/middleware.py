@@ -0,0 +1,176 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import FileResponse
+from django.middleware.gzip import GZipMiddleware as BaseGZipMiddleware
+
+from . import metrics, routers
+
+logger = logging.getLogger('core.metrics')
+
+PIN_COOKIE = 'primary_until'
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+class MetricsMiddleware:
+    """Замеряет запрос: SQL, шаблоны, кеш и общее время.
+
+    Замеры уходят в заголовок Server-Timing и в суммы для /metrics/,
+    а запросы дольше METRICS_SLOW_REQUEST_MS пишутся в журнал
+    с самыми дорогими отпечатками SQL.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow = getattr(settings, 'METRICS_SLOW_REQUEST_MS', 500) / 1000
+        self.server_timing = getattr(settings, 'METRICS_SERVER_TIMING', True)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        metrics.instrument_templates()
+        connection_created.connect(
+            metrics.instrument_connection, dispatch_uid='core.metrics')
+        for connection in connections.all():
+            metrics.instrument_connection(connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        current = metrics.RequestMetrics()
+        token = current.activate()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current.deactivate(token)
+        return self.finish(request, response, current, started)
+
+    async def __acall__(self, request):
+        current = metrics.RequestMetrics()
+        token = current.activate()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.deactivate(token)
+        return self.finish(request, response, current, started)
+
+    def finish(self, request, response, current, started):
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        slow = duration >= self.slow
+        metrics.registry.observe(view, current, duration, slow)
+        if slow:
+            self.log_slow(request, view, current, duration)
+        if self.server_timing:
+            response['Server-Timing'] = self.timing_header(current, duration)
+        return response
+
+    @staticmethod
+    def timing_header(current, duration):
+        return ', '.join((
+            f'db;dur={current.db_time * 1000:.1f};'
+            f'desc="{current.queries} queries"',
+            f'tpl;dur={current.template_time * 1000:.1f}',
+            f'cache;desc="{current.cache_hits} hits '
+            f'{current.cache_misses} misses"',
+            f'total;dur={duration * 1000:.1f}',
+        ))
+
+    @staticmethod
+    def log_slow(request, view, current, duration):
+        lines = [
+            f'  {count}x {total * 1000:.1f} ms: {sql}'
+            for sql, count, total in metrics.top_fingerprints(
+                current.statements)
+        ]
+        logger.warning(
+            'Медленный запрос %s %s (%s): %.0f ms, SQL %d за %.0f ms, '
+            'шаблоны %.0f ms\n%s',
+            request.method, request.path, view, duration * 1000,
+            current.queries, current.db_time * 1000,
+            current.template_time * 1000, '\n'.join(lines),
+        )
+
+
+class ReplicaMiddleware:
+    """Пускает чтения страниц из REPLICA_VIEWS на реплики базы.
+
+    Если запрос что-то записал, cookie закрепляет читателя за основной
+    базой на REPLICA_PIN_SECONDS секунд (см. core.routers).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.views = set(getattr(settings, 'REPLICA_VIEWS', ()))
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = routers.DatabaseState()
+        token = state.activate()
+        try:
+            response = self.get_response(request)
+        finally:
+            state.deactivate(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        state = routers.DatabaseState()
+        token = state.activate()
+        try:
+            response = await self.get_response(request)
+        finally:
+            state.deactivate(token)
+        return self.finish(response, state)
+
+    def pinned(self, request):
+        try:
+            until = float(request.COOKIES.get(PIN_COOKIE, 0))
+        except ValueError:
+            return False
+        return until > time.time()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Состояние меняется на месте: в асинхронном режиме этот метод
+        # выполняется в потоке с копией контекста
+        state = routers.current()
+        if (state is not None and request.method in SAFE_METHODS
+                and request.resolver_match.view_name in self.views
+                and not self.pinned(request)):
+            state.replica = routers.pick_replica()
+
+    def finish(self, response, state):
+        if state.wrote and self.pin_seconds:
+            response.set_cookie(
+                PIN_COOKIE, str(time.time() + self.pin_seconds),
+                max_age=self.pin_seconds, httponly=True, samesite='Lax')
+        return response
+
+
+class GZipMiddleware(BaseGZipMiddleware):
+    """GZip без файловых ответов (core.media).
+
+    Картинки уже сжаты, а сжатие потока убрало бы Content-Length:
+    пропали бы диапазоны и передача файла через os.sendfile.
+    """
+
+    def process_response(self, request, response):
+        if isinstance(response, FileResponse):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,104 @@
+"""Профиль отрисовки шаблонов: время по шаблонам, include и тегам.
+
+RenderProfile на время работы подменяет Template.render и
+Node.render_annotated и копит для каждого узла число вызовов, полное
+время и «своё» время без вложенных узлов. Узел называется по тегу
+({% url %}, {% ready_thumbnail %}, {% include 'имя' %}) или по
+выражению переменной ({{ post.text }}) и привязан к шаблону, в
+котором записан. Текст между тегами не замеряется.
+
+Замер сам замедляет отрисовку, поэтому цифры годятся для сравнения
+узлов между собой, а не как абсолютное время страницы.
+"""
+import time
+from collections import defaultdict
+
+from django.template.base import Node, Template, TextNode, VariableNode
+
+ROOT = '-'
+
+
+def node_label(node):
+    token = getattr(node, 'token', None)
+    if token is None:
+        return type(node).__name__
+    if isinstance(node, VariableNode):
+        return f'{{{{ {token.contents} }}}}'
+    bits = token.split_contents()
+    if bits[0] == 'include' and len(bits) > 1:
+        return f'{{% include {bits[1]} %}}'
+    return f'{{% {bits[0]} %}}'
+
+
+def origin_name(origin):
+    return getattr(origin, 'template_name', None) or getattr(
+        origin, 'name', None) or ROOT
+
+
+class RenderProfile:
+    """with RenderProfile() as profile: ...; profile.rows()"""
+
+    def __init__(self):
+        # (шаблон, узел) -> [вызовов, всего, своё]
+        self.stats = defaultdict(lambda: [0, 0.0, 0.0])
+        self.keys = {}
+        self.stack = []
+
+    def node_key(self, node):
+        key = self.keys.get(node)
+        if key is None:
+            key = self.keys[node] = (
+                origin_name(node.origin), node_label(node))
+        return key
+
+    def _measure(self, key, render, *args):
+        self.stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return render(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = self.stack.pop()
+            if self.stack:
+                self.stack[-1] += elapsed
+            entry = self.stats[key]
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] += elapsed - children
+
+    def __enter__(self):
+        self.template_render = Template.render
+        self.node_render = Node.render_annotated
+        profile = self
+
+        def template_render(template, context):
+            return profile._measure(
+                (origin_name(template.origin), '(шаблон целиком)'),
+                profile.template_render, template, context)
+
+        def node_render(node, context):
+            if isinstance(node, TextNode):
+                return profile.node_render(node, context)
+            return profile._measure(
+                profile.node_key(node), profile.node_render, node, context)
+
+        Template.render = template_render
+        Node.render_annotated = node_render
+        return self
+
+    def __exit__(self, *exc_info):
+        Template.render = self.template_render
+        Node.render_annotated = self.node_render
+
+    def rows(self, divisor=1):
+        """Строки отчёта по убыванию своего времени, время в мс."""
+        return sorted((
+            {
+                'template': template,
+                'node': label,
+                'calls': calls / divisor,
+                'total_ms': round(total * 1000 / divisor, 3),
+                'self_ms': round(own * 1000 / divisor, 3),
+            }
+            for (template, label), (calls, total, own) in self.stats.items()
+        ), key=lambda row: row['self_ms'], reverse=True)
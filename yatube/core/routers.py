@@ -0,0 +1,75 @@
+"""Чтение с реплик базы для страниц-лент.
+
+ReplicaMiddleware решает для каждого запроса, можно ли читать с
+реплики: только GET страниц из REPLICA_VIEWS и только если читатель
+недавно ничего не записывал. После записи ответ ставит cookie, и
+REPLICA_PIN_SECONDS секунд все чтения этого читателя идут в основную
+базу: свои изменения он видит сразу, даже если реплика отстаёт.
+Запись всегда идёт в default.
+
+Отставание реплик должно укладываться в это окно. Фрагменты лент,
+собранные на реплике, кешируются отдельно и не дольше окна
+(posts.cache.fragment), чтобы не попасть к только что писавшему.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_state = ContextVar('database_state', default=None)
+
+
+class DatabaseState:
+    """Выбор базы для текущего запроса."""
+
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+    def activate(self):
+        return _state.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _state.reset(token)
+
+
+def current():
+    return _state.get()
+
+
+def reading_replica():
+    """Читает ли текущий запрос с реплики."""
+    state = _state.get()
+    return state is not None and state.replica is not None and (
+        not state.wrote)
+
+
+def pick_replica():
+    replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+    return random.choice(replicas) if replicas else None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.wrote:
+            return None
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии default, связи между ними безопасны
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in getattr(settings, 'DATABASE_REPLICAS', ()):
+            return False
+        return None
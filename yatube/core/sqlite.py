@@ -0,0 +1,76 @@
+"""Настройка SQLite для одновременных запросов.
+
+Каждое новое соединение получает PRAGMA из DEFAULT_PRAGMAS (настройка
+SQLITE_PRAGMAS заменяет их целиком): журнал WAL
+(читатели не ждут писателя), synchronous=NORMAL (в WAL fsync только
+на контрольных точках), mmap и кеш страниц, ожидание блокировки
+вместо мгновенного «database is locked». Соединения переживают запрос
+(CONN_MAX_AGE) и проверяются перед повторным использованием
+(CONN_HEALTH_CHECKS), поэтому PRAGMA выполняются редко.
+
+Писатель в SQLite один на всю базу. serialized_write() ставит короткие
+записи потоков процесса в очередь и выполняет каждую одной
+транзакцией: записи не дерутся за блокировку файла, а запись вместе
+с сигналами (счётчики, ленты, поиск) стоит одну фиксацию вместо
+десятка. Файлы моделей сохраняет save_files() до очереди, чтобы
+запись на диск не держала остальных писателей; раскладка записи по
+лентам подписчиков (до TIMELINE_FANOUT_LIMIT строк) остаётся внутри.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections, models, transaction
+
+# busy_timeout первым: смене журнала тоже нужна блокировка
+DEFAULT_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+_write_lock = threading.RLock()
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Приёмник connection_created: PRAGMA для нового соединения."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', DEFAULT_PRAGMAS)
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def save_files(instance):
+    """Сохраняет в хранилище новые файлы модели, как это сделал бы save().
+
+    После этого save() файл уже не пишет, и под serialized_write()
+    остаются только запросы к базе.
+    """
+    for field in instance._meta.concrete_fields:
+        if not isinstance(field, models.FileField):
+            continue
+        file = getattr(instance, field.attname)
+        if file and not file._committed:
+            file.save(file.name, file.file, save=False)
+
+
+@contextmanager
+def serialized_write(using='default'):
+    """Короткая запись: по очереди с другими потоками, одной транзакцией.
+
+    Очередь нужна только SQLite; её можно выключить настройкой
+    SQLITE_SERIALIZE_WRITES, транзакция остаётся в любом случае.
+    """
+    serialize = connections[using].vendor == 'sqlite' and getattr(
+        settings, 'SQLITE_SERIALIZE_WRITES', True)
+    if not serialize:
+        with transaction.atomic(using=using):
+            yield
+        return
+    with _write_lock, transaction.atomic(using=using):
+        yield
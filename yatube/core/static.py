@@ -0,0 +1,165 @@
+"""Раздача собранной статики прямо из WSGI, минуя Django.
+
+StaticFilesApp оборачивает WSGI-приложение: запросы к STATIC_URL,
+для которых в STATIC_ROOT есть файл, обслуживаются сразу, остальные
+уходят в Django. Каталог читается один раз при запуске, поэтому
+заголовки ответа готовы заранее, а после collectstatic процесс
+нужно перезапустить.
+
+Файлы с хешем в имени (из манифеста collectstatic) не меняются
+никогда и отдаются с Cache-Control immutable на год, остальные —
+на минуту. Если клиент принимает br или gzip, отдаётся заранее
+сжатая копия (core.storage.CompressedManifestStaticStorage).
+Тело передаётся через wsgi.file_wrapper: gunicorn и uWSGI отправляют
+такой файл через sendfile, без копирования в процесс.
+"""
+import json
+import mimetypes
+import os
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.utils.http import http_date, parse_http_date_safe
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=60'
+# Предпочтение сжатых копий: сначала br, потом gzip
+ENCODINGS = (('br', 'br'), ('gzip', 'gz'))
+BLOCK_SIZE = 64 * 1024
+TEXT_TYPES = ('application/javascript', 'application/json', 'image/svg+xml')
+
+
+def content_type(path):
+    guessed = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    if guessed.startswith('text/') or guessed in TEXT_TYPES:
+        return f'{guessed}; charset=utf-8'
+    return guessed
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме запрещённых через q=0."""
+    accepted = set()
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if not float(params[2:]):
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class Variant:
+    """Один файл на диске (оригинал или сжатая копия) и его заголовки."""
+
+    __slots__ = ('path', 'etag', 'mtime', 'headers')
+
+    def __init__(self, path, headers, encoding=None):
+        stat = os.stat(path)
+        self.path = path
+        self.mtime = int(stat.st_mtime)
+        self.etag = f'"{self.mtime:x}-{stat.st_size:x}"'
+        self.headers = headers + [
+            ('Content-Length', str(stat.st_size)),
+            ('Last-Modified', http_date(self.mtime)),
+            ('ETag', self.etag),
+        ]
+        if encoding:
+            self.headers.append(('Content-Encoding', encoding))
+
+
+class StaticFile:
+    def __init__(self, path, cache_control):
+        headers = [
+            ('Content-Type', content_type(path)),
+            ('Cache-Control', cache_control),
+        ]
+        available = [
+            (encoding, f'{path}.{suffix}') for encoding, suffix in ENCODINGS
+            if os.path.isfile(f'{path}.{suffix}')
+        ]
+        if available:
+            headers.append(('Vary', 'Accept-Encoding'))
+        self.compressed = [
+            (encoding, Variant(compressed, headers, encoding))
+            for encoding, compressed in available
+        ]
+        self.original = Variant(path, headers)
+
+    def choose(self, environ):
+        if self.compressed:
+            accepted = accepted_encodings(
+                environ.get('HTTP_ACCEPT_ENCODING', ''))
+            for encoding, variant in self.compressed:
+                if encoding in accepted:
+                    return variant
+        return self.original
+
+    def serve(self, environ, start_response):
+        method = environ['REQUEST_METHOD']
+        if method not in ('GET', 'HEAD'):
+            start_response('405 Method Not Allowed', [
+                ('Allow', 'GET, HEAD'), ('Content-Length', '0')])
+            return []
+        variant = self.choose(environ)
+        if self.not_modified(environ, variant):
+            start_response('304 Not Modified', [
+                header for header in variant.headers
+                if header[0] != 'Content-Length'
+            ])
+            return []
+        start_response('200 OK', variant.headers)
+        if method == 'HEAD':
+            return []
+        wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return wrapper(open(variant.path, 'rb'), BLOCK_SIZE)
+
+    @staticmethod
+    def not_modified(environ, variant):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            etags = {tag.strip() for tag in if_none_match.split(',')}
+            return variant.etag in etags or '*' in etags
+        since = parse_http_date_safe(
+            environ.get('HTTP_IF_MODIFIED_SINCE', ''))
+        return since is not None and variant.mtime <= since
+
+
+class StaticFilesApp:
+    """WSGI-обёртка, которая сама отдаёт файлы из STATIC_ROOT."""
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.root = root or settings.STATIC_ROOT
+        self.prefix = prefix or settings.STATIC_URL
+        self.files = self.scan() if os.path.isdir(self.root) else {}
+
+    def immutable_names(self):
+        """Имена с хешем из манифеста collectstatic."""
+        manifest = os.path.join(self.root, 'staticfiles.json')
+        if not os.path.isfile(manifest):
+            return set()
+        with open(manifest, encoding='utf-8') as file:
+            return set(json.load(file).get('paths', {}).values())
+
+    def scan(self):
+        immutable = self.immutable_names()
+        files = {}
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, name)
+                url = os.path.relpath(path, self.root).replace(os.sep, '/')
+                files[self.prefix + url] = StaticFile(
+                    path, IMMUTABLE if url in immutable else REVALIDATE)
+        return files
+
+    def __call__(self, environ, start_response):
+        static = self.files.get(environ.get('PATH_INFO', ''))
+        if static is None:
+            return self.application(environ, start_response)
+        return static.serve(environ, start_response)
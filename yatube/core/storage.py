@@ -0,0 +1,100 @@
+"""Хранилища статики для collectstatic.
+
+ManifestStaticStorage даёт файлам имена с хешем содержимого и пишет
+манифест, по которому {% static %} подставляет эти имена.
+CompressedManifestStaticStorage вдобавок кладёт рядом с каждым
+файлом с хешем сжатые копии: .gz всегда, .br — если установлен
+пакет brotli. Копия сохраняется, только если она заметно меньше
+оригинала. Раздаёт их core.static.StaticFilesApp.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Уже сжатые форматы (png, ico, woff2...) повторно не сжимаются
+COMPRESSIBLE_EXTENSIONS = frozenset({
+    '.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html',
+    '.xml', '.ico',
+})
+# Сжатая копия нужна, если она меньше оригинала хотя бы на 5%
+MIN_SAVING = 0.95
+
+
+def compress_gzip(content):
+    # mtime=0: одинаковый вход даёт одинаковый файл при каждой сборке
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def compress_brotli(content):
+    return brotli.compress(content, quality=11)
+
+
+def compressors():
+    """Расширение сжатой копии -> функция сжатия."""
+    available = {'gz': compress_gzip}
+    if brotli is not None:
+        available['br'] = compress_brotli
+    return available
+
+
+class ManifestStaticStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в именах файлов.
+
+    Карты исходников (.map) в static/ не хранятся, а bootstrap.min.css
+    ссылается на свою: такие ссылки остаются как есть, вместо того
+    чтобы остановить collectstatic.
+    """
+
+    def url_converter(self, name, hashed_files, template=None):
+        convert = super().url_converter(name, hashed_files, template)
+
+        def converter(matchobj):
+            try:
+                return convert(matchobj)
+            except ValueError:
+                if matchobj['url'].strip().endswith('.map'):
+                    return matchobj[0]
+                raise
+        return converter
+
+
+class CompressedManifestStaticStorage(ManifestStaticStorage):
+    """Статика с хешами и заранее сжатыми копиями (.gz, .br)."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in sorted(hashed_names):
+            for extension in self.compress(hashed_name):
+                yield hashed_name, f'{hashed_name}.{extension}', True
+
+    def compress(self, name):
+        """Сохраняет сжатые копии файла, возвращает их расширения."""
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return []
+        with self.open(name) as original:
+            content = original.read()
+        saved = []
+        for extension, compress in compressors().items():
+            compressed = compress(content)
+            if len(compressed) > len(content) * MIN_SAVING:
+                continue
+            target = f'{name}.{extension}'
+            if self.exists(target):
+                self.delete(target)
+            self._save(target, ContentFile(compressed))
+            saved.append(extension)
+        return saved
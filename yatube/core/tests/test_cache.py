@@ -0,0 +1,68 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core import cache as stampede
+
+KEY = 'test:fragment'
+
+
+class GetOrBuildTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.builds = 0
+
+    def build(self, value='свежий'):
+        self.builds += 1
+        return value
+
+    def test_value_built_once(self):
+        """Пока срок не вышел, значение берётся из кеша."""
+        for _ in range(3):
+            self.assertEqual(
+                stampede.get_or_build(KEY, self.build, 60), 'свежий')
+        self.assertEqual(self.builds, 1)
+
+    def test_expired_value_rebuilt(self):
+        cache.set(KEY, ('старый', 0.0, time.time() - 1), 60)
+        self.assertEqual(stampede.get_or_build(KEY, self.build, 60), 'свежий')
+        self.assertEqual(self.builds, 1)
+
+    def test_stale_value_served_while_other_builds(self):
+        """Пока другой процесс держит блокировку, отдаётся прежнее."""
+        cache.set(KEY, ('старый', 0.0, time.time() - 1), 60)
+        cache.set(stampede.lock_key(KEY), 'чужой', 60)
+        self.assertEqual(stampede.get_or_build(KEY, self.build, 60), 'старый')
+        self.assertEqual(self.builds, 0)
+
+    def test_builds_itself_when_builder_hangs(self):
+        cache.set(stampede.lock_key(KEY), 'чужой', 60)
+        with mock.patch.object(stampede, 'WAIT_TIMEOUT', 0.1):
+            self.assertEqual(
+                stampede.get_or_build(KEY, self.build, 60), 'свежий')
+        self.assertEqual(self.builds, 1)
+
+    def test_concurrent_requests_build_once(self):
+        """Одновременный промах у многих потоков — одна пересборка."""
+        workers = 8
+        barrier = threading.Barrier(workers)
+        results = []
+
+        def slow_build():
+            time.sleep(0.1)
+            return self.build()
+
+        def request():
+            barrier.wait()
+            results.append(stampede.get_or_build(KEY, slow_build, 60))
+
+        threads = [threading.Thread(target=request) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['свежий'] * workers)
+        self.assertEqual(self.builds, 1)
@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.media import RangeNotSatisfiable, parse_range, serve
+from core.middleware import GZipMiddleware
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+CONTENT = bytes(range(256)) * 40
+URL = '/media/posts/big.jpg'
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_SENDFILE=None)
+class MediaServeTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'))
+        with open(os.path.join(TEMP_MEDIA_ROOT, 'posts', 'big.jpg'),
+                  'wb') as file:
+            file.write(CONTENT)
+        with open(os.path.join(TEMP_MEDIA_ROOT, 'secret.txt'), 'w') as file:
+            file.write('секрет')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_full_file(self):
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+    def test_range(self):
+        cases = {
+            'bytes=100-199': (100, 199),
+            'bytes=10000-': (10000, len(CONTENT) - 1),
+            'bytes=-16': (len(CONTENT) - 16, len(CONTENT) - 1),
+            'bytes=10230-99999': (10230, len(CONTENT) - 1),
+        }
+        for header, (start, end) in cases.items():
+            with self.subTest(header):
+                response = self.client.get(URL, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(
+                    b''.join(response.streaming_content),
+                    CONTENT[start:end + 1])
+                self.assertEqual(
+                    response['Content-Range'],
+                    f'bytes {start}-{end}/{len(CONTENT)}')
+                self.assertEqual(
+                    response['Content-Length'], str(end - start + 1))
+
+    def test_range_not_satisfiable(self):
+        response = self.client.get(URL, HTTP_RANGE='bytes=20000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_conditional_requests(self):
+        first = self.client.get(URL)
+        not_modified = {
+            'etag': {'HTTP_IF_NONE_MATCH': first['ETag']},
+            'date': {'HTTP_IF_MODIFIED_SINCE': first['Last-Modified']},
+        }
+        for name, headers in not_modified.items():
+            with self.subTest(name):
+                response = self.client.get(URL, **headers)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], first['ETag'])
+        stale = self.client.get(
+            URL, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"другой"')
+        self.assertEqual(stale.status_code, 200)
+        current = self.client.get(
+            URL, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=first['ETag'])
+        self.assertEqual(current.status_code, 206)
+
+    def test_only_post_images(self):
+        for url in ('/media/secret.txt', '/media/posts/../secret.txt',
+                    '/media/posts/нет.jpg', '/media/posts/'):
+            with self.subTest(url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.post(URL).status_code, 405)
+
+    @override_settings(MEDIA_SENDFILE='x-accel-redirect')
+    def test_accel_redirect(self):
+        response = self.client.get(URL)
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/big.jpg')
+        self.assertEqual(response.content, b'')
+        self.assertIn('ETag', response)
+
+    def test_gzip_skips_files(self):
+        request = RequestFactory().get(URL, HTTP_ACCEPT_ENCODING='gzip')
+        middleware = GZipMiddleware(
+            lambda request: serve(request, 'posts/big.jpg'))
+        response = middleware(request)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        response.close()
+
+
+class ParseRangeTest(SimpleTestCase):
+    def test_parse_range(self):
+        cases = {
+            'bytes=0-0': (0, 0),
+            'bytes=5-': (5, 99),
+            'bytes=-200': (0, 99),
+            'bytes=0-9,20-29': None,
+            'bytes=9-5': None,
+            'items=0-9': None,
+            'bytes=-': None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header):
+                self.assertEqual(parse_range(header, 100), expected)
+        for header in ('bytes=100-', 'bytes=-0'):
+            with self.subTest(header), self.assertRaises(RangeNotSatisfiable):
+                parse_range(header, 100)
@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Post
+
+User = get_user_model()
+
+
+class FingerprintTest(SimpleTestCase):
+    def test_values_removed(self):
+        self.assertEqual(
+            metrics.fingerprint(
+                "SELECT * FROM t WHERE id IN (%s, %s, %s)\n"
+                "  AND name = 'кот' LIMIT 21"),
+            'SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?',
+        )
+
+    def test_top_fingerprints(self):
+        statements = [
+            ('SELECT 1 FROM t WHERE id = %s', 0.01),
+            ('SELECT 1 FROM t WHERE id = %s', 0.01),
+            ('SELECT 2 FROM u', 0.001),
+        ]
+        self.assertEqual(metrics.top_fingerprints(statements, 1), [
+            ('SELECT ? FROM t WHERE id = %s', 2, 0.02)])
+
+
+class MetricsMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.create(text='Запись', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        metrics.registry.flush()
+        cache.clear()
+
+    def test_server_timing_header(self):
+        self.client.get(reverse('posts:index'))
+        header = self.client.get(reverse('posts:index'))['Server-Timing']
+        self.assertRegex(
+            header,
+            r'^db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, '
+            r'cache;desc="[1-9]\d* hits 0 misses", total;dur=[\d.]+$',
+        )
+
+    def test_prometheus_endpoint(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn('yatube_requests_total{view="posts:index"} 2', text)
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            text)
+        self.assertRegex(
+            text, r'yatube_db_queries_total\{view="posts:index"\} [1-9]')
+        self.assertRegex(
+            text, r'yatube_cache_misses_total\{view="posts:index"\} [1-9]')
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.1'])
+    def test_endpoint_hidden_from_others(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_TOKEN='секрет')
+    def test_endpoint_requires_token(self):
+        """С токеном адрес не важен: нужен заголовок Authorization."""
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer чужой')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer секрет')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_SLOW_REQUEST_MS=0)
+    def test_slow_request_logged_with_fingerprints(self):
+        with self.assertLogs('core.metrics', 'WARNING') as logs:
+            self.client.get(
+                reverse('posts:profile', args=[self.user.username]))
+        self.assertIn('posts:profile', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+        self.assertIn('yatube_slow_requests_total{view="posts:profile"} 1',
+                      metrics.render_prometheus())
@@ -0,0 +1,25 @@
+from django.template import Context, Template
+from django.test import SimpleTestCase
+
+from core.profiling import RenderProfile
+
+
+class RenderProfileTest(SimpleTestCase):
+    def test_nodes_timed_with_self_time(self):
+        template = Template(
+            "{% for item in items %}{% url 'posts:index' %}{{ item }}"
+            "{% endfor %}")
+        with RenderProfile() as profile:
+            template.render(Context({'items': [1, 2, 3]}))
+        rows = {row['node']: row for row in profile.rows()}
+        self.assertEqual(rows['{% url %}']['calls'], 3)
+        self.assertEqual(rows['{{ item }}']['calls'], 3)
+        loop = rows['{% for %}']
+        self.assertLess(loop['self_ms'], loop['total_ms'])
+        self.assertEqual(rows['(шаблон целиком)']['calls'], 1)
+
+    def test_patches_removed(self):
+        render = Template.render
+        with RenderProfile():
+            self.assertIsNot(Template.render, render)
+        self.assertIs(Template.render, render)
@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (
+    AsyncClient, SimpleTestCase, TestCase, override_settings)
+from django.urls import reverse
+
+from core import routers
+from core.middleware import PIN_COOKIE
+from posts import cache as feed_cache
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+        self.state = routers.DatabaseState()
+        token = self.state.activate()
+        self.addCleanup(self.state.deactivate, token)
+
+    def test_reads_follow_state(self):
+        self.assertIsNone(self.router.db_for_read(Post))
+        self.state.replica = 'replica1'
+        self.assertEqual(self.router.db_for_read(Post), 'replica1')
+
+    def test_reads_after_write_go_to_primary(self):
+        self.state.replica = 'replica1'
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertIsNone(self.router.db_for_read(Post))
+
+    def test_replica_fragments_kept_apart(self):
+        """Фрагмент с реплики не достаётся читателю основной базы."""
+        cache.clear()
+        self.state.replica = 'replica1'
+        self.assertEqual(feed_cache.fragment('key', lambda: 'old'), 'old')
+        self.state.replica = None
+        self.assertEqual(feed_cache.fragment('key', lambda: 'new'), 'new')
+
+    def test_no_migrations_on_replicas(self):
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
+
+
+# Реплика подменяется на default: выбор реплики виден по вызовам
+@mock.patch('core.routers.pick_replica', return_value='default')
+class ReplicaMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Запись', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_feed_reads_from_replica(self, pick):
+        response = self.client.get(reverse('posts:index'))
+        pick.assert_called_once_with()
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_other_pages_read_primary(self, pick):
+        self.client.get(reverse('posts:search'))
+        pick.assert_not_called()
+
+    def test_writer_pinned_to_primary(self, pick):
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'})
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.client.get(reverse('posts:post_detail', args=[self.post.pk]))
+        pick.assert_not_called()
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_pin_disabled(self, pick):
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'})
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    @override_settings(ROOT_URLCONF='yatube.urls_async')
+    async def test_async_views(self, pick):
+        client = AsyncClient()
+        await client.get(reverse('posts:index'))
+        pick.assert_called_once_with()
@@ -0,0 +1,65 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# Профиль загружается в отдельном процессе: настройки читаются один раз
+DUMP = '''
+import json
+from django.conf import settings
+print(json.dumps({
+    "debug": settings.DEBUG,
+    "apps": settings.INSTALLED_APPS,
+    "middleware": settings.MIDDLEWARE,
+    "processors": settings.TEMPLATES[0]["OPTIONS"]["context_processors"],
+    "loaders": settings.TEMPLATES[0]["OPTIONS"].get("loaders"),
+}))
+'''
+
+
+class SettingsProfilesTest(SimpleTestCase):
+    def load(self, prelude='', **env):
+        result = subprocess.run(
+            [sys.executable, '-c', prelude + DUMP], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, env={
+                **os.environ, 'DJANGO_SETTINGS_MODULE': 'yatube.settings',
+                **env})
+        return result
+
+    def test_prod_profile(self):
+        result = self.load(
+            YATUBE_ENV='prod', YATUBE_SECRET_KEY='ключ',
+            YATUBE_ALLOWED_HOSTS='example.com', YATUBE_CACHE='locmem')
+        self.assertEqual(result.returncode, 0, result.stderr)
+        values = json.loads(result.stdout)
+        self.assertFalse(values['debug'])
+        self.assertNotIn('debug_toolbar', values['apps'])
+        self.assertNotIn(
+            'django.template.context_processors.debug', values['processors'])
+        self.assertIn('core.middleware.GZipMiddleware',
+                      values['middleware'])
+        self.assertEqual(
+            values['loaders'][0][0], 'django.template.loaders.cached.Loader')
+
+    def test_prod_requires_secret_key(self):
+        result = self.load(
+            YATUBE_ENV='prod', YATUBE_SECRET_KEY='',
+            YATUBE_ALLOWED_HOSTS='example.com')
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('YATUBE_SECRET_KEY', result.stderr)
+
+    def test_prod_redis_requires_client(self):
+        result = self.load(
+            prelude='import sys; sys.modules["redis"] = None\n',
+            YATUBE_ENV='prod', YATUBE_SECRET_KEY='ключ',
+            YATUBE_ALLOWED_HOSTS='example.com')
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('пакет redis', result.stderr)
+
+    def test_dev_profile_is_default(self):
+        values = json.loads(self.load(YATUBE_ENV='dev').stdout)
+        self.assertTrue(values['debug'])
+        self.assertIn('debug_toolbar', values['apps'])
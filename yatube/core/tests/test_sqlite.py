@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.sqlite import save_files, serialized_write
+from posts import cache as feed_cache
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class ConnectionPragmasTest(SimpleTestCase):
+    def test_new_connection_tuned(self):
+        """Файловая база сразу переходит в WAL с нужными PRAGMA."""
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, ignore_errors=True)
+        default = connections['default']
+        wrapper = type(default)({
+            **default.settings_dict,
+            'NAME': os.path.join(workdir, 'db.sqlite3'),
+        }, alias='pragmas')
+        wrapper.connect()
+        self.addCleanup(wrapper.close)
+        cursor = wrapper.connection.cursor()
+        values = {
+            name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+            for name in ('journal_mode', 'synchronous', 'busy_timeout')
+        }
+        self.assertEqual(
+            values, {'journal_mode': 'wal', 'synchronous': 1,
+                     'busy_timeout': 5000})
+
+
+class SerializedWriteTest(TestCase):
+    def test_write_is_one_transaction(self):
+        with self.assertRaises(ValueError):
+            with serialized_write():
+                Group.objects.create(title='Группа', slug='group')
+                with serialized_write():
+                    Group.objects.create(title='Вторая', slug='second')
+                raise ValueError
+        self.assertFalse(Group.objects.exists())
+
+    def test_feed_versions_bumped_after_commit(self):
+        """Фрагмент, собранный до фиксации, не переживает её."""
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with serialized_write():
+                Group.objects.create(title='Группа', slug='group')
+                version, = feed_cache.get_versions([feed_cache.GROUPS])
+        self.assertTrue(callbacks)
+        self.assertNotEqual(
+            feed_cache.get_versions([feed_cache.GROUPS]), [version])
+
+    def test_files_saved_outside_queue(self):
+        """Файл пишется до очереди, под ней остаётся только база."""
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        post = Post(
+            text='Запись', author=User.objects.create_user(username='auth'),
+            image=SimpleUploadedFile('photo.jpg', b'jpeg', 'image/jpeg'))
+        with override_settings(MEDIA_ROOT=media):
+            save_files(post)
+            self.assertTrue(post.image._committed)
+            self.assertTrue(os.path.exists(post.image.path))
+            name = post.image.name
+            with mock.patch.object(post.image.storage, 'save') as save:
+                with serialized_write():
+                    post.save()
+        save.assert_not_called()
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, name)
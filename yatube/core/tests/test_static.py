@@ -0,0 +1,111 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core.static import IMMUTABLE, REVALIDATE, StaticFilesApp
+
+STATIC_ROOT = tempfile.mkdtemp()
+STORAGES = {
+    **settings.STORAGES,
+    'staticfiles': {
+        'BACKEND': 'core.storage.CompressedManifestStaticStorage',
+    },
+}
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT, STORAGES=STORAGES)
+class StaticPipelineTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(STATIC_ROOT, 'staticfiles.json')) as file:
+            cls.paths = json.load(file)['paths']
+        cls.app = StaticFilesApp(cls.django_app, root=STATIC_ROOT)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    @staticmethod
+    def django_app(environ, start_response):
+        start_response('404 Not Found', [])
+        return [b'django']
+
+    def get(self, path, method='GET', **headers):
+        response = {}
+
+        def start_response(status, response_headers):
+            response['status'] = status
+            response['headers'] = dict(response_headers)
+
+        body = self.app({'PATH_INFO': path, 'REQUEST_METHOD': method,
+                         **headers}, start_response)
+        response['body'] = b''.join(body)
+        if hasattr(body, 'close'):
+            body.close()
+        return response
+
+    def test_hashed_files_compressed(self):
+        hashed = self.paths['css/bootstrap.min.css']
+        self.assertNotEqual(hashed, 'css/bootstrap.min.css')
+        with open(os.path.join(STATIC_ROOT, hashed), 'rb') as original, \
+                gzip.open(os.path.join(STATIC_ROOT, hashed + '.gz')) as gz:
+            self.assertEqual(gz.read(), original.read())
+        # png уже сжат
+        self.assertFalse(os.path.exists(
+            os.path.join(STATIC_ROOT, self.paths['img/logo.png'] + '.gz')))
+
+    def test_hashed_file_immutable(self):
+        url = settings.STATIC_URL + self.paths['css/bootstrap.min.css']
+        response = self.get(url)
+        self.assertEqual(response['status'], '200 OK')
+        self.assertEqual(response['headers']['Cache-Control'], IMMUTABLE)
+        self.assertEqual(response['headers']['Vary'], 'Accept-Encoding')
+        self.assertNotIn('Content-Encoding', response['headers'])
+        self.assertEqual(
+            int(response['headers']['Content-Length']),
+            len(response['body']))
+        plain = self.get(settings.STATIC_URL + 'css/bootstrap.min.css')
+        self.assertEqual(plain['headers']['Cache-Control'], REVALIDATE)
+
+    def test_compressed_variant(self):
+        url = settings.STATIC_URL + self.paths['css/bootstrap.min.css']
+        plain = self.get(url)
+        response = self.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response['body']), plain['body'])
+        refused = self.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', refused['headers'])
+
+    def test_conditional_requests(self):
+        url = settings.STATIC_URL + self.paths['js/comments.js']
+        first = self.get(url)
+        cases = {
+            'etag': {'HTTP_IF_NONE_MATCH': first['headers']['ETag']},
+            'date': {'HTTP_IF_MODIFIED_SINCE':
+                     first['headers']['Last-Modified']},
+        }
+        for name, headers in cases.items():
+            with self.subTest(name):
+                response = self.get(url, **headers)
+                self.assertEqual(response['status'], '304 Not Modified')
+                self.assertEqual(response['body'], b'')
+        changed = self.get(url, HTTP_IF_NONE_MATCH='"другой"')
+        self.assertEqual(changed['status'], '200 OK')
+
+    def test_other_requests_go_to_django(self):
+        for path in ('/', settings.STATIC_URL + 'нет.css'):
+            with self.subTest(path):
+                self.assertEqual(self.get(path)['body'], b'django')
+        url = settings.STATIC_URL + self.paths['js/comments.js']
+        self.assertEqual(self.get(url, 'HEAD')['body'], b'')
+        self.assertEqual(
+            self.get(url, 'POST')['status'], '405 Method Not Allowed')
@@ -0,0 +1,113 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics, throttling
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class ConsumeTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def consume(self, moment):
+        # Кеш считает сроки хранения по time.time, корзина — по time_ns
+        with mock.patch('time.time_ns', return_value=moment * 10 ** 9), \
+                mock.patch('time.time', return_value=moment):
+            return throttling.consume('throttle:test', '3/m')
+
+    def test_burst_then_refill(self):
+        """Три запроса сразу, затем по одному раз в 20 секунд."""
+        self.assertEqual([self.consume(0) for _ in range(3)], [0, 0, 0])
+        self.assertEqual(self.consume(0), 20)
+        self.assertEqual(self.consume(15), 5)
+        self.assertEqual(self.consume(20), 0)
+        self.assertEqual(self.consume(21), 19)
+
+    def test_full_bucket_after_pause(self):
+        for _ in range(3):
+            self.consume(0)
+        self.assertEqual([self.consume(600) for _ in range(3)], [0, 0, 0])
+        self.assertGreater(self.consume(600), 0)
+
+    def test_bucket_outlives_paced_requests(self):
+        """Запись не истекает, пока корзина не наполнится."""
+        self.assertEqual([self.consume(0) for _ in range(3)], [0, 0, 0])
+        self.assertEqual(
+            [self.consume(moment) for moment in (20, 40, 60)], [0, 0, 0])
+        self.assertEqual(self.consume(62), 18)
+        self.assertEqual(self.consume(80), 0)
+        self.assertGreater(self.consume(80), 0)
+
+    def test_refill_keeps_concurrent_takes(self):
+        """Жетон, взятый другим процессом во время подъёма, не теряется."""
+        key = 'throttle:test'
+        with mock.patch('time.time', return_value=30):
+            # Корзина наполнилась на 10-й секунде, запись ещё не истекла
+            cache.set(key, 10_000_000)
+        incr = cache.incr
+
+        def racing_incr(key, delta=1):
+            value = incr(key, delta)
+            if racing_incr.first:
+                racing_incr.first = False
+                incr(key, delta)
+            return value
+
+        racing_incr.first = True
+        with mock.patch.object(cache, 'incr', racing_incr):
+            self.assertEqual(self.consume(30), 0)
+        with mock.patch('time.time', return_value=30):
+            self.assertEqual(cache.get(key), 70_000_000)
+
+    def test_parse_rate(self):
+        self.assertEqual(
+            throttling.parse_rate('10/h'), (360_000_000, 3_600_000_000))
+
+
+@override_settings(THROTTLE_RATES={'add_comment': '2/m', 'follow': '1/m'})
+class ThrottledViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='bot')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Запись', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        metrics.registry.flush()
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_comments_limited(self):
+        url = reverse('posts:add_comment', args=[self.post.pk])
+        for text in ('Раз', 'Два'):
+            self.assertEqual(
+                self.client.post(url, {'text': text}).status_code, 302)
+        response = self.client.post(url, {'text': 'Три'})
+        self.assertEqual(response.status_code, 429)
+        self.assertTemplateUsed(response, 'core/429.html')
+        self.assertTrue(1 <= int(response['Retry-After']) <= 30)
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertIn(
+            'yatube_throttled_requests_total{view="posts:add_comment"} 1',
+            metrics.render_prometheus())
+
+    def test_scope_shared_and_per_user(self):
+        follow = reverse('posts:profile_follow', args=[self.author.username])
+        unfollow = reverse(
+            'posts:profile_unfollow', args=[self.author.username])
+        self.assertEqual(self.client.get(follow).status_code, 302)
+        self.assertEqual(self.client.get(unfollow).status_code, 429)
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(unfollow).status_code, 302)
+
+    def test_reads_not_limited(self):
+        url = reverse('posts:post_create')
+        for _ in range(3):
+            self.assertEqual(self.client.get(url).status_code, 200)
@@ -0,0 +1,96 @@
+"""Ограничение частоты запросов на запись (token bucket).
+
+Корзина хранится в общем кеше одним целым числом — временем, когда
+она снова станет полной (алгоритм GCRA, равносильный token bucket).
+Запрос — это атомарный cache.incr на шаг пополнения и touch срока
+хранения, поэтому проверка стоит O(1) и не теряет запросы между
+процессами. Атомарен
+incr в locmem, redis и memcached; locmem у каждого процесса свой.
+
+Лимиты задаёт THROTTLE_RATES: {область: 'число/период'}, период —
+s, m, h или d. Корзина своя у каждого пользователя, у анонимов —
+у адреса. Области без лимита не ограничиваются.
+"""
+import math
+import time
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+from .views import too_many_requests
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'30/m' -> (шаг пополнения, ёмкость корзины) в микросекундах."""
+    count, period = rate.split('/')
+    period = PERIODS[period[0]] * 1_000_000
+    return period // int(count), period
+
+
+def bucket_key(scope, request):
+    user = request.user
+    if user.is_authenticated:
+        ident = f'user:{user.pk}'
+    else:
+        ident = 'ip:' + request.META.get('REMOTE_ADDR', '')
+    return f'throttle:{scope}:{ident}'
+
+
+def _expire_when_full(key, full_at, now):
+    """Запись живёт, пока корзина не наполнится: дальше она не нужна.
+
+    incr срок хранения не продлевает, поэтому он ставится после каждого
+    взятого жетона, иначе запись пропадёт раньше full_at и корзина
+    незаметно станет полной.
+    """
+    cache.touch(key, math.ceil((full_at - now) / 1_000_000) + 1)
+
+
+def consume(key, rate):
+    """Берёт жетон; 0, если он был, иначе сколько секунд ждать."""
+    interval, capacity = parse_rate(rate)
+    now = time.time_ns() // 1000
+    timeout = math.ceil(interval / 1_000_000) + 1
+    try:
+        full_at = cache.incr(key, interval)
+    except ValueError:
+        if cache.add(key, now + interval, timeout):
+            return 0
+        full_at = cache.incr(key, interval)
+    if full_at - interval < now:
+        # Корзина успела наполниться: отсчёт поднимается до текущего
+        # момента тем же incr, а не set, который затёр бы жетоны,
+        # взятые другими процессами после нашего incr. Одновременные
+        # подъёмы складываются: лимит от этого строже, но не мягче
+        full_at = cache.incr(key, now - (full_at - interval))
+    if full_at - now <= capacity:
+        _expire_when_full(key, full_at, now)
+        return 0
+    # Жетона нет: шаг возвращается, срок записи остаётся прежним
+    cache.decr(key, interval)
+    return math.ceil((full_at - capacity - now) / 1_000_000)
+
+
+def throttle(scope, methods=('POST',), respond=too_many_requests):
+    """Декоратор: лимит THROTTLE_RATES[scope] на запросы methods.
+
+    Лишние запросы получают ответ respond(request, секунды ожидания),
+    по умолчанию — страницу 429 из core.views.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            rate = getattr(settings, 'THROTTLE_RATES', {}).get(scope)
+            if rate and request.method in methods:
+                wait = consume(bucket_key(scope, request), rate)
+                if wait:
+                    metrics.count_throttled()
+                    return respond(request, wait)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
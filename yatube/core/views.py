@@ -1,5 +1,11 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 
+from . import metrics
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -13,5 +19,35 @@ def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
 
 
+def too_many_requests(request, retry_after):
+    """Ответ 429 для core.throttling; retry_after — секунды до жетона."""
+    response = render(
+        request, 'core/429.html', {'retry_after': retry_after}, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics_allowed(request):
+    """С METRICS_TOKEN нужен заголовок Authorization: Bearer <токен>,
+    без него — адрес из METRICS_ALLOWED_IPS.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        given = request.META.get('HTTP_AUTHORIZATION', '')
+        return hmac.compare_digest(given.encode(), f'Bearer {token}'.encode())
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', settings.INTERNAL_IPS)
+    return request.META.get('REMOTE_ADDR') in allowed
+
+
+def metrics_view(request):
+    """Метрики для Prometheus; остальным — 404."""
+    if not metrics_allowed(request):
+        raise Http404
+    return HttpResponse(
+        metrics.render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import search
 from .models import Group, Post
 
 
@@ -12,6 +13,14 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по обратному индексу вместо LIKE '%...%'."""
+        words = search.query_terms(search_term)
+        if not words:
+            return queryset, False
+        return queryset.filter(
+            pk__in=search.get_index().matching(words)), False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
@@ -0,0 +1,23 @@
+"""Маршруты posts для ASGI: страницы чтения — асинхронные."""
+from django.urls import path
+
+from . import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+app_name = 'posts'
+
+ASYNC_VIEWS = {
+    'index': async_views.index,
+    'group_index': async_views.group_index,
+    'group_list': async_views.group_posts,
+    'profile': async_views.profile,
+    'post_detail': async_views.post_detail,
+    'comments': async_views.comments,
+    'follow_index': async_views.follow_index,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS[pattern.name], name=pattern.name)
+    if pattern.name in ASYNC_VIEWS else pattern
+    for pattern in sync_urlpatterns
+]
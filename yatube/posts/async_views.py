@@ -0,0 +1,181 @@
+"""Асинхронные версии страниц чтения для развёртывания через ASGI.
+
+Выборки идут через асинхронный ORM, а независимые запросы одной
+страницы запускаются одновременно. Шаблоны рендерятся в потоке:
+миниатюры и ключи кеша подписок при рендеринге ходят в БД.
+Синхронные представления из posts.views остаются для WSGI и для
+страниц с записью; маршруты собраны в posts.async_urls.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.shortcuts import render
+
+from . import cache as feed_cache
+from .conditional import (comment_validator, conditional_render,
+                          group_validator, page_validator, post_validator,
+                          stats_validator)
+from .forms import CommentForm
+from .models import Follow, Group, Post, User
+from .timeline import aget_timeline_page
+from .utils import (GROUP_ORDERING, NUMBER_OF_GROUPS, CursorPaginator,
+                    aget_paginator, aget_request_page)
+from .views import comments_json, comments_paginator
+
+
+async def load_user(request):
+    """Пользователь запроса, загруженный заранее.
+
+    request.user ленив и при первом обращении читает сессию и
+    пользователя из БД, чего нельзя делать в асинхронном коде.
+    """
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+
+async def aget_object_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f'{queryset.model._meta.object_name} не найден')
+
+
+async def following(user, author):
+    if not user.is_authenticated:
+        return False
+    return await Follow.objects.filter(user=user, author=author).aexists()
+
+
+async def index(request):
+    _, page_obj = await asyncio.gather(
+        load_user(request),
+        aget_paginator(Post.objects.for_feed(), request),
+    )
+    context = {
+        'page_obj': page_obj
+    }
+    return await sync_to_async(conditional_render)(
+        request, 'posts/index.html', context,
+        scopes=[feed_cache.ALL_POSTS, feed_cache.GROUPS],
+        validators=page_validator(page_obj),
+        modified=[post.updated for post in page_obj],
+    )
+
+
+async def group_posts(request, slug):
+    group, _ = await asyncio.gather(
+        aget_object_or_404(Group.objects.all(), slug=slug),
+        load_user(request),
+    )
+    page_obj = await aget_paginator(group.posts.for_feed(), request)
+    context = {
+        'title': f'Записи сообщества {group}',
+        'group': group,
+        'page_obj': page_obj
+    }
+    return await sync_to_async(conditional_render)(
+        request, 'posts/group_list.html', context,
+        scopes=[feed_cache.ALL_POSTS, feed_cache.GROUPS],
+        validators=(
+            group.title, group.description, page_validator(page_obj)),
+        modified=[post.updated for post in page_obj],
+    )
+
+
+async def group_index(request):
+    paginator = CursorPaginator(
+        Group.objects.all(), NUMBER_OF_GROUPS, ordering=GROUP_ORDERING)
+    _, page_obj = await asyncio.gather(
+        load_user(request),
+        aget_request_page(paginator, request),
+    )
+    context = {
+        'page_obj': page_obj
+    }
+    return await sync_to_async(conditional_render)(
+        request, 'posts/group_index.html', context,
+        scopes=[feed_cache.ALL_POSTS, feed_cache.GROUPS],
+        validators=page_validator(page_obj, group_validator),
+        modified=[
+            group.last_post_date for group in page_obj
+            if group.last_post_date
+        ],
+    )
+
+
+async def profile(request, username):
+    author, user = await asyncio.gather(
+        aget_object_or_404(
+            User.objects.select_related('stats'), username=username),
+        load_user(request),
+    )
+    posts = author.posts.for_feed()
+    page_obj, is_following = await asyncio.gather(
+        aget_paginator(posts, request),
+        following(user, author),
+    )
+    context = {
+        'posts': posts,
+        'author': author,
+        'page_obj': page_obj,
+        'following': is_following
+    }
+    scopes = [feed_cache.author_scope(author.pk), feed_cache.GROUPS]
+    if user.is_authenticated:
+        scopes.append(feed_cache.follows_scope(user.pk))
+    return await sync_to_async(conditional_render)(
+        request, 'posts/profile.html', context,
+        scopes=scopes,
+        validators=(
+            stats_validator(author), is_following,
+            page_validator(page_obj)),
+        modified=[post.updated for post in page_obj],
+    )
+
+
+async def post_detail(request, post_id):
+    post, comments, _ = await asyncio.gather(
+        aget_object_or_404(
+            Post.objects.select_related('author__stats', 'group'),
+            pk=post_id),
+        aget_request_page(comments_paginator(post_id), request),
+        load_user(request),
+    )
+    context = {
+        'post': post,
+        'form': CommentForm(),
+        'comments': comments
+    }
+    return await sync_to_async(conditional_render)(
+        request, 'posts/post_detail.html', context,
+        scopes=[
+            feed_cache.post_scope(post.pk),
+            feed_cache.author_scope(post.author_id),
+            feed_cache.GROUPS,
+        ],
+        validators=(
+            post_validator(post), stats_validator(post.author),
+            page_validator(comments, comment_validator)),
+        modified=[post.updated],
+    )
+
+
+async def comments(request, post_id):
+    _, page_obj = await asyncio.gather(
+        aget_object_or_404(Post.objects.only('pk'), pk=post_id),
+        aget_request_page(comments_paginator(post_id), request),
+    )
+    return comments_json(post_id, page_obj)
+
+
+async def follow_index(request):
+    user = await load_user(request)
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    page_obj = await aget_timeline_page(user, request)
+    context = {
+        'page_obj': page_obj
+    }
+    return await sync_to_async(render)(request, 'posts/follow.html', context)
@@ -0,0 +1,702 @@
+"""Нагрузочные замеры страниц posts.
+
+Каждая страница прогоняется двумя драйверами: тестовым клиентом Django
+(задержка, число запросов к БД, пик памяти по tracemalloc) и настоящим
+многопоточным WSGI-сервером, к которому обращаются несколько потоков
+(задержка и пропускная способность под конкурентной нагрузкой).
+SlowClientDriver сравнивает WSGI и ASGI при множестве медленных
+клиентов.
+"""
+import asyncio
+import http.client
+import math
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.staticfiles.handlers import StaticFilesHandler
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.asgi import get_asgi_application
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import Client, RequestFactory
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+from django.views.static import serve as static_serve
+from PIL import Image
+
+from core import media
+from core.static import StaticFilesApp
+
+from .models import Follow, Post, User
+
+Scenario = namedtuple('Scenario', 'name method login build')
+SqliteProfile = namedtuple('SqliteProfile', 'pragmas conn_max_age serialize')
+
+
+def _upload():
+    buffer = BytesIO()
+    Image.linear_gradient('L').resize((800, 600)).save(buffer, 'JPEG')
+    return SimpleUploadedFile('bench.jpg', buffer.getvalue(), 'image/jpeg')
+
+
+# Сначала чтение, потом запись: записи сбрасывают кеш лент
+SCENARIOS = (
+    Scenario('index', 'GET', False, lambda target: (
+        reverse('posts:index'), None)),
+    Scenario('group_posts', 'GET', False, lambda target: (
+        reverse('posts:group_list', args=[target.group.slug]), None)),
+    Scenario('profile', 'GET', False, lambda target: (
+        reverse('posts:profile', args=[target.post.author.username]), None)),
+    Scenario('post_detail', 'GET', False, lambda target: (
+        reverse('posts:post_detail', args=[target.post.pk]), None)),
+    Scenario('follow_index', 'GET', True, lambda target: (
+        reverse('posts:follow_index'), None)),
+    Scenario('search', 'GET', False, lambda target: (
+        reverse('posts:search') + '?' + urlencode({'q': target.query}),
+        None)),
+    # JSON API — для сравнения с HTML-страницами выше
+    Scenario('api_index', 'GET', False, lambda target: (
+        reverse('api:posts'), None)),
+    Scenario('api_group_posts', 'GET', False, lambda target: (
+        reverse('api:posts') + '?' + urlencode(
+            {'group': target.group.slug}), None)),
+    Scenario('api_profile', 'GET', False, lambda target: (
+        reverse('api:posts') + '?' + urlencode(
+            {'author': target.post.author.username}), None)),
+    Scenario('api_post_detail', 'GET', False, lambda target: (
+        reverse('api:post_detail', args=[target.post.pk]), None)),
+    Scenario('api_comments', 'GET', False, lambda target: (
+        reverse('api:comments', args=[target.post.pk]), None)),
+    Scenario('post_create', 'POST', True, lambda target: (
+        reverse('posts:post_create'),
+        {'text': 'Замер', 'group': target.group.pk, 'image': _upload()})),
+    Scenario('add_comment', 'POST', True, lambda target: (
+        reverse('posts:add_comment', args=[target.post.pk]),
+        {'text': 'Замер'})),
+    Scenario('api_post_create', 'POST', True, lambda target: (
+        reverse('api:posts'),
+        {'text': 'Замер', 'group': target.group.pk, 'image': _upload()})),
+    Scenario('api_add_comment', 'POST', True, lambda target: (
+        reverse('api:comments', args=[target.post.pk]),
+        {'text': 'Замер'})),
+)
+
+Target = namedtuple('Target', 'reader post group query')
+
+
+@contextmanager
+def bench_database():
+    """Отдельная файловая тестовая база и каталог медиа на время замеров.
+
+    Основная база не засоряется, а потоки WSGI-сервера видят те же данные.
+    """
+    workdir = tempfile.mkdtemp(prefix='yatube-bench-')
+    connection.settings_dict['TEST']['NAME'] = os.path.join(
+        workdir, 'bench.sqlite3')
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False)
+    try:
+        media = os.path.join(workdir, 'media')
+        # Без ограничения частоты: сценарии записи шлют запросы подряд
+        with override_settings(
+                DEBUG=False, MEDIA_ROOT=media, THROTTLE_RATES={}):
+            yield workdir
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def pick_target():
+    """Читатель с подписками, запись из группы и запрос для поиска."""
+    reader = User.objects.filter(
+        pk__in=Follow.objects.values('user')).order_by('pk').first()
+    post = Post.objects.exclude(group=None).select_related(
+        'author', 'group').order_by('pk').first()
+    # Самое длинное слово записи: оно заведомо найдётся
+    query = max(post.text.split(), key=len).strip('.,!?')
+    return Target(reader, post, post.group, query)
+
+
+def percentile(values, share):
+    """Значение по рангу: share=0.99 — 99-й перцентиль."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(share * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies, errors, **extra):
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+        **extra,
+    }
+
+
+class ClientDriver:
+    """Последовательные запросы через django.test.Client."""
+
+    name = 'client'
+
+    def __init__(self, target, requests, warmup, memory_requests):
+        self.target = target
+        self.requests = requests
+        self.warmup = warmup
+        self.memory_requests = memory_requests
+
+    def client(self, scenario):
+        client = Client()
+        if scenario.login:
+            client.force_login(self.target.reader)
+        return client
+
+    def send(self, client, scenario):
+        path, data = scenario.build(self.target)
+        if scenario.method == 'POST':
+            return client.post(path, data)
+        return client.get(path)
+
+    def memory(self, client, scenario):
+        peaks = []
+        tracemalloc.start()
+        try:
+            for _ in range(self.memory_requests):
+                tracemalloc.reset_peak()
+                self.send(client, scenario)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+        return round(max(peaks) / 1024, 1) if peaks else None
+
+    def run(self, scenario):
+        client = self.client(scenario)
+        for _ in range(self.warmup):
+            self.send(client, scenario)
+        latencies, queries, errors = [], [], 0
+        for _ in range(self.requests):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = self.send(client, scenario)
+                latencies.append(time.perf_counter() - started)
+            queries.append(len(captured))
+            errors += response.status_code >= 400
+        return summarize(
+            latencies, errors,
+            queries=statistics.median(queries),
+            peak_kb=self.memory(client, scenario),
+        )
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class WSGIDriver:
+    """Конкурентные HTTP-запросы к многопоточному WSGI-серверу."""
+
+    name = 'wsgi'
+
+    def __init__(self, target, requests, warmup, threads):
+        self.target = target
+        self.requests = requests
+        self.warmup = warmup
+        self.threads = threads
+        session = Client()
+        session.force_login(target.reader)
+        # Токен CSRF в cookie и заголовке: сервер проверяет его по-настоящему
+        self.csrf_token = get_random_string(32)
+        self.cookies = {
+            False: f'csrftoken={self.csrf_token}',
+            True: f'csrftoken={self.csrf_token}; '
+                  f'sessionid={session.cookies["sessionid"].value}',
+        }
+
+    def __enter__(self):
+        self.server = ThreadedWSGIServer(
+            ('127.0.0.1', 0), QuietHandler, allow_reuse_address=False)
+        self.server.set_app(get_wsgi_application())
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def send(self, scenario):
+        path, data = scenario.build(self.target)
+        headers = {'Cookie': self.cookies[scenario.login]}
+        body = None
+        if scenario.method == 'POST':
+            body = encode_multipart(BOUNDARY, data)
+            headers['Content-Type'] = MULTIPART_CONTENT
+            headers['X-CSRFToken'] = self.csrf_token
+        conn = http.client.HTTPConnection(*self.server.server_address)
+        try:
+            started = time.perf_counter()
+            conn.request(scenario.method, path, body, headers)
+            response = conn.getresponse()
+            response.read()
+            return time.perf_counter() - started, response.status >= 400
+        finally:
+            conn.close()
+
+    def run(self, scenario):
+        for _ in range(self.warmup):
+            self.send(scenario)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            results = list(executor.map(
+                lambda _: self.send(scenario), range(self.requests)))
+        elapsed = time.perf_counter() - started
+        return summarize(
+            [latency for latency, _ in results],
+            sum(failed for _, failed in results),
+            threads=self.threads,
+            rps=round(len(results) / elapsed, 1),
+        )
+
+
+def _timed_request(handler, environ):
+    started = time.perf_counter()
+    response = handler(environ, lambda status, headers: None)
+    b''.join(response)
+    response.close()
+    return time.perf_counter() - started
+
+
+def middleware_overhead(path, middleware, requests, warmup, **extra):
+    """Доля времени, которую middleware добавляет к обработке GET path.
+
+    Запросы идут прямо в WSGIHandler без тестового клиента, чтобы его
+    накладные расходы не размывали разницу. Обработчики с middleware
+    и без него чередуются через запрос, сравниваются медианы: так фон
+    машины и пересборки кеша ложатся на оба поровну. middleware=None
+    сравнивает весь список MIDDLEWARE с пустым; extra уходит в
+    RequestFactory.get (заголовки, secure).
+    """
+    handlers = {'with': WSGIHandler()}
+    without = [
+        name for name in settings.MIDDLEWARE
+        if middleware is not None and name != middleware
+    ]
+    with override_settings(MIDDLEWARE=without):
+        handlers['without'] = WSGIHandler()
+    factory = RequestFactory()
+    timings = {name: [] for name in handlers}
+    for number in range(warmup + requests):
+        order = list(handlers) if number % 2 else list(handlers)[::-1]
+        for name in order:
+            latency = _timed_request(
+                handlers[name], factory.get(path, **extra).environ)
+            if number >= warmup:
+                timings[name].append(latency)
+    median = {
+        name: statistics.median(values) for name, values in timings.items()
+    }
+    return {
+        'path': path,
+        'with_ms': round(median['with'] * 1000, 3),
+        'without_ms': round(median['without'] * 1000, 3),
+        'overhead': round(median['with'] / median['without'] - 1, 4),
+    }
+
+
+def production_middleware():
+    """MIDDLEWARE без панели отладки, как при DEBUG = False."""
+    return [
+        name for name in settings.MIDDLEWARE
+        if not name.startswith('debug_toolbar.')
+    ]
+
+
+def static_serving(names, requests, warmup, static_root):
+    """Раздача статики: Django (как runserver) против core.static.
+
+    Django отдаёт исходный файл через StaticFilesHandler, обёртка —
+    файл с хешем из static_root (после collectstatic), сжатый, если
+    клиент это принимает. Для каждого файла — медиана времени запроса,
+    байты ответа и Cache-Control.
+    """
+    handlers = {
+        'django': StaticFilesHandler(WSGIHandler()),
+        'wrapper': StaticFilesApp(WSGIHandler(), root=static_root),
+    }
+    factory = RequestFactory()
+    results = {}
+    for name in names:
+        paths = {
+            'django': settings.STATIC_URL + name,
+            'wrapper': staticfiles_storage.url(name),
+        }
+        for handler_name, handler in handlers.items():
+            response = {}
+            timings = []
+            for number in range(warmup + requests):
+                environ = factory.get(
+                    paths[handler_name],
+                    HTTP_ACCEPT_ENCODING='br, gzip').environ
+                started = time.perf_counter()
+                body = handler(environ, lambda status, headers: (
+                    response.update(status=status, headers=dict(headers))))
+                size = len(b''.join(body))
+                body.close()
+                if number >= warmup:
+                    timings.append(time.perf_counter() - started)
+            results.setdefault(name, {})[handler_name] = {
+                'status': response['status'],
+                'median_ms': round(statistics.median(timings) * 1000, 3),
+                'bytes': size,
+                'encoding': response['headers'].get('Content-Encoding'),
+                'cache_control': response['headers'].get('Cache-Control'),
+            }
+    return results
+
+
+def _drain(response):
+    """Тело ответа блоками в Python, как у wsgiref и runserver."""
+    sent = sum(len(chunk) for chunk in response.streaming_content)
+    response.close()
+    return sent
+
+
+def _sendfile(response):
+    """Как gunicorn с wsgi.file_wrapper: os.sendfile с позиции файла."""
+    source = response.file_to_stream.fileno()
+    count = int(response['Content-Length'])
+    offset = os.lseek(source, 0, os.SEEK_CUR)
+    sent = 0
+    with open(os.devnull, 'wb') as sink:
+        while sent < count:
+            sent += os.sendfile(
+                sink.fileno(), source, offset + sent, count - sent)
+    response.close()
+    return sent
+
+
+MEDIA_MODES = {
+    'static': (lambda request, name: static_serve(
+        request, name, document_root=settings.MEDIA_ROOT), _drain),
+    'media': (media.serve, _drain),
+    'media_sendfile': (media.serve, _sendfile),
+}
+
+
+def media_serving(name, requests, memory_requests, range_bytes=None):
+    """Отдача файла из MEDIA_ROOT: static() против core.media.
+
+    Для каждого способа — медиана времени, пропускная способность и
+    пик памяти Python на запрос (отдельными запросами под
+    tracemalloc). range_bytes — запрашивать только столько первых
+    байт; static() диапазоны не понимает и отдаёт файл целиком.
+    """
+    factory = RequestFactory()
+    headers = {}
+    if range_bytes:
+        headers['HTTP_RANGE'] = f'bytes=0-{range_bytes - 1}'
+
+    def send(view, consume):
+        request = factory.get(settings.MEDIA_URL + name, **headers)
+        return consume(view(request, name))
+
+    results = {}
+    for mode, (view, consume) in MEDIA_MODES.items():
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            sent = send(view, consume)
+            timings.append(time.perf_counter() - started)
+        peaks = []
+        tracemalloc.start()
+        try:
+            for _ in range(memory_requests):
+                tracemalloc.reset_peak()
+                send(view, consume)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+        median = statistics.median(timings)
+        results[mode] = {
+            'bytes': sent,
+            'median_ms': round(median * 1000, 3),
+            'mb_per_s': round(sent / median / 2 ** 20, 1),
+            'peak_kb': round(max(peaks) / 1024, 1) if peaks else None,
+        }
+    return results
+
+
+class SlowClientDriver:
+    """Пропускная способность при множестве медленных клиентов.
+
+    Каждый из clients клиентов шлёт requests запросов подряд и читает
+    ответ delay секунд. WSGI-сервер держит на запрос рабочий поток
+    из threads, поэтому медленное чтение занимает поток целиком;
+    ASGI-сервер во время чтения ответа освобождает цикл событий.
+    Серверы смоделированы в процессе: обработчики Django вызываются
+    напрямую, без сети.
+    """
+
+    MODES = {
+        # режим: (ASGI или WSGI, корневые маршруты)
+        'wsgi': (False, 'yatube.urls'),
+        'asgi-sync': (True, 'yatube.urls'),
+        'asgi': (True, 'yatube.urls_async'),
+    }
+
+    def __init__(self, target, clients, requests, delay, threads):
+        self.target = target
+        self.clients = clients
+        self.requests = requests
+        self.delay = delay
+        self.threads = threads
+        session = Client()
+        session.force_login(target.reader)
+        self.cookies = {
+            False: '',
+            True: f'sessionid={session.cookies["sessionid"].value}',
+        }
+
+    def wsgi_request(self, handler, slots, path, cookie):
+        environ = RequestFactory().get(path, HTTP_COOKIE=cookie).environ
+        started = time.perf_counter()
+        with slots:
+            statuses = []
+            response = handler(
+                environ, lambda status, headers: statuses.append(status))
+            for _ in response:
+                time.sleep(self.delay)
+            response.close()
+        return time.perf_counter() - started, int(statuses[0][:3]) >= 400
+
+    def run_wsgi(self, path, cookie):
+        handler = WSGIHandler()
+        slots = threading.BoundedSemaphore(self.threads)
+        results = []
+
+        def client():
+            for _ in range(self.requests):
+                results.append(
+                    self.wsgi_request(handler, slots, path, cookie))
+
+        clients = [
+            threading.Thread(target=client) for _ in range(self.clients)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        return results
+
+    async def asgi_request(self, app, path, cookie):
+        path, _, query = path.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': [
+                (b'host', b'testserver'), (b'cookie', cookie.encode())],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+        status = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif not message.get('more_body'):
+                await asyncio.sleep(self.delay)
+
+        started = time.perf_counter()
+        await app(scope, receive, send)
+        return time.perf_counter() - started, status[0] >= 400
+
+    async def run_asgi(self, path, cookie):
+        app = get_asgi_application()
+        results = []
+
+        async def client():
+            for _ in range(self.requests):
+                results.append(await self.asgi_request(app, path, cookie))
+
+        await asyncio.gather(*(client() for _ in range(self.clients)))
+        return results
+
+    def run(self, mode, scenario):
+        is_asgi, urlconf = self.MODES[mode]
+        path, _ = scenario.build(self.target)
+        cookie = self.cookies[scenario.login]
+        with override_settings(
+            ROOT_URLCONF=urlconf, MIDDLEWARE=production_middleware()
+        ):
+            started = time.perf_counter()
+            if is_asgi:
+                results = asyncio.run(self.run_asgi(path, cookie))
+            else:
+                results = self.run_wsgi(path, cookie)
+            elapsed = time.perf_counter() - started
+        return summarize(
+            [latency for latency, _ in results],
+            sum(failed for _, failed in results),
+            clients=self.clients,
+            rps=round(len(results) / elapsed, 1),
+        )
+
+
+# Настройки SQLite для PooledWriteDriver; pragmas=None — по умолчанию
+SQLITE_PROFILES = {
+    # Как до core.sqlite: журнал отката, fsync на каждую фиксацию,
+    # новое соединение на каждый запрос
+    'baseline': SqliteProfile(
+        {'journal_mode': 'DELETE', 'synchronous': 'FULL'}, 0, False),
+    'pragmas': SqliteProfile(None, 60, False),
+    'tuned': SqliteProfile(None, 60, True),
+}
+
+
+@contextmanager
+def sqlite_profile(profile):
+    """Настройки SQLite на время прогона; соединения открываются заново."""
+    overrides = {'SQLITE_SERIALIZE_WRITES': profile.serialize}
+    if profile.pragmas is not None:
+        overrides['SQLITE_PRAGMAS'] = profile.pragmas
+    # Словарь общий у соединений всех потоков
+    settings_dict = connection.settings_dict
+    conn_max_age = settings_dict['CONN_MAX_AGE']
+    connections.close_all()
+    settings_dict['CONN_MAX_AGE'] = profile.conn_max_age
+    try:
+        with override_settings(**overrides):
+            # Журнал переключается, только пока соединение с файлом одно
+            connection.ensure_connection()
+            yield
+    finally:
+        settings_dict['CONN_MAX_AGE'] = conn_max_age
+        connections.close_all()
+
+
+class PooledWriteDriver:
+    """Запросы записи из пула постоянных рабочих потоков.
+
+    Потоки живут весь прогон, как у gunicorn с gthread, поэтому
+    соединение с базой может пережить запрос (CONN_MAX_AGE); у
+    WSGIDriver поток и соединение новые на каждый запрос. Обработчик
+    Django вызывается напрямую, без сети.
+    """
+
+    name = 'pooled'
+
+    def __init__(self, target, requests, threads):
+        self.target = target
+        self.requests = requests
+        self.threads = threads
+        self.handler = WSGIHandler()
+        session = Client()
+        session.force_login(target.reader)
+        self.csrf_token = get_random_string(32)
+        self.cookie = (
+            f'csrftoken={self.csrf_token}; '
+            f'sessionid={session.cookies["sessionid"].value}')
+
+    def send(self, scenario):
+        path, data = scenario.build(self.target)
+        environ = RequestFactory().post(
+            path, data, HTTP_COOKIE=self.cookie,
+            HTTP_X_CSRFTOKEN=self.csrf_token).environ
+        statuses = []
+        started = time.perf_counter()
+        response = self.handler(
+            environ, lambda status, headers: statuses.append(status))
+        b''.join(response)
+        response.close()
+        return time.perf_counter() - started, int(statuses[0][:3]) >= 400
+
+    def run(self, scenario):
+        numbers = iter(range(self.requests))
+        lock = threading.Lock()
+        results, opened = [], []
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        if next(numbers, None) is None:
+                            return
+                    results.append(self.send(scenario))
+            finally:
+                connections.close_all()
+
+        def count(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        connection_created.connect(count, dispatch_uid='bench.pooled')
+        workers = [
+            threading.Thread(target=worker) for _ in range(self.threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        connection_created.disconnect(dispatch_uid='bench.pooled')
+        return summarize(
+            [latency for latency, _ in results],
+            sum(failed for _, failed in results),
+            threads=self.threads,
+            connections=len(opened),
+            rps=round(len(results) / elapsed, 1),
+        )
+
+
+def compare(current, baseline, tolerance):
+    """Регрессии относительно прошлого прогона.
+
+    Число запросов к БД должно совпадать точно, а p99 может вырасти
+    не больше чем в (1 + tolerance) раз.
+    """
+    if baseline.get('scale') != current['scale']:
+        return ['масштаб данных отличается, сравнение невозможно']
+    problems = []
+    for driver, views in current['drivers'].items():
+        for view, result in views.items():
+            before = baseline.get('drivers', {}).get(driver, {}).get(view)
+            if before is None:
+                continue
+            if result.get('queries', 0) > before.get('queries', 0):
+                problems.append(
+                    f'{driver}/{view}: запросов {before["queries"]} → '
+                    f'{result["queries"]}')
+            if result['p99_ms'] > before['p99_ms'] * (1 + tolerance):
+                problems.append(
+                    f'{driver}/{view}: p99 {before["p99_ms"]} → '
+                    f'{result["p99_ms"]} мс')
+    return problems
@@ -0,0 +1,159 @@
+"""Кеш фрагментов лент с точной инвалидацией.
+
+Каждая область (вся лента, автор, подписки читателя, группы) имеет
+свою «версию» — отметку времени последнего изменения. Версии входят
+в ключ фрагмента, поэтому сигнал об изменении просто сдвигает версию,
+а старые фрагменты перестают находиться и вытесняются по таймауту.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core import routers
+from core.cache import get_or_build
+
+from .models import Follow
+
+FEED_CACHE_TIMEOUT = getattr(settings, 'FEED_CACHE_TIMEOUT', 60 * 60 * 4)
+REPLICA_PIN_SECONDS = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+ALL_POSTS = 'all'
+GROUPS = 'groups'
+STATS_KEYS = {
+    'hits': 'feed:stats:hits',
+    'misses': 'feed:stats:misses',
+}
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def follows_scope(user_id):
+    return f'follows:{user_id}'
+
+
+def post_scope(post_id):
+    """Комментарии записи: версия нужна условным GET (posts.conditional)."""
+    return f'post:{post_id}'
+
+
+def _version_key(scope):
+    return f'feed:version:{scope}'
+
+
+def _set_versions(scopes):
+    now = time.time_ns()
+    cache.set_many(
+        {_version_key(scope): now for scope in scopes}, timeout=None)
+
+
+def bump(*scopes):
+    """Сдвигает версии областей, делая их фрагменты устаревшими.
+
+    Внутри транзакции версии сдвигаются ещё раз после фиксации:
+    фрагмент, собранный другим запросом по старым данным до фиксации,
+    иначе остался бы в кеше под новой версией.
+    """
+    _set_versions(scopes)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _set_versions(scopes))
+
+
+def get_versions(scopes):
+    """Версии областей; отсутствующие в кеше заводятся заново.
+
+    Версия — отметка времени, поэтому после вытеснения ключа новая
+    версия не совпадёт ни с одной из прежних.
+    """
+    keys = {scope: _version_key(scope) for scope in scopes}
+    found = cache.get_many(keys.values())
+    missing = {
+        key: time.time_ns() for key in keys.values() if key not in found
+    }
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return [found[keys[scope]] for scope in scopes]
+
+
+def followed_author_ids(user):
+    """Авторы, на которых подписан читатель, с кешем до смены подписок."""
+    version, = get_versions([follows_scope(user.pk)])
+    key = f'feed:following:{user.pk}:{version}'
+    author_ids = cache.get(key)
+    if author_ids is None:
+        author_ids = sorted(
+            Follow.objects.filter(user=user).values_list(
+                'author_id', flat=True)
+        )
+        cache.set(key, author_ids, FEED_CACHE_TIMEOUT)
+    return author_ids
+
+
+def _page_id(page_obj):
+    return f'{page_obj.number}:{page_obj.paginator.cursor}'
+
+
+def index_key(page_obj):
+    versions = get_versions([ALL_POSTS, GROUPS])
+    return 'feed:index:{}:{}'.format(
+        _page_id(page_obj), ':'.join(map(str, versions)))
+
+
+def follow_key(page_obj, user):
+    scopes = [GROUPS, follows_scope(user.pk)] + [
+        author_scope(author_id) for author_id in followed_author_ids(user)
+    ]
+    digest = hashlib.md5(
+        ':'.join(map(str, get_versions(scopes))).encode()
+    ).hexdigest()
+    return f'feed:follow:{user.pk}:{_page_id(page_obj)}:{digest}'
+
+
+FEED_KEYS = {
+    'index': index_key,
+    'follow': follow_key,
+}
+
+
+def _count(name):
+    key = STATS_KEYS[name]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def fragment(key, render):
+    """Возвращает фрагмент из кеша или рендерит и сохраняет его.
+
+    Пересобирает фрагмент только один процесс (см. core.cache).
+    Собранный на реплике фрагмент может отставать, поэтому он лежит
+    под своим ключом и живёт не дольше окна закрепления за основной
+    базой (core.routers).
+    """
+    timeout = FEED_CACHE_TIMEOUT
+    if routers.reading_replica():
+        key, timeout = f'{key}:replica', REPLICA_PIN_SECONDS
+    rendered = []
+
+    def build():
+        rendered.append(True)
+        return render()
+
+    value = get_or_build(key, build, timeout)
+    _count('misses' if rendered else 'hits')
+    return value
+
+
+def stats():
+    """Счётчики попаданий и промахов для мониторинга."""
+    values = cache.get_many(STATS_KEYS.values())
+    return {
+        name: values.get(key, 0) for name, key in STATS_KEYS.items()
+    }
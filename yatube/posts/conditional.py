@@ -0,0 +1,114 @@
+"""Условные GET для лент и страницы записи.
+
+ETag и Last-Modified считаются по уже выбранным строкам страницы
+и версиям областей кеша лент (posts.cache), без рендеринга шаблона.
+Если ответ у клиента или CDN не устарел, отдаётся 304.
+
+В ETag входит всё, что попадает в HTML: поля записей на странице,
+читатель, год из подвала, состояние паджинатора и ревизия шаблонов,
+поэтому после правки шаблонов и перезапуска ETag меняются.
+Last-Modified — самая поздняя из правок записей и версий областей:
+версии сдвигаются и при удалении, которого по строкам не видно.
+"""
+import hashlib
+import os
+from functools import lru_cache
+
+from django.shortcuts import render
+from django.template import engines
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from . import cache as feed_cache
+
+
+@lru_cache(maxsize=None)
+def template_revision():
+    """Отпечаток времени изменения всех файлов шаблонов."""
+    stamps = []
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            for root, _, files in os.walk(directory):
+                stamps += [
+                    (os.path.join(root, name),
+                     os.stat(os.path.join(root, name)).st_mtime_ns)
+                    for name in files
+                ]
+    return hashlib.md5(repr(sorted(stamps)).encode()).hexdigest()
+
+
+def post_validator(post):
+    """Поля записи, которые выводятся в лентах и на её странице."""
+    author = post.author
+    group = post.group
+    return (
+        post.pk, post.updated.isoformat(), post.comments_count,
+        post.image.name, author.username, author.first_name,
+        author.last_name, group and (group.slug, group.title),
+    )
+
+
+def comment_validator(comment):
+    return comment.pk, comment.author.username
+
+
+def stats_validator(user):
+    """Счётчики пользователя; у пользователя может не быть UserStats."""
+    stats = getattr(user, 'stats', None)
+    return stats and (
+        stats.posts_count, stats.followers_count, stats.following_count)
+
+
+def group_validator(group):
+    """Поля группы из каталога групп."""
+    return (
+        group.pk, group.slug, group.title, group.description,
+        group.posts_count, group.authors_count,
+        group.last_post_date and group.last_post_date.isoformat(),
+    )
+
+
+def page_validator(page_obj, validator=post_validator):
+    return (
+        [validator(obj) for obj in page_obj],
+        page_obj.number, page_obj.has_next(), page_obj.has_previous(),
+    )
+
+
+def _etag(request, versions, validators):
+    user = request.user
+    payload = repr((
+        template_revision(), request.get_full_path(),
+        user.pk, user.get_username(), timezone.now().year,
+        versions, validators,
+    ))
+    return quote_etag(hashlib.md5(payload.encode()).hexdigest())
+
+
+def conditional_render(request, template, context, scopes, validators,
+                       modified=()):
+    """render() с ETag и Last-Modified; 304, если клиент уже всё видел.
+
+    scopes — области posts.cache, от которых зависит страница,
+    validators — данные страницы для ETag, modified — их даты правки.
+    """
+    versions = feed_cache.get_versions(scopes)
+    stamps = [version / 1e9 for version in versions]
+    stamps += [moment.timestamp() for moment in modified]
+    last_modified = int(max(stamps)) if stamps else None
+    etag = _etag(request, versions, validators)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = render(request, template, context)
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Хранить можно, но перед выдачей — переспросить; страницы
+    # вошедшего читателя — только в его браузере
+    if request.user.is_authenticated:
+        patch_cache_control(response, no_cache=True, private=True)
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
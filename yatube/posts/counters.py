@@ -0,0 +1,148 @@
+"""Денормализованные счётчики записей, комментариев и подписок.
+
+Счётчики меняются атомарно выражениями F() из сигналов, а recount()
+пересчитывает их с нуля, если они разошлись с данными. Там же
+сводка групп для каталога: число авторов и дата последней записи.
+"""
+from django.db.models import Case, Count, F, Max, OuterRef, Q, Subquery, When
+from django.db.models.functions import Coalesce
+from django.db.models.query import QuerySet
+
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def _add(queryset, **deltas):
+    return queryset.update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+
+
+def add_user(user_id, create=True, **deltas):
+    """Сдвигает счётчики пользователя, при нужде создавая строку.
+
+    create=False только обновляет: при удалении пользователя его строка
+    уходит каскадом раньше записей и подписок, и вставка новой нарушила
+    бы внешний ключ.
+    """
+    if (not _add(UserStats.objects.filter(user_id=user_id), **deltas)
+            and create):
+        UserStats.objects.get_or_create(user_id=user_id)
+        _add(UserStats.objects.filter(user_id=user_id), **deltas)
+
+
+def _has_other_posts(post, group_id):
+    return Post.objects.filter(
+        group_id=group_id, author_id=post.author_id).exclude(
+        pk=post.pk).exists()
+
+
+def group_post_added(post):
+    """Запись появилась в группе: счётчики и дата последней записи."""
+    if post.group_id is None:
+        return
+    new_author = not _has_other_posts(post, post.group_id)
+    Group.objects.filter(pk=post.group_id).update(
+        posts_count=F('posts_count') + 1,
+        authors_count=F('authors_count') + int(new_author),
+        # Пустая дата не проходит сравнение и тоже заменяется
+        last_post_date=Case(
+            When(last_post_date__gte=post.pub_date,
+                 then=F('last_post_date')),
+            default=post.pub_date,
+        ),
+    )
+
+
+def group_post_removed(post, group_id):
+    """Запись удалена из группы или перенесена в другую."""
+    if group_id is None:
+        return
+    last_by_author = not _has_other_posts(post, group_id)
+    Group.objects.filter(pk=group_id).update(
+        posts_count=F('posts_count') - 1,
+        authors_count=F('authors_count') - int(last_by_author),
+        # Дата пересчитывается, только если ушла самая свежая запись
+        last_post_date=Case(
+            When(last_post_date__gt=post.pub_date,
+                 then=F('last_post_date')),
+            default=_actual(
+                Post.objects.exclude(pk=post.pk), 'group',
+                aggregate=Max('pub_date'), default=None),
+        ),
+    )
+
+
+def add_post(post_id, delta):
+    _add(Post.objects.filter(pk=post_id), comments_count=delta)
+
+
+def _actual(rows, field, outer='pk', aggregate=None, default=0):
+    """Подзапрос с настоящим числом строк, ссылающихся на outer.
+
+    rows — модель или queryset; aggregate заменяет подсчёт строк,
+    default — значение, когда строк нет (None — оставить NULL).
+    """
+    if not isinstance(rows, QuerySet):
+        rows = rows.objects.all()
+    counted = rows.filter(**{field: OuterRef(outer)}).order_by(
+    ).values(field).annotate(
+        total=aggregate or Count('pk')).values('total')
+    if default is None:
+        return Subquery(counted)
+    return Coalesce(Subquery(counted), default)
+
+
+def _targets():
+    return [
+        (UserStats, {
+            'posts_count': _actual(Post, 'author', 'user_id'),
+            'followers_count': _actual(Follow, 'author', 'user_id'),
+            'following_count': _actual(Follow, 'user', 'user_id'),
+        }),
+        (Group, {
+            'posts_count': _actual(Post, 'group'),
+            'authors_count': _actual(
+                Post, 'group', aggregate=Count('author', distinct=True)),
+            'last_post_date': _actual(
+                Post, 'group', aggregate=Max('pub_date'), default=None),
+        }),
+        (Post, {'comments_count': _actual(Comment, 'post')}),
+    ]
+
+
+def _drifted(model, expressions):
+    """Первичные ключи строк, где хоть один счётчик неверен."""
+    mismatch = Q()
+    for field in expressions:
+        actual = f'actual_{field}'
+        differs = ~Q(**{field: F(actual)})
+        if model._meta.get_field(field).null:
+            # Django считает отрицание истинным при пустом поле, а при
+            # пустом actual сравнение не истинно: оба случая — отдельно
+            differs &= ~Q(**{f'{field}__isnull': True,
+                             f'{actual}__isnull': True})
+            differs |= Q(**{f'{field}__isnull': False,
+                            f'{actual}__isnull': True})
+        mismatch |= differs
+    return model.objects.alias(**{
+        f'actual_{field}': expression
+        for field, expression in expressions.items()
+    }).filter(mismatch).values('pk')
+
+
+def recount():
+    """Чинит расхождения; возвращает число исправленных строк по моделям."""
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True)
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=user_id) for user_id in missing.iterator()),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    fixed = {}
+    for model, expressions in _targets():
+        drifted = _drifted(model, expressions)
+        fixed[model._meta.model_name] = drifted.count()
+        if fixed[model._meta.model_name]:
+            model.objects.filter(pk__in=drifted).update(**expressions)
+    return fixed
@@ -1,12 +1,37 @@
 from django import forms
 
+from . import images
 from .models import Comment, Post
 
 
+class BoundedImageField(forms.ImageField):
+    """Картинка, проверенная по заголовку и перекодированная.
+
+    Стандартный ImageField целиком открывает исходник через Pillow;
+    здесь лимиты проверяются до декодирования (см. posts.images).
+    """
+
+    def to_python(self, data):
+        upload = forms.FileField.to_python(self, data)
+        if upload is None:
+            return None
+        return images.process_upload(upload)
+
+
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
+        field_classes = {'image': BoundedImageField}
+
+    def save(self, commit=True):
+        image = self.cleaned_data.get('image')
+        if not image:
+            self.instance.image_width = self.instance.image_height = None
+        elif hasattr(image, 'image_width'):
+            self.instance.image_width = image.image_width
+            self.instance.image_height = image.image_height
+        return super().save(commit)
 
 
 class CommentForm(forms.ModelForm):
@@ -0,0 +1,114 @@
+"""Проверка и перекодирование загружаемых картинок записей.
+
+Размер файла и число пикселей проверяются по заголовку, до
+декодирования. JPEG декодируется сразу в уменьшенном масштабе
+(Image.draft), поэтому память на одну загрузку ограничена размером
+итоговой картинки, а не исходника. Остальные форматы (PNG, WebP, GIF)
+декодируются целиком, и для них действует отдельный, меньший лимит
+пикселей. Метаданные (EXIF и т. п.)
+при перекодировании отбрасываются.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import ExifTags, Image, UnidentifiedImageError
+
+# Поворот по тегу Orientation, как в ImageOps.exif_transpose
+ORIENTATION = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+# Форматы, которые Image.draft умеет декодировать в уменьшенном масштабе
+DRAFT_FORMATS = frozenset({'JPEG', 'MPO'})
+CONTENT_TYPES = {
+    'JPEG': ('jpg', 'image/jpeg'),
+    'WEBP': ('webp', 'image/webp'),
+}
+
+
+def _limit(name, default):
+    return getattr(settings, name, default)
+
+
+def check_size(upload):
+    max_bytes = _limit('POST_IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+    if upload.size > max_bytes:
+        raise ValidationError(
+            'Файл больше %(limit)d МБ.',
+            code='file_too_large',
+            params={'limit': max_bytes // (1024 * 1024)},
+        )
+
+
+def open_image(upload):
+    """Открывает картинку, читая только заголовок, и проверяет размеры."""
+    try:
+        upload.seek(0)
+        image = Image.open(upload)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise ValidationError(
+            'Загрузите правильное изображение.', code='invalid_image')
+    if image.format in DRAFT_FORMATS:
+        max_pixels = _limit('POST_IMAGE_MAX_PIXELS', 40_000_000)
+    else:
+        # Исходник и его RGB-копия целиком лежат в памяти
+        max_pixels = _limit('POST_IMAGE_MAX_FULL_PIXELS', 12_000_000)
+    width, height = image.size
+    if width * height > max_pixels:
+        raise ValidationError(
+            'Картинка больше %(limit)d мегапикселей.',
+            code='too_many_pixels',
+            params={'limit': max_pixels // 1_000_000},
+        )
+    return image
+
+
+def reencode(image, name):
+    """Уменьшает картинку и сохраняет её в едином формате без метаданных.
+
+    Возвращает загруженный файл с атрибутами image_width/image_height.
+    """
+    max_side = _limit('POST_IMAGE_MAX_SIDE', 1920)
+    image_format = _limit('POST_IMAGE_FORMAT', 'JPEG')
+    quality = _limit('POST_IMAGE_QUALITY', 85)
+    try:
+        # Для JPEG декодер сразу уменьшает картинку в 2, 4 или 8 раз
+        image.draft('RGB', (max_side, max_side))
+        orientation = image.getexif().get(ExifTags.Base.Orientation)
+        if image.mode not in ('RGB', 'L'):
+            # Палитру и прозрачность убираем до уменьшения, иначе
+            # resize для палитры работает методом ближайшего соседа
+            image = image.convert('RGB')
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        if orientation in ORIENTATION:
+            image = image.transpose(ORIENTATION[orientation])
+        buffer = BytesIO()
+        image.save(buffer, image_format, quality=quality, optimize=True)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        raise ValidationError(
+            'Загрузите правильное изображение.', code='invalid_image')
+    extension, content_type = CONTENT_TYPES[image_format]
+    stem = os.path.splitext(os.path.basename(name))[0] or 'image'
+    result = SimpleUploadedFile(
+        f'{stem}.{extension}', buffer.getvalue(), content_type)
+    result.image_width, result.image_height = image.size
+    return result
+
+
+def process_upload(upload):
+    check_size(upload)
+    image = open_image(upload)
+    try:
+        return reencode(image, upload.name)
+    finally:
+        image.close()
@@ -0,0 +1,67 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import benchmark, seeding, thumbnails
+
+VIEWS = ['index', 'group_posts', 'profile', 'post_detail', 'follow_index']
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность WSGI, ASGI с синхронными '
+        'и ASGI с асинхронными страницами при медленных клиентах'
+    )
+
+    def add_arguments(self, parser):
+        seeding.add_arguments(parser)
+        parser.add_argument('--clients', type=int, default=100)
+        parser.add_argument(
+            '--requests', type=int, default=3,
+            help='Запросов от каждого клиента'
+        )
+        parser.add_argument(
+            '--delay', type=float, default=0.2,
+            help='Сколько секунд клиент читает ответ'
+        )
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='Рабочих потоков WSGI-сервера'
+        )
+        parser.add_argument(
+            '--mode', action='append',
+            choices=list(benchmark.SlowClientDriver.MODES))
+        parser.add_argument('--view', action='append', choices=VIEWS)
+
+    def measure(self, options):
+        scale = {name: options[name] for name in seeding.DEFAULT_SCALE}
+        seeding.seed(seed=options['seed'], **scale)
+        driver = benchmark.SlowClientDriver(
+            benchmark.pick_target(), options['clients'], options['requests'],
+            options['delay'], options['threads'])
+        views = options['view'] or VIEWS
+        results = {}
+        for mode in options['mode'] or benchmark.SlowClientDriver.MODES:
+            for scenario in benchmark.SCENARIOS:
+                if scenario.name not in views:
+                    continue
+                started = time.perf_counter()
+                results.setdefault(mode, {})[scenario.name] = driver.run(
+                    mode, scenario)
+                self.stderr.write(
+                    f'{mode}/{scenario.name}: '
+                    f'{time.perf_counter() - started:.1f} с')
+        thumbnails.shutdown()
+        return {
+            'scale': {'seed': options['seed'], **scale},
+            'clients': options['clients'],
+            'delay': options['delay'],
+            'threads': options['threads'],
+            'modes': results,
+        }
+
+    def handle(self, *args, **options):
+        with benchmark.bench_database():
+            report = self.measure(options)
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
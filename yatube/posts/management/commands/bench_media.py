@@ -0,0 +1,55 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from PIL import Image
+
+from posts import benchmark
+
+NAME = 'posts/bench-large.jpg'
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт большую картинку во временном MEDIA_ROOT и сравнивает её '
+        'отдачу представлением static() и core.media (потоком и через '
+        'os.sendfile): время, МБ/с, пик памяти; результат — JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--width', type=int, default=4000)
+        parser.add_argument('--height', type=int, default=3000)
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--memory-requests', type=int, default=5)
+        parser.add_argument(
+            '--range-kb', type=int, default=256,
+            help='Размер диапазона для замера запросов Range'
+        )
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp(prefix='yatube-media-')
+        try:
+            path = os.path.join(media_root, NAME)
+            os.makedirs(os.path.dirname(path))
+            # Шум почти не сжимается: файл в несколько мегабайт
+            Image.effect_noise(
+                (options['width'], options['height']), 64,
+            ).convert('RGB').save(path, 'JPEG', quality=95)
+            with override_settings(
+                    MEDIA_ROOT=media_root, MEDIA_SENDFILE=None):
+                report = {
+                    'file_bytes': os.path.getsize(path),
+                    'full': benchmark.media_serving(
+                        NAME, options['requests'],
+                        options['memory_requests']),
+                    'range': benchmark.media_serving(
+                        NAME, options['requests'],
+                        options['memory_requests'],
+                        options['range_kb'] * 1024),
+                }
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
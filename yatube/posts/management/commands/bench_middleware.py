@@ -0,0 +1,67 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmark, seeding, thumbnails
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет, на какую долю middleware замедляет страницы posts '
+        '(по умолчанию — метрики на главной)'
+    )
+
+    def add_arguments(self, parser):
+        seeding.add_arguments(parser)
+        parser.add_argument(
+            '--middleware', default='core.middleware.MetricsMiddleware')
+        parser.add_argument(
+            '--view', action='append',
+            choices=[
+                scenario.name for scenario in benchmark.SCENARIOS
+                if scenario.method == 'GET' and not scenario.login
+            ],
+            help='Страницы для замера (по умолчанию index)'
+        )
+        parser.add_argument('--requests', type=int, default=4000)
+        parser.add_argument('--warmup', type=int, default=50)
+        parser.add_argument(
+            '--budget', type=float, default=0.02,
+            help='Допустимая доля замедления; больше — ошибка'
+        )
+
+    def measure(self, options):
+        scale = {name: options[name] for name in seeding.DEFAULT_SCALE}
+        seeding.seed(seed=options['seed'], **scale)
+        target = benchmark.pick_target()
+        views = options['view'] or ['index']
+        results = {}
+        for scenario in benchmark.SCENARIOS:
+            if scenario.name not in views:
+                continue
+            path, _ = scenario.build(target)
+            started = time.perf_counter()
+            results[scenario.name] = benchmark.middleware_overhead(
+                path, options['middleware'], options['requests'],
+                options['warmup'])
+            self.stderr.write(
+                f'{scenario.name}: {time.perf_counter() - started:.1f} с')
+        thumbnails.shutdown()
+        return results
+
+    def handle(self, *args, **options):
+        with benchmark.bench_database():
+            results = self.measure(options)
+        self.stdout.write(json.dumps(
+            {'middleware': options['middleware'], 'views': results},
+            ensure_ascii=False, indent=2))
+        over = [
+            f'{view}: {result["overhead"]:.1%}'
+            for view, result in results.items()
+            if result['overhead'] > options['budget']
+        ]
+        if over:
+            raise CommandError(
+                f'Замедление больше {options["budget"]:.0%}: '
+                + ', '.join(over))
@@ -0,0 +1,130 @@
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.crypto import get_random_string
+
+# Выполняется в отдельном процессе с выбранным профилем настроек
+PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+from django.test import RequestFactory
+application = get_wsgi_application()
+loaded = time.perf_counter()
+extra = {"secure": True, "HTTP_ACCEPT_ENCODING": "gzip"}
+statuses = []
+response = application(
+    RequestFactory().get(sys.argv[1], **extra).environ,
+    lambda status, headers: statuses.append(status))
+b"".join(response)
+response.close()
+first = time.perf_counter()
+result = {
+    "setup_ms": (setup - started) * 1000,
+    "wsgi_ms": (loaded - setup) * 1000,
+    "first_request_ms": (first - loaded) * 1000,
+    "status": int(statuses[0][:3]),
+}
+if int(sys.argv[2]):
+    from posts import benchmark
+    result["middleware"] = benchmark.middleware_overhead(
+        sys.argv[1], None, int(sys.argv[2]), 50, **extra)
+print(json.dumps(result))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает профили настроек dev и prod: время запуска процесса '
+        '(django.setup, загрузка WSGI, первый запрос) и цену всего '
+        'списка MIDDLEWARE на запрос; результат — JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default='/about/author/',
+            help='Страница для первого запроса и замера middleware'
+        )
+        parser.add_argument(
+            '--starts', type=int, default=5,
+            help='Сколько раз запускать процесс для замера запуска'
+        )
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument(
+            '--prod-cache', default='locmem',
+            help='YATUBE_CACHE для prod, если redis недоступен'
+        )
+
+    def environment(self, profile, workdir, options):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'yatube.settings',
+            'YATUBE_ENV': profile,
+            # Замер не трогает рабочую базу
+            'YATUBE_DB_PATH': os.path.join(workdir, 'bench.sqlite3'),
+        }
+        if profile == 'prod':
+            env.update({
+                'YATUBE_SECRET_KEY': get_random_string(50),
+                'YATUBE_ALLOWED_HOSTS': 'testserver',
+                'YATUBE_CACHE': options['prod_cache'],
+                'YATUBE_STATIC_ROOT': os.path.join(workdir, 'static'),
+            })
+        return env
+
+    def run(self, args, env):
+        result = subprocess.run(
+            [sys.executable, *args], cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        return result.stdout
+
+    def probe(self, env, path, requests):
+        started = time.perf_counter()
+        result = json.loads(self.run(
+            ['-c', PROBE, path, str(requests)], env).splitlines()[-1])
+        result['process_ms'] = (time.perf_counter() - started) * 1000
+        return result
+
+    def measure(self, profile, workdir, options):
+        env = self.environment(profile, workdir, options)
+        if profile == 'prod':
+            # Манифест статики нужен, чтобы {% static %} нашёл файлы
+            self.run(['manage.py', 'collectstatic', '--noinput', '-v0'], env)
+        starts = [
+            self.probe(env, options['path'], 0)
+            for _ in range(options['starts'])
+        ]
+        result = {
+            name: round(statistics.median(
+                start[name] for start in starts), 1)
+            for name in (
+                'process_ms', 'setup_ms', 'wsgi_ms', 'first_request_ms')
+        }
+        result['status'] = starts[0]['status']
+        result['middleware'] = self.probe(
+            env, options['path'], options['requests'])['middleware']
+        return result
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp(prefix='yatube-settings-')
+        try:
+            report = {}
+            for profile in ('dev', 'prod'):
+                report[profile] = self.measure(profile, workdir, options)
+                self.stderr.write(f'{profile}: готово')
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
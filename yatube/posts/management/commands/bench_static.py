@@ -0,0 +1,49 @@
+import json
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from posts import benchmark
+
+ASSETS = ['css/bootstrap.min.css', 'js/comments.js', 'img/logo.png']
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает статику во временный каталог (хеши и сжатые копии) и '
+        'сравнивает её раздачу Django и WSGI-обёрткой core.static: '
+        'время запроса, байты ответа, Cache-Control; результат — JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--asset', action='append',
+            help=f'Файл статики (по умолчанию {", ".join(ASSETS)})'
+        )
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--warmup', type=int, default=50)
+
+    def handle(self, *args, **options):
+        static_root = tempfile.mkdtemp(prefix='yatube-static-')
+        storages = {
+            'default': {
+                'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            },
+            'staticfiles': {
+                'BACKEND': 'core.storage.CompressedManifestStaticStorage',
+            },
+        }
+        try:
+            # При DEBUG хранилище отдаёт имена без хешей
+            with override_settings(
+                    DEBUG=False, STATIC_ROOT=static_root, STORAGES=storages):
+                call_command('collectstatic', interactive=False, verbosity=0)
+                results = benchmark.static_serving(
+                    options['asset'] or ASSETS, options['requests'],
+                    options['warmup'], static_root)
+        finally:
+            shutil.rmtree(static_root, ignore_errors=True)
+        self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
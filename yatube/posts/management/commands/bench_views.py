@@ -0,0 +1,115 @@
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts import benchmark, seeding, thumbnails
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Засевает отдельную тестовую базу и замеряет p50/p99 задержки, '
+        'число запросов и память по страницам posts; результат — JSON'
+    )
+
+    def add_arguments(self, parser):
+        seeding.add_arguments(parser)
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--memory-requests', type=int, default=5)
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='Потоков-клиентов у WSGI-драйвера'
+        )
+        parser.add_argument(
+            '--driver', choices=['client', 'wsgi', 'all'], default='all')
+        parser.add_argument(
+            '--view', action='append',
+            choices=[scenario.name for scenario in benchmark.SCENARIOS],
+            help='Замерить только эти страницы (можно повторять)'
+        )
+        parser.add_argument('--output', help='Файл для JSON результатов')
+        parser.add_argument(
+            '--compare',
+            help='JSON прошлого прогона; регрессии завершают команду ошибкой'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Допустимый рост p99 при сравнении (доля)'
+        )
+
+    def drivers(self, options, target):
+        if options['driver'] in ('client', 'all'):
+            yield benchmark.ClientDriver(
+                target, options['requests'], options['warmup'],
+                options['memory_requests'])
+        if options['driver'] in ('wsgi', 'all'):
+            with benchmark.WSGIDriver(
+                target, options['requests'], options['warmup'],
+                options['threads'],
+            ) as driver:
+                yield driver
+
+    def measure(self, options):
+        scale = {name: options[name] for name in seeding.DEFAULT_SCALE}
+        started = time.perf_counter()
+        seeding.seed(seed=options['seed'], **scale)
+        self.stderr.write(
+            f'Данные засеяны за {time.perf_counter() - started:.1f} с')
+        target = benchmark.pick_target()
+        scenarios = [
+            scenario for scenario in benchmark.SCENARIOS
+            if not options['view'] or scenario.name in options['view']
+        ]
+        results = {}
+        for driver in self.drivers(options, target):
+            for scenario in scenarios:
+                results.setdefault(driver.name, {})[scenario.name] = (
+                    driver.run(scenario))
+                self.stderr.write(f'{driver.name}/{scenario.name}: готово')
+        thumbnails.shutdown()
+        return {
+            'meta': {
+                'revision': git_revision(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'cache': settings.CACHES['default']['BACKEND'],
+                'started': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'requests': options['requests'],
+                'threads': options['threads'],
+            },
+            'scale': {'seed': options['seed'], **scale},
+            'drivers': results,
+        }
+
+    def handle(self, *args, **options):
+        with benchmark.bench_database():
+            report = self.measure(options)
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+        if options['compare']:
+            with open(options['compare']) as file:
+                problems = benchmark.compare(
+                    report, json.load(file), options['tolerance'])
+            if problems:
+                raise CommandError('Регрессии:\n' + '\n'.join(problems))
@@ -0,0 +1,76 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import benchmark, seeding, thumbnails
+
+WRITE_SCENARIOS = [
+    scenario for scenario in benchmark.SCENARIOS if scenario.method == 'POST'
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Засевает отдельную тестовую базу и замеряет пропускную '
+        'способность записи при одновременных запросах с разными '
+        'настройками SQLite (benchmark.SQLITE_PROFILES); результат — JSON'
+    )
+
+    def add_arguments(self, parser):
+        seeding.add_arguments(parser)
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='Рабочих потоков в пуле'
+        )
+        parser.add_argument(
+            '--view', action='append',
+            choices=[scenario.name for scenario in WRITE_SCENARIOS],
+            help='Замерить только эти страницы (можно повторять)'
+        )
+        parser.add_argument(
+            '--profile', action='append',
+            choices=list(benchmark.SQLITE_PROFILES),
+            help='Замерить только эти настройки (можно повторять)'
+        )
+        parser.add_argument('--output', help='Файл для JSON результатов')
+
+    def measure(self, options):
+        scale = {name: options[name] for name in seeding.DEFAULT_SCALE}
+        started = time.perf_counter()
+        seeding.seed(seed=options['seed'], **scale)
+        self.stderr.write(
+            f'Данные засеяны за {time.perf_counter() - started:.1f} с')
+        driver = benchmark.PooledWriteDriver(
+            benchmark.pick_target(), options['requests'], options['threads'])
+        scenarios = [
+            scenario for scenario in WRITE_SCENARIOS
+            if not options['view'] or scenario.name in options['view']
+        ]
+        results = {}
+        for name, profile in benchmark.SQLITE_PROFILES.items():
+            if options['profile'] and name not in options['profile']:
+                continue
+            with benchmark.sqlite_profile(profile):
+                for scenario in scenarios:
+                    results.setdefault(name, {})[scenario.name] = (
+                        driver.run(scenario))
+                    self.stderr.write(f'{name}/{scenario.name}: готово')
+        thumbnails.shutdown()
+        return {
+            'scale': {'seed': options['seed'], **scale},
+            'requests': options['requests'],
+            'threads': options['threads'],
+            'profiles': results,
+        }
+
+    def handle(self, *args, **options):
+        with benchmark.bench_database():
+            report = self.measure(options)
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
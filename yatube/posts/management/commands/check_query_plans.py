@@ -0,0 +1,133 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Comment, Follow, Group, Post, UserStats
+from posts.utils import NUMBER_OF_GROUPS
+
+User = get_user_model()
+
+# Признаки плохого плана в выводе EXPLAIN QUERY PLAN
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+class Rollback(Exception):
+    """Откатывает тестовые данные после проверки."""
+
+
+def is_full_scan(detail):
+    """SCAN без индекса — полный проход по таблице."""
+    return detail.startswith('SCAN ') and 'USING' not in detail and (
+        detail != 'SCAN CONSTANT ROW')
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN QUERY PLAN для запросов страниц posts на '
+        'засеянной базе и падает при полном сканировании или '
+        'сортировке во временном B-дереве'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', type=int, default=300,
+            help='Сколько записей засеять перед проверкой'
+        )
+
+    def seed(self, posts):
+        reader = User.objects.create_user(username='plan-reader')
+        authors = [
+            User.objects.create_user(username=f'plan-author-{number}')
+            for number in range(3)
+        ]
+        group = Group.objects.create(
+            title='План', slug='plan-group', description='')
+        # Каталогу групп нужна вторая страница
+        Group.objects.bulk_create(
+            Group(title=f'План {number}', slug=f'plan-group-{number}')
+            for number in range(NUMBER_OF_GROUPS)
+        )
+        Post.objects.bulk_create(
+            Post(
+                text=f'Запись {number}',
+                author=authors[number % len(authors)],
+                group=group if number % 2 else None,
+                in_timelines=number % 3 != 0,
+            )
+            for number in range(posts)
+        )
+        for author in authors:
+            Follow.objects.create(user=reader, author=author)
+        # Записи одного автора подмешиваются в ленту подписок при чтении
+        UserStats.objects.filter(user=authors[0]).update(
+            followers_count=timeline.TIMELINE_FANOUT_LIMIT + 1)
+        post = Post.objects.filter(author=authors[0]).first()
+        Comment.objects.create(post=post, author=reader, text='Коммент')
+        return reader, authors[0], group, post
+
+    def pages(self, client, author, group, post):
+        """Адреса для проверки: первая и следующая по курсору страницы."""
+        feeds = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[group.slug]),
+            reverse('posts:profile', args=[author.username]),
+            reverse('posts:follow_index'),
+            reverse('posts:group_index'),
+        ]
+        for url in feeds:
+            yield url, {}
+            page_obj = client.get(url).context['page_obj']
+            yield url, {'cursor': page_obj.paginator.next_cursor}
+        yield reverse('posts:post_detail', args=[post.pk]), {}
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def check_page(self, client, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url, params)
+        problems = []
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            plan = self.explain(sql)
+            bad = [
+                detail for detail in plan
+                if is_full_scan(detail) or TEMP_SORT in detail
+            ]
+            if bad:
+                problems.append((sql, bad))
+            if self.verbosity > 1:
+                self.stdout.write(f'{url} {params}\n  {sql}')
+                for detail in plan:
+                    self.stdout.write(f'    {detail}')
+        return problems
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Проверка рассчитана на SQLite')
+        self.verbosity = options['verbosity']
+        problems = []
+        try:
+            with transaction.atomic():
+                reader, author, group, post = self.seed(options['posts'])
+                client = Client()
+                client.force_login(reader)
+                for url, params in self.pages(client, author, group, post):
+                    for sql, bad in self.check_page(client, url, params):
+                        problems.append((url, sql, bad))
+                raise Rollback
+        except Rollback:
+            pass
+        for url, sql, bad in problems:
+            self.stderr.write(f'{url}: {"; ".join(bad)}\n  {sql}')
+        if problems:
+            raise CommandError(f'Плохих планов запросов: {len(problems)}')
+        self.stdout.write(self.style.SUCCESS('Все запросы используют индексы'))
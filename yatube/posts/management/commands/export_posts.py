@@ -0,0 +1,27 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, группы, записи, комментарии и подписки '
+        'в JSON Lines (*.gz — со сжатием, «-» — в stdout)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Файл выгрузки или «-»')
+        parser.add_argument(
+            '--with-passwords', action='store_true',
+            help='Выгружать хеши паролей (иначе войти после загрузки нельзя)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=transfer.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        with transfer.open_stream(options['output'], 'w') as stream:
+            counts = transfer.dump(
+                stream, options['with_passwords'], options['chunk_size'])
+        self.stderr.write(json.dumps(counts))
@@ -0,0 +1,59 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import seeding, transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает выгрузку export_posts пачками через bulk_create; '
+        'картинки можно скопировать в MEDIA_ROOT параллельно. '
+        'Миниатюры потом создаёт regenerate_thumbnails. Печатает число '
+        'прочитанных строк по типам (с --ignore-conflicts вставленных '
+        'может быть меньше)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Файл выгрузки или «-»')
+        parser.add_argument(
+            '--batch-size', type=int, default=transfer.BATCH_SIZE)
+        parser.add_argument(
+            '--ignore-conflicts', action='store_true',
+            help='Пропускать строки с уже занятыми id и уникальными полями'
+        )
+        parser.add_argument(
+            '--media-from',
+            help='Каталог с картинками записей для копирования в хранилище'
+        )
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument(
+            '--no-finalize', action='store_true',
+            help='Не пересчитывать ленты, счётчики и индекс поиска '
+                 '(для загрузки из нескольких файлов подряд)'
+        )
+
+    def handle(self, *args, **options):
+        copier = None
+        if options['media_from']:
+            copier = transfer.MediaCopier(
+                options['media_from'], options['workers'])
+        loader = transfer.Loader(
+            options['batch_size'], options['ignore_conflicts'], copier)
+        try:
+            with transfer.open_stream(options['input'], 'r') as stream:
+                counts = loader.load(stream)
+        except ValueError as error:
+            raise CommandError(f'Ошибка в выгрузке, {error}')
+        finally:
+            if copier:
+                copier.close()
+        if not options['no_finalize']:
+            seeding.finalize()
+        if copier:
+            counts['images'] = copier.copied
+            if copier.failed:
+                self.stderr.write(
+                    f'Не скопированы картинки: {len(copier.failed)}, '
+                    f'например {copier.failed[0]}')
+        self.stdout.write(json.dumps(counts))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит поисковый индекс записей и комментариев заново, '
+        'например после смены POST_SEARCH_BACKEND или импорта данных'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = search.rebuild()
+        self.stdout.write(
+            f'Индекс {search.get_index().name}: записей {total}')
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import Follow, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Раскладывает по лентам подписчиков записи, которые ещё не были '
+        'разосланы (например, созданные до появления лент)'
+    )
+
+    def handle(self, *args, **options):
+        author_ids = Post.objects.filter(in_timelines=False).values_list(
+            'author_id', flat=True).distinct()
+        total = 0
+        for author_id in author_ids.iterator():
+            follower_ids = list(Follow.objects.filter(
+                author_id=author_id).values_list('user_id', flat=True)[
+                    :timeline.TIMELINE_FANOUT_LIMIT + 1])
+            if len(follower_ids) > timeline.TIMELINE_FANOUT_LIMIT:
+                continue
+            pending = Post.objects.filter(
+                author_id=author_id, in_timelines=False)
+            timeline._bulk_add(
+                follower_ids,
+                list(pending.values_list('pk', 'pub_date'))
+            )
+            total += pending.update(in_timelines=True)
+        self.stdout.write(f'Разослано записей: {total}')
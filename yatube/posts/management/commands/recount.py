@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики и чинит расхождения'
+
+    def handle(self, *args, **options):
+        for model_name, fixed in recount().items():
+            self.stdout.write(f'{model_name}: исправлено строк {fixed}')
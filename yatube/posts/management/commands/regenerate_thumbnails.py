@@ -0,0 +1,45 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import cache as feed_cache
+from posts import thumbnails
+from posts.models import Post
+
+
+def _setup():
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт миниатюры для всех картинок записей, '
+        'распределяя работу Pillow по ядрам процессора'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов (по умолчанию — число ядер)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=16,
+            help='Сколько картинок отдавать процессу за раз'
+        )
+
+    def handle(self, *args, **options):
+        names = list(
+            Post.objects.exclude(image='').values_list('image', flat=True))
+        # Дочерним процессам нельзя наследовать открытые соединения
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], initializer=_setup
+        ) as executor:
+            done = sum(1 for _ in executor.map(
+                thumbnails.generate, names, chunksize=options['chunk_size']))
+        # Версия групп входит в ключи всех лент: сбрасываем заглушки разом
+        feed_cache.bump(feed_cache.ALL_POSTS, feed_cache.GROUPS)
+        self.stdout.write(f'Обработано картинок: {done}')
@@ -0,0 +1,22 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import seeding
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу пользователями, группами, подписками, записями '
+        'с картинками и комментариями для нагрузочных замеров'
+    )
+
+    def add_arguments(self, parser):
+        seeding.add_arguments(parser)
+
+    def handle(self, *args, **options):
+        scale = {name: options[name] for name in seeding.DEFAULT_SCALE}
+        with transaction.atomic():
+            totals = seeding.seed(seed=options['seed'], **scale)
+        self.stdout.write(json.dumps(totals))
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.28 on 2026-10-18 19:58
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+from PIL import Image
+
+
+def fill_dimensions(apps, schema_editor):
+    # Image.open читает только заголовок, пиксели не декодируются
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.exclude(image='').only('pk', 'image')
+    for post in posts.iterator(chunk_size=500):
+        try:
+            with default_storage.open(post.image.name) as file:
+                width, height = Image.open(file).size
+        except (OSError, ValueError):
+            continue
+        Post.objects.filter(pk=post.pk).update(
+            image_width=width, image_height=height)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_dimensions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,237 @@
+# Generated by Django 4.2.28 on 2026-10-18 20:15
+
+import re
+from collections import Counter, defaultdict
+
+from django.db import OperationalError, migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 500
+
+# Токенизатор и стеммер скопированы из posts.search и posts.stemmer
+# на момент миграции: их дальнейшие правки не меняют её результат
+VOWELS = frozenset('аеиоуыэюя')
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    (),
+    ('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+     'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+     'ая', 'яя', 'ою', 'ею'),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = (
+    (),
+    ('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+     'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+     'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+     'ья', 'я'),
+)
+SUPERLATIVE = ((), ('ейше', 'ейш'))
+DERIVATIONAL = ((), ('ость', 'ост'))
+
+
+def _regions(word):
+    """Начала областей RV и R2 (индексы в слове)."""
+    rv = next(
+        (index + 1 for index, char in enumerate(word) if char in VOWELS),
+        len(word)
+    )
+
+    def after_syllable(start):
+        for index in range(start + 1, len(word)):
+            if word[index] not in VOWELS and word[index - 1] in VOWELS:
+                return index + 1
+        return len(word)
+
+    return rv, after_syllable(after_syllable(0))
+
+
+def _remove(word, start, endings):
+    """Отрезает самое длинное окончание, лежащее не левее start.
+
+    endings — пара групп: окончания первой группы снимаются, только
+    если перед ними стоит «а» или «я». Возвращает None, если снять
+    нечего.
+    """
+    preceded, plain = endings
+    candidates = sorted(
+        [(ending, True) for ending in preceded]
+        + [(ending, False) for ending in plain],
+        key=lambda candidate: len(candidate[0]), reverse=True,
+    )
+    for ending, needs_a in candidates:
+        cut = len(word) - len(ending)
+        if cut < start or not word.endswith(ending):
+            continue
+        if needs_a and not (cut - 1 >= start and word[cut - 1] in 'ая'):
+            return None
+        return word[:cut]
+    return None
+
+
+def _adjectival(word, rv):
+    stripped = _remove(word, rv, ADJECTIVE)
+    if stripped is None:
+        return None
+    without_participle = _remove(stripped, rv, PARTICIPLE)
+    return stripped if without_participle is None else without_participle
+
+
+def _step_one(word, rv):
+    stripped = _remove(word, rv, PERFECTIVE_GERUND)
+    if stripped is not None:
+        return stripped
+    word = _remove(word, rv, REFLEXIVE) or word
+    for step in (_adjectival, lambda w, r: _remove(w, r, VERB),
+                 lambda w, r: _remove(w, r, NOUN)):
+        stripped = step(word, rv)
+        if stripped is not None:
+            return stripped
+    return word
+
+
+def _tidy_up(word, rv):
+    stripped = _remove(word, rv, SUPERLATIVE)
+    if stripped is not None:
+        word = stripped
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        return word[:-1]
+    if stripped is None and word.endswith('ь') and len(word) - 1 >= rv:
+        return word[:-1]
+    return word
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    word = _step_one(word, rv)
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    word = _remove(word, r2, DERIVATIONAL) or word
+    return _tidy_up(word, rv)
+
+
+WORD_RE = re.compile(r'\w+')
+# Служебные слова есть почти в каждой записи и ничего не различают
+STOP_WORDS = frozenset('''
+    а без более бы был была были было быть в вам вас вот во все всего
+    всех вы где да даже для до его ее ей если есть еще же за здесь и из
+    или им их к как ко когда кто ли либо мне может мы на над надо наш не
+    него нее нет ни них но ну о об однако он она они оно от очень по под
+    при с со так также такой там те тем то того тоже той только том ты
+    у уже хотя чего чей чем что чтобы чье чья эта эти это я
+'''.split())
+
+
+def words(text):
+    """Основы значимых слов текста в порядке появления."""
+    return [
+        stem(word)[:64]
+        for word in WORD_RE.findall(text.lower().replace('ё', 'е'))
+        if word not in STOP_WORDS
+    ]
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE posts_search USING fts5(text, comments)')
+    except OperationalError:
+        # SQLite собран без FTS5 — поиск пойдёт по SearchPosting
+        return
+    schema_editor.execute(
+        "INSERT INTO posts_search (posts_search, rank) "
+        "VALUES ('rank', 'bm25(1.0, 0.5)')")
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+
+
+def batches(Post):
+    batch = []
+    posts = Post.objects.order_by('pk').values_list('pk', 'text')
+    for row in posts.iterator(chunk_size=BATCH_SIZE):
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def fill_index(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    SearchPosting = apps.get_model('posts', 'SearchPosting')
+    connection = schema_editor.connection
+    fts = 'posts_search' in connection.introspection.table_names()
+    for batch in batches(Post):
+        comments = defaultdict(list)
+        for post_id, text in Comment.objects.filter(
+            post_id__in=[post_id for post_id, _ in batch]
+        ).order_by('pk').values_list('post_id', 'text'):
+            comments[post_id].extend(words(text))
+        if fts:
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    'INSERT INTO posts_search (rowid, text, comments) '
+                    'VALUES (%s, %s, %s)',
+                    [
+                        (post_id, ' '.join(words(text)),
+                         ' '.join(comments[post_id]))
+                        for post_id, text in batch
+                    ],
+                )
+            continue
+        SearchPosting.objects.bulk_create(
+            SearchPosting(post_id=post_id, field=field, term=term,
+                          count=count)
+            for post_id, text in batch
+            for field, found in ((0, words(text)), (1, comments[post_id]))
+            for term, count in Counter(found).items()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_image_dimensions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('field', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_postings', to='posts.post')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchposting',
+            constraint=models.UniqueConstraint(fields=('term', 'post', 'field'), name='unique_search_posting'),
+        ),
+        migrations.RunPython(create_fts, drop_fts),
+        migrations.RunPython(fill_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.28 on 2026-10-18 20:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def fill_updated(apps, schema_editor):
+    # До этой миграции правки не отмечались: считаем датой изменения
+    # дату публикации
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.update(updated=models.F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name='Дата изменения'
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_updated, migrations.RunPython.noop),
+    ]
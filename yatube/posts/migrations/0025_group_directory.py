@@ -0,0 +1,43 @@
+# Generated by Django 4.2.28 on 2026-10-18 20:55
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.filter(group=OuterRef('pk')).order_by().values(
+        'group')
+    Group.objects.update(
+        authors_count=Coalesce(Subquery(posts.annotate(
+            total=Count('author', distinct=True)).values('total')), 0),
+        last_post_date=Subquery(posts.annotate(
+            last=Max('pub_date')).values('last')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_post_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='authors_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='last_post_date',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['title', 'id'], name='group_title_idx'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.28 on 2026-10-18 22:10
+
+from django.conf import settings
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def fill_timelines(apps, schema_editor):
+    """Рассылает записи, созданные до появления лент (как rebuild_timelines).
+
+    Без этого лента подписок не видела бы их: при чтении подмешиваются
+    только записи авторов, у которых подписчиков больше лимита.
+    """
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    limit = getattr(settings, 'TIMELINE_FANOUT_LIMIT', 1000)
+    author_ids = Post.objects.filter(in_timelines=False).order_by(
+        'author_id').values_list('author_id', flat=True).distinct()
+    for author_id in list(author_ids):
+        follower_ids = list(Follow.objects.filter(
+            author_id=author_id).values_list('user_id', flat=True)[
+                :limit + 1])
+        if len(follower_ids) > limit:
+            continue
+        pending = Post.objects.filter(author_id=author_id, in_timelines=False)
+        posts = list(pending.values_list('pk', 'pub_date'))
+        TimelineEntry.objects.bulk_create(
+            (
+                TimelineEntry(user_id=user_id, post_id=post_id,
+                              pub_date=pub_date)
+                for user_id in follower_ids
+                for post_id, pub_date in posts
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        pending.update(in_timelines=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0025_group_directory'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -8,12 +8,33 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.IntegerField(default=0, editable=False)
+    # Сводка для каталога групп, поддерживается сигналами (counters)
+    authors_count = models.IntegerField(default=0, editable=False)
+    last_post_date = models.DateTimeField(
+        null=True, blank=True, editable=False)
 
     def __str__(self) -> str:
         return self.title
 
     class Meta:
         verbose_name_plural = 'Группы'
+        indexes = [
+            # Ключ курсорного паджинатора каталога групп
+            models.Index(fields=['title', 'id'], name='group_title_idx'),
+        ]
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Записи для лент: автор и группа одним запросом."""
+        return self.select_related('author', 'group').defer(
+            'author__password',
+            'author__email',
+            'author__last_login',
+            'author__date_joined',
+            'group__description',
+        )
 
 
 class Post(models.Model):
@@ -25,6 +46,10 @@ class Post(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    updated = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
     group = models.ForeignKey(
         Group,
         blank=True,
@@ -46,6 +71,18 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    # Размеры картинки записываются формой при загрузке, чтобы шаблонам
+    # не приходилось открывать файл (width_field открывал бы его сам)
+    image_width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False)
+    # Разослана ли запись по лентам подписчиков (TimelineEntry).
+    # Записи популярных авторов не рассылаются и читаются напрямую.
+    in_timelines = models.BooleanField(default=False, editable=False)
+    comments_count = models.IntegerField(default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text
@@ -53,6 +90,33 @@ class Post(models.Model):
     class Meta:
         ordering = ['-pub_date']
         verbose_name_plural = 'Записи'
+        indexes = [
+            # Ключи курсорного паджинатора для каждой из лент
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['-pub_date', '-id'],
+                condition=models.Q(in_timelines=False),
+                name='post_not_in_timelines_idx'
+            ),
+        ]
+
+
+class CommentQuerySet(models.QuerySet):
+    def for_page(self):
+        """Комментарии для страницы записи: только выводимые поля."""
+        return self.select_related('author').only(
+            'text', 'created', 'post_id', 'author__username')
 
 
 class Comment(models.Model):
@@ -74,6 +138,16 @@ class Comment(models.Model):
         verbose_name='Дата комментария',
         auto_now_add=True)
 
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created', 'id'],
+                name='comment_post_created_idx'
+            ),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -94,3 +168,82 @@ class Follow(models.Model):
                 name='unique_follow'
             )
         ]
+        indexes = [
+            # Подписчики автора: рассылка записей по лентам
+            models.Index(
+                fields=['author', 'user'],
+                name='follow_author_user_idx'
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Запись в материализованной ленте подписок читателя."""
+
+    user = models.ForeignKey(
+        User,
+        related_name='timeline',
+        on_delete=models.CASCADE
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name='timeline_entries',
+        on_delete=models.CASCADE
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'
+            ),
+        ]
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, которые поддерживаются сигналами."""
+
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='stats',
+        on_delete=models.CASCADE
+    )
+    posts_count = models.IntegerField(default=0)
+    followers_count = models.IntegerField(default=0)
+    following_count = models.IntegerField(default=0)
+
+
+class SearchPosting(models.Model):
+    """Строка обратного индекса поиска, если в БД нет FTS5.
+
+    Сколько раз основа слова term встречается в тексте записи
+    (field=TEXT) или в её комментариях (field=COMMENTS).
+    """
+
+    TEXT = 0
+    COMMENTS = 1
+
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(
+        Post,
+        related_name='search_postings',
+        on_delete=models.CASCADE
+    )
+    field = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'post', 'field'],
+                name='unique_search_posting'
+            )
+        ]
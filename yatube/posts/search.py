@@ -0,0 +1,321 @@
+"""Полнотекстовый поиск по записям и их комментариям.
+
+В обратный индекс попадают основы слов (posts.stemmer), поэтому
+«котами» находит «кот». На SQLite с FTS5 индекс — виртуальная
+таблица posts_search с ранжированием bm25; в остальных случаях —
+таблица SearchPosting с ранжированием TF-IDF на Python. Индекс
+обновляется сигналами, а rebuild() строит его заново.
+
+Ранг у обоих индексов тем меньше, чем запись релевантнее, поэтому
+результаты идут по (rank, id) по возрастанию. FTS5 ранжирует только
+SEARCH_WINDOW самых новых совпадений, чтобы время запроса не росло
+с числом подходящих записей.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F
+from django.db.models.expressions import RawSQL
+
+from .models import Comment, Post, SearchPosting
+from .stemmer import stem
+from .utils import NUMBER_OF_POSTS, CursorPaginator, get_request_page
+
+TABLE = 'posts_search'
+TEXT_WEIGHT = 1.0
+COMMENTS_WEIGHT = 0.5
+# Больше слов в запросе не учитывается
+MAX_QUERY_TERMS = 10
+BATCH_SIZE = 500
+# Ранжируются только столько самых новых совпадений: bm25 по всем
+# совпадениям частого слова на миллионе записей занимает секунды
+SEARCH_WINDOW = getattr(settings, 'POST_SEARCH_WINDOW', 2000)
+WORD_RE = re.compile(r'\w+')
+# Служебные слова есть почти в каждой записи и ничего не различают
+STOP_WORDS = frozenset('''
+    а без более бы был была были было быть в вам вас вот во все всего
+    всех вы где да даже для до его ее ей если есть еще же за здесь и из
+    или им их к как ко когда кто ли либо мне может мы на над надо наш не
+    него нее нет ни них но ну о об однако он она они оно от очень по под
+    при с со так также такой там те тем то того тоже той только том ты
+    у уже хотя чего чей чем что чтобы чье чья эта эти это я
+'''.split())
+
+
+def terms(text):
+    """Основы значимых слов текста в порядке появления."""
+    return [
+        stem(word)[:64]
+        for word in WORD_RE.findall(text.lower().replace('ё', 'е'))
+        if word not in STOP_WORDS
+    ]
+
+
+def query_terms(query):
+    return list(dict.fromkeys(terms(query)))[:MAX_QUERY_TERMS]
+
+
+class FTS5Index:
+    """Индекс в виртуальной таблице SQLite FTS5."""
+
+    name = 'fts5'
+
+    def _execute(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+    def _match(self, words):
+        # Основы состоят из букв и цифр, так что кавычки безопасны
+        return ' '.join(f'"{word}"' for word in words)
+
+    def _set(self, post_id, column, value):
+        if not self._execute(
+            f'UPDATE {TABLE} SET {column} = %s WHERE rowid = %s',
+            [value, post_id],
+        ):
+            self._execute(
+                f'INSERT INTO {TABLE} (rowid, text, comments) '
+                f"VALUES (%s, '', '')",
+                [post_id],
+            )
+            self._set(post_id, column, value)
+
+    def set_text(self, post_id, text):
+        self._set(post_id, 'text', ' '.join(terms(text)))
+
+    def set_comments(self, post_id, texts):
+        self._set(
+            post_id, 'comments',
+            ' '.join(' '.join(terms(text)) for text in texts))
+
+    def add_comment(self, post_id, text):
+        self._execute(
+            f"UPDATE {TABLE} SET comments = comments || ' ' || %s "
+            'WHERE rowid = %s',
+            [' '.join(terms(text)), post_id],
+        )
+
+    def remove(self, post_id):
+        self._execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+
+    def clear(self):
+        self._execute(f'DELETE FROM {TABLE}')
+
+    def _window_start(self, match):
+        """id самого старого из SEARCH_WINDOW новейших совпадений.
+
+        Обход совпадений по rowid не требует ранжирования и дёшев
+        даже для частых слов.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s '
+                'ORDER BY rowid DESC LIMIT 1 OFFSET %s',
+                [match, SEARCH_WINDOW - 1],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def search(self, words, position=None, backward=False, limit=10,
+               offset=0):
+        """Пары (rank, id) после позиции в порядке вывода."""
+        match = self._match(words)
+        sql = f'SELECT rank, rowid FROM {TABLE} WHERE {TABLE} MATCH %s'
+        params = [match]
+        oldest = self._window_start(match)
+        if oldest is not None:
+            sql += ' AND rowid >= %s'
+            params.append(oldest)
+        if position is not None:
+            op = '<' if backward else '>'
+            sql += f' AND (rank {op} %s OR (rank = %s AND rowid {op} %s))'
+            params += [position[0], position[0], position[1]]
+        order = 'DESC' if backward else 'ASC'
+        sql += f' ORDER BY rank {order}, rowid {order} LIMIT %s OFFSET %s'
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params + [limit, offset])
+            rows = cursor.fetchall()
+        return rows[::-1] if backward else rows
+
+    def matching(self, words):
+        """Подзапрос с id подходящих записей для pk__in."""
+        return RawSQL(
+            f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s',
+            [self._match(words)],
+        )
+
+
+class PostingsIndex:
+    """Обратный индекс в обычной таблице SearchPosting."""
+
+    name = 'postings'
+    weights = {
+        SearchPosting.TEXT: TEXT_WEIGHT,
+        SearchPosting.COMMENTS: COMMENTS_WEIGHT,
+    }
+
+    def _replace(self, post_id, field, counts):
+        SearchPosting.objects.filter(post_id=post_id, field=field).delete()
+        SearchPosting.objects.bulk_create(
+            SearchPosting(post_id=post_id, field=field, term=term,
+                          count=count)
+            for term, count in counts.items()
+        )
+
+    def set_text(self, post_id, text):
+        self._replace(post_id, SearchPosting.TEXT, Counter(terms(text)))
+
+    def set_comments(self, post_id, texts):
+        counts = Counter()
+        for text in texts:
+            counts.update(terms(text))
+        self._replace(post_id, SearchPosting.COMMENTS, counts)
+
+    def add_comment(self, post_id, text):
+        for term, count in Counter(terms(text)).items():
+            postings = SearchPosting.objects.filter(
+                post_id=post_id, field=SearchPosting.COMMENTS, term=term)
+            if not postings.update(count=F('count') + count):
+                SearchPosting.objects.create(
+                    post_id=post_id, field=SearchPosting.COMMENTS,
+                    term=term, count=count)
+
+    def remove(self, post_id):
+        SearchPosting.objects.filter(post_id=post_id).delete()
+
+    def clear(self):
+        SearchPosting.objects.all().delete()
+
+    def _ranked(self, words):
+        total = Post.objects.count()
+        postings = list(SearchPosting.objects.filter(
+            term__in=words).values_list('term', 'post_id', 'field', 'count'))
+        documents = defaultdict(set)
+        for term, post_id, _, _ in postings:
+            documents[term].add(post_id)
+        scores = defaultdict(float)
+        for term, post_id, field, count in postings:
+            idf = math.log(1 + total / len(documents[term]))
+            scores[post_id] += count * self.weights[field] * idf
+        found = set.intersection(*(documents[word] for word in words))
+        return sorted((-scores[post_id], post_id) for post_id in found)
+
+    def search(self, words, position=None, backward=False, limit=10,
+               offset=0):
+        ranked = self._ranked(words)
+        if position is not None:
+            position = tuple(position)
+            ranked = [
+                row for row in ranked
+                if (row < position if backward else row > position)
+            ]
+        if backward:
+            return ranked[::-1][offset:offset + limit][::-1]
+        return ranked[offset:offset + limit]
+
+    def matching(self, words):
+        return SearchPosting.objects.filter(term__in=words).values(
+            'post_id').annotate(
+                matched=Count('term', distinct=True)
+        ).filter(matched=len(words)).values('post_id')
+
+
+INDEXES = {index.name: index for index in (FTS5Index, PostingsIndex)}
+_index = None
+
+
+def fts5_available():
+    return (
+        connection.vendor == 'sqlite'
+        and TABLE in connection.introspection.table_names()
+    )
+
+
+def get_index():
+    """Индекс из настройки POST_SEARCH_BACKEND (auto, fts5, postings)."""
+    global _index
+    if _index is None:
+        name = getattr(settings, 'POST_SEARCH_BACKEND', 'auto')
+        if name == 'auto':
+            name = 'fts5' if fts5_available() else 'postings'
+        _index = INDEXES[name]()
+    return _index
+
+
+def rebuild():
+    """Строит индекс заново; возвращает число проиндексированных записей."""
+    index = get_index()
+    index.clear()
+    total = 0
+    posts = Post.objects.order_by('pk').values_list('pk', 'text')
+    batch = []
+    for row in posts.iterator(chunk_size=BATCH_SIZE):
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            total += _index_batch(index, batch)
+            batch = []
+    return total + _index_batch(index, batch)
+
+
+def _index_batch(index, batch):
+    comments = defaultdict(list)
+    for post_id, text in Comment.objects.filter(
+        post_id__in=[post_id for post_id, _ in batch]
+    ).order_by('pk').values_list('post_id', 'text'):
+        comments[post_id].append(text)
+    for post_id, text in batch:
+        index.set_text(post_id, text)
+        index.set_comments(post_id, comments[post_id])
+    return len(batch)
+
+
+class SearchPaginator(CursorPaginator):
+    """Курсорный паджинатор результатов поиска по ключу (rank, id)."""
+
+    def __init__(self, query, per_page):
+        self.words = query_terms(query)
+        self.index = get_index()
+        super().__init__(Post.objects.for_feed(), per_page)
+        self.ordering = ('search_rank', 'pk')
+
+    def decode_position(self, values):
+        rank, post_id = values
+        return float(rank), int(post_id)
+
+    def _load(self, rows):
+        posts = Post.objects.for_feed().in_bulk(
+            [post_id for _, post_id in rows])
+        found = []
+        for rank, post_id in rows:
+            if post_id in posts:
+                posts[post_id].search_rank = rank
+                found.append(posts[post_id])
+        return found
+
+    def _fetch(self, position, backward, limit):
+        if not self.words:
+            return []
+        return self._load(self.index.search(
+            self.words, position, backward, limit))
+
+    def _fetch_offset(self, offset, limit):
+        if not self.words:
+            return []
+        return self._load(self.index.search(
+            self.words, limit=limit, offset=offset))
+
+    # Индексы поиска синхронные: асинхронные выборки идут в потоке
+    async def _afetch(self, position, backward, limit):
+        return await sync_to_async(self._fetch)(position, backward, limit)
+
+    async def _afetch_offset(self, offset, limit):
+        return await sync_to_async(self._fetch_offset)(offset, limit)
+
+
+def get_search_page(query, request, per_page=NUMBER_OF_POSTS):
+    return get_request_page(SearchPaginator(query, per_page), request)
@@ -0,0 +1,196 @@
+"""Наполнение базы правдоподобными данными для нагрузочных замеров.
+
+Строки создаются пачками через bulk_create, поэтому сигналы не
+срабатывают; ленты подписок, счётчики, поисковый индекс и версии
+кеша приводятся в порядок после вставки.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from . import cache as feed_cache
+from . import counters, search
+from .models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 500
+DEFAULT_SCALE = {
+    'users': 200,
+    'groups': 10,
+    'posts': 5000,
+    'comments': 10000,
+    'follows': 10,
+    'images': 20,
+}
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Временно отключает auto_now_add и auto_now ради своих дат."""
+    saved = [(field, field.auto_now_add, field.auto_now) for field in fields]
+    for field, _, _ in saved:
+        field.auto_now_add = field.auto_now = False
+    try:
+        yield
+    finally:
+        for field, auto_now_add, auto_now in saved:
+            field.auto_now_add, field.auto_now = auto_now_add, auto_now
+
+
+def add_arguments(parser):
+    """Параметры масштаба, общие для seed_posts и bench_views."""
+    for name, default in DEFAULT_SCALE.items():
+        parser.add_argument(f'--{name}', type=int, default=default)
+    parser.add_argument(
+        '--seed', type=int, default=1,
+        help='Зерно генератора: одинаковое зерно — одинаковые данные'
+    )
+
+
+class Seeder:
+    def __init__(self, seed=1, days=365):
+        self.random = random.Random(seed)
+        self.faker = Faker('ru_RU')
+        self.faker.seed_instance(seed)
+        self.now = timezone.now()
+        self.days = days
+
+    def moment(self):
+        return self.now - timedelta(
+            seconds=self.random.uniform(0, self.days * 24 * 60 * 60))
+
+    def users(self, count):
+        # Один неиспользуемый пароль на всех: хеширование слишком дорогое
+        password = make_password(None)
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f'{self.faker.user_name()}{number}',
+                    first_name=self.faker.first_name(),
+                    last_name=self.faker.last_name(),
+                    password=password,
+                )
+                for number in range(count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        return list(User.objects.values_list('pk', flat=True))
+
+    def groups(self, count):
+        Group.objects.bulk_create(
+            Group(
+                title=self.faker.catch_phrase()[:200],
+                slug=f'seed-group-{number}',
+                description=self.faker.paragraph(),
+            )
+            for number in range(count)
+        )
+        return list(Group.objects.values_list('pk', flat=True))
+
+    def images(self, count):
+        """Несколько картинок на диске, общих для многих записей."""
+        images = []
+        for number in range(count):
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            image = Image.new('RGB', (960, 540), color)
+            image.paste(Image.linear_gradient('L').resize((480, 540)))
+            buffer = BytesIO()
+            image.save(buffer, 'JPEG', quality=85)
+            name = default_storage.save(
+                f'posts/seed-{number}.jpg', ContentFile(buffer.getvalue()))
+            images.append((name, *image.size))
+        return images
+
+    def posts(self, count, author_ids, group_ids, images, image_ratio=0.2):
+        def make(number):
+            moment = self.moment()
+            post = Post(
+                text=self.faker.paragraph(nb_sentences=5),
+                author_id=self.random.choice(author_ids),
+                group_id=(
+                    self.random.choice(group_ids)
+                    if group_ids and self.random.random() < 0.7 else None
+                ),
+                pub_date=moment,
+                updated=moment,
+            )
+            if images and self.random.random() < image_ratio:
+                name, width, height = self.random.choice(images)
+                post.image = name
+                post.image_width, post.image_height = width, height
+            return post
+
+        with explicit_dates(
+            Post._meta.get_field('pub_date'), Post._meta.get_field('updated')
+        ):
+            Post.objects.bulk_create(
+                (make(number) for number in range(count)),
+                batch_size=BATCH_SIZE,
+            )
+        return list(Post.objects.values_list('pk', flat=True))
+
+    def comments(self, count, author_ids, post_ids):
+        with explicit_dates(Comment._meta.get_field('created')):
+            Comment.objects.bulk_create(
+                (
+                    Comment(
+                        post_id=self.random.choice(post_ids),
+                        author_id=self.random.choice(author_ids),
+                        text=self.faker.sentence(),
+                        created=self.moment(),
+                    )
+                    for _ in range(count)
+                ),
+                batch_size=BATCH_SIZE,
+            )
+
+    def follows(self, per_user, user_ids):
+        per_user = min(per_user, len(user_ids) - 1)
+
+        def authors(user_id):
+            sample = self.random.sample(user_ids, per_user + 1)
+            return [author for author in sample if author != user_id][
+                :per_user]
+
+        Follow.objects.bulk_create(
+            (
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id in user_ids
+                for author_id in authors(user_id)
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+def finalize():
+    """Ленты, счётчики, поиск и кеш после вставки в обход сигналов."""
+    call_command('rebuild_timelines', stdout=StringIO())
+    counters.recount()
+    search.rebuild()
+    feed_cache.bump(feed_cache.ALL_POSTS, feed_cache.GROUPS)
+
+
+def seed(users, groups, posts, comments, follows, images, seed=1):
+    """Создаёт данные указанного масштаба; возвращает число строк."""
+    seeder = Seeder(seed)
+    user_ids = seeder.users(users)
+    group_ids = seeder.groups(groups)
+    post_ids = seeder.posts(
+        posts, user_ids, group_ids, seeder.images(images))
+    if post_ids:
+        seeder.comments(comments, user_ids, post_ids)
+    seeder.follows(follows, user_ids)
+    finalize()
+    return {
+        model._meta.model_name: model.objects.count()
+        for model in (User, Group, Post, Comment, Follow)
+    }
@@ -0,0 +1,166 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import cache as feed_cache
+from . import counters, search, thumbnails, timeline
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+# Поля пользователя, которые выводятся в лентах
+USER_FEED_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    feed_cache.bump(
+        feed_cache.ALL_POSTS, feed_cache.author_scope(instance.author_id))
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    feed_cache.bump(feed_cache.post_scope(instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    # Профиль автора выводит число подписчиков и кнопку подписки
+    feed_cache.bump(
+        feed_cache.follows_scope(instance.user_id),
+        feed_cache.author_scope(instance.author_id))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    feed_cache.bump(feed_cache.GROUPS)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    if update_fields is not None and not (
+            USER_FEED_FIELDS & set(update_fields)):
+        return
+    feed_cache.bump(
+        feed_cache.ALL_POSTS, feed_cache.author_scope(instance.pk))
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def post_remember_group(sender, instance, raw=False, **kwargs):
+    """Запоминает прежнюю группу, чтобы перенести счётчик при правке."""
+    if raw or instance._state.adding:
+        return
+    instance._previous_group_id = Post.objects.filter(
+        pk=instance.pk).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_count(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.add_user(instance.author_id, posts_count=1)
+        counters.group_post_added(instance)
+        return
+    previous = getattr(instance, '_previous_group_id', instance.group_id)
+    if previous != instance.group_id:
+        counters.group_post_removed(instance, previous)
+        counters.group_post_added(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_uncount(sender, instance, **kwargs):
+    counters.add_user(instance.author_id, create=False, posts_count=-1)
+    counters.group_post_removed(instance, instance.group_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_count(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.add_post(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_uncount(sender, instance, **kwargs):
+    counters.add_post(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_count(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.add_user(instance.author_id, followers_count=1)
+        counters.add_user(instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_uncount(sender, instance, **kwargs):
+    counters.add_user(
+        instance.author_id, create=False, followers_count=-1)
+    counters.add_user(instance.user_id, create=False, following_count=-1)
+
+
+@receiver(post_save, sender=Post)
+def post_image_saved(sender, instance, raw=False, update_fields=None,
+                     **kwargs):
+    if raw or (update_fields is not None and 'image' not in update_fields):
+        return
+    thumbnails.schedule(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_indexed(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'text' not in update_fields):
+        return
+    search.get_index().set_text(instance.pk, instance.text)
+
+
+@receiver(post_delete, sender=Post)
+def post_unindexed(sender, instance, **kwargs):
+    search.get_index().remove(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_indexed(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        search.get_index().add_comment(instance.post_id, instance.text)
+    else:
+        comment_unindexed(sender, instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_unindexed(sender, instance, origin=None, **kwargs):
+    """Правка или удаление комментария переиндексирует все комментарии."""
+    if isinstance(origin, Post):
+        # Комментарии удаляются вместе с записью, её строка уйдёт целиком
+        return
+    texts = Comment.objects.filter(post_id=instance.post_id).order_by(
+        'pk').values_list('text', flat=True)
+    search.get_index().set_comments(instance.post_id, list(texts))
@@ -0,0 +1,120 @@
+"""Стеммер русского языка по алгоритму Snowball (Портера).
+
+Отрезает окончания и суффиксы, чтобы «котами», «коты» и «кот»
+попадали в поиске в один термин. Работает на чистом Python,
+без внешних библиотек.
+"""
+VOWELS = frozenset('аеиоуыэюя')
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    (),
+    ('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+     'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+     'ая', 'яя', 'ою', 'ею'),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = (
+    (),
+    ('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+     'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+     'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+     'ья', 'я'),
+)
+SUPERLATIVE = ((), ('ейше', 'ейш'))
+DERIVATIONAL = ((), ('ость', 'ост'))
+
+
+def _regions(word):
+    """Начала областей RV и R2 (индексы в слове)."""
+    rv = next(
+        (index + 1 for index, char in enumerate(word) if char in VOWELS),
+        len(word)
+    )
+
+    def after_syllable(start):
+        for index in range(start + 1, len(word)):
+            if word[index] not in VOWELS and word[index - 1] in VOWELS:
+                return index + 1
+        return len(word)
+
+    return rv, after_syllable(after_syllable(0))
+
+
+def _remove(word, start, endings):
+    """Отрезает самое длинное окончание, лежащее не левее start.
+
+    endings — пара групп: окончания первой группы снимаются, только
+    если перед ними стоит «а» или «я». Возвращает None, если снять
+    нечего.
+    """
+    preceded, plain = endings
+    candidates = sorted(
+        [(ending, True) for ending in preceded]
+        + [(ending, False) for ending in plain],
+        key=lambda candidate: len(candidate[0]), reverse=True,
+    )
+    for ending, needs_a in candidates:
+        cut = len(word) - len(ending)
+        if cut < start or not word.endswith(ending):
+            continue
+        if needs_a and not (cut - 1 >= start and word[cut - 1] in 'ая'):
+            return None
+        return word[:cut]
+    return None
+
+
+def _adjectival(word, rv):
+    stripped = _remove(word, rv, ADJECTIVE)
+    if stripped is None:
+        return None
+    without_participle = _remove(stripped, rv, PARTICIPLE)
+    return stripped if without_participle is None else without_participle
+
+
+def _step_one(word, rv):
+    stripped = _remove(word, rv, PERFECTIVE_GERUND)
+    if stripped is not None:
+        return stripped
+    word = _remove(word, rv, REFLEXIVE) or word
+    for step in (_adjectival, lambda w, r: _remove(w, r, VERB),
+                 lambda w, r: _remove(w, r, NOUN)):
+        stripped = step(word, rv)
+        if stripped is not None:
+            return stripped
+    return word
+
+
+def _tidy_up(word, rv):
+    stripped = _remove(word, rv, SUPERLATIVE)
+    if stripped is not None:
+        word = stripped
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        return word[:-1]
+    if stripped is None and word.endswith('ь') and len(word) - 1 >= rv:
+        return word[:-1]
+    return word
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    word = _step_one(word, rv)
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    word = _remove(word, r2, DERIVATIONAL) or word
+    return _tidy_up(word, rv)
@@ -0,0 +1,38 @@
+from django import template
+
+from posts import cache as feed_cache
+
+register = template.Library()
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist, kind, args):
+        self.nodelist = nodelist
+        self.kind = kind
+        self.args = args
+
+    def render(self, context):
+        build_key = feed_cache.FEED_KEYS[self.kind.resolve(context)]
+        key = build_key(*(arg.resolve(context) for arg in self.args))
+        return feed_cache.fragment(
+            key, lambda: self.nodelist.render(context))
+
+
+@register.tag
+def feedcache(parser, token):
+    """Кеширует фрагмент ленты до изменения входящих в неё данных.
+
+    {% feedcache 'index' page_obj %} ... {% endfeedcache %}
+    {% feedcache 'follow' page_obj request.user %} ... {% endfeedcache %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' ожидает вид ленты и страницу")
+    nodelist = parser.parse(('endfeedcache',))
+    parser.delete_first_token()
+    return FeedCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
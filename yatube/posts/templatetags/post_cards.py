@@ -0,0 +1,61 @@
+"""Карточка записи в лентах: {% post_card post %}.
+
+Тег отрисовывает общий шаблон posts/includes/post_card.html в
+отдельном маленьком контексте. Адреса и дата считаются здесь и
+запоминаются между запросами: в лентах одни и те же авторы, группы и
+дни повторяются, а reverse() и локализованная дата — самые дорогие
+узлы карточки (см. manage.py profile_render).
+"""
+from functools import lru_cache
+
+from django import template
+from django.urls import get_script_prefix, get_urlconf, reverse
+from django.utils import formats
+from django.utils.timezone import template_localtime
+from django.utils.translation import get_language
+
+register = template.Library()
+
+DATE_FORMAT = 'd E Y'
+
+
+@lru_cache(maxsize=4096)
+def _reverse(urlconf, prefix, name, arg):
+    # urlconf и prefix — только часть ключа: reverse берёт текущие
+    return reverse(name, urlconf=urlconf, args=[arg])
+
+
+def cached_url(name, arg):
+    return _reverse(get_urlconf(), get_script_prefix(), name, arg)
+
+
+@lru_cache(maxsize=1024)
+def _format_day(day, language):
+    return formats.date_format(day, DATE_FORMAT)
+
+
+def card_date(value):
+    return _format_day(template_localtime(value).date(), get_language())
+
+
+@register.inclusion_tag('posts/includes/post_card.html', takes_context=True)
+def post_card(context, post, author_link=True, group_link=True,
+              detail_link=False):
+    """Карточка записи; флаги включают ссылки на автора, группу и запись.
+
+    Между карточками цикла {% for %} ставится разделитель.
+    """
+    forloop = context.get('forloop')
+    group = post.group if group_link and post.group_id else None
+    return {
+        'post': post,
+        'pub_date': card_date(post.pub_date),
+        'author_url': cached_url(
+            'posts:profile', post.author.username) if author_link else None,
+        'group': group,
+        'group_url': cached_url(
+            'posts:group_list', group.slug) if group else None,
+        'detail_url': cached_url(
+            'posts:post_detail', post.pk) if detail_link else None,
+        'separator': bool(forloop) and not forloop['last'],
+    }
@@ -0,0 +1,11 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def ready_thumbnail(image):
+    """Готовая миниатюра картинки записи или None, пока она создаётся."""
+    return thumbnails.ready(image)
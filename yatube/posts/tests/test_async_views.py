@@ -0,0 +1,119 @@
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, Client, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from posts import async_views
+from posts.models import Comment, Follow, Group, Post
+from posts.utils import NUMBER_OF_POSTS
+
+User = get_user_model()
+
+
+@override_settings(ROOT_URLCONF='yatube.urls_async')
+class AsyncViewsTest(TestCase):
+    """Асинхронные страницы отдают то же, что синхронные."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create(
+            Post(text=f'Запись {number}', author=cls.author, group=cls.group)
+            for number in range(NUMBER_OF_POSTS + 3)
+        )
+        cls.post = Post.objects.create(
+            text='Последняя', author=cls.author, group=cls.group)
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.async_client = AsyncClient()
+        self.async_client.force_login(self.reader)
+        self.sync_client = Client()
+        self.sync_client.force_login(self.reader)
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:follow_index'),
+            reverse('posts:group_index'),
+        ]
+
+    def test_routes_are_async(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    resolve(url).func.__module__, async_views.__name__)
+        self.assertEqual(
+            resolve(reverse('posts:post_create')).func.__module__,
+            'posts.views')
+
+    async def test_same_pages_as_sync(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                with override_settings(ROOT_URLCONF='yatube.urls'):
+                    expected = await sync_to_async(self.sync_client.get)(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(
+                    list(response.context.get('page_obj', [])),
+                    list(expected.context.get('page_obj', [])))
+                self.assertEqual(
+                    response.context.get('following'),
+                    expected.context.get('following'))
+
+    async def test_cursor_page(self):
+        first = await self.async_client.get(reverse('posts:index'))
+        second = await self.async_client.get(
+            reverse('posts:index'),
+            {'cursor': first.context['page_obj'].paginator.next_cursor})
+        self.assertEqual(len(second.context['page_obj']), 4)
+        self.assertFalse(
+            set(first.context['page_obj']) & set(second.context['page_obj']))
+
+    async def test_comments_loaded(self):
+        response = await self.async_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertContains(response, 'Комментарий')
+
+    async def test_comments_json(self):
+        response = await self.async_client.get(
+            reverse('posts:comments', kwargs={'post_id': self.post.pk}))
+        data = response.json()
+        self.assertEqual(
+            [(comment['author'], comment['text'])
+             for comment in data['comments']],
+            [('reader', 'Комментарий')])
+        self.assertIsNone(data['next'])
+
+    async def test_not_modified(self):
+        url = reverse('posts:profile', kwargs={'username': self.author})
+        response = await self.async_client.get(url)
+        repeat = await self.async_client.get(
+            url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(repeat.status_code, HTTPStatus.NOT_MODIFIED)
+
+    async def test_missing_objects(self):
+        urls = [
+            reverse('posts:group_list', kwargs={'slug': 'missing'}),
+            reverse('posts:profile', kwargs={'username': 'missing'}),
+            reverse('posts:post_detail', kwargs={'post_id': 10 ** 6}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    async def test_follow_index_requires_login(self):
+        response = await AsyncClient().get(reverse('posts:follow_index'))
+        self.assertRedirects(
+            response, '/auth/login/?next=/follow/',
+            fetch_redirect_response=False)
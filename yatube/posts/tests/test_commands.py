@@ -0,0 +1,153 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from posts import benchmark, counters, transfer
+from posts.models import (Comment, Follow, Group, Post, TimelineEntry,
+                          User)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class CheckQueryPlansTest(TestCase):
+    def test_feed_queries_use_indexes(self):
+        """Запросы страниц posts обходятся без полных сканирований."""
+        out = StringIO()
+        call_command('check_query_plans', posts=60, stdout=out)
+        self.assertIn('Все запросы используют индексы', out.getvalue())
+        self.assertFalse(Post.objects.exists())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedPostsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_seeded_data_consistent(self):
+        """Засеянные данные согласованы: ленты, счётчики, даты."""
+        out = StringIO()
+        call_command(
+            'seed_posts', users=12, groups=2, posts=60, comments=30,
+            follows=3, images=2, stdout=out
+        )
+        totals = json.loads(out.getvalue())
+        self.assertEqual(totals['post'], 60)
+        self.assertEqual(totals['follow'], 36)
+        self.assertTrue(TimelineEntry.objects.exists())
+        self.assertFalse(Post.objects.filter(in_timelines=False).exists())
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertGreater(
+            Post.objects.values('pub_date').distinct().count(), 1)
+        self.assertEqual(
+            counters.recount(), {'userstats': 0, 'group': 0, 'post': 0})
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportImportPostsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_round_trip(self):
+        """Выгрузка загружается в пустую базу без потерь."""
+        call_command(
+            'seed_posts', users=8, groups=2, posts=40, comments=20,
+            follows=3, images=2, stdout=StringIO()
+        )
+        before = list(Post.objects.order_by('pk').values_list(
+            'pk', 'text', 'pub_date', 'updated', 'author_id', 'group_id',
+            'image', 'comments_count'))
+        media = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        shutil.copytree(TEMP_MEDIA_ROOT, media, dirs_exist_ok=True)
+        shutil.rmtree(TEMP_MEDIA_ROOT)
+        path = f'{media}/dump.jsonl.gz'
+        err = StringIO()
+        call_command('export_posts', path, chunk_size=7, stderr=err)
+        self.assertEqual(json.loads(err.getvalue())['post'], 40)
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+        out = StringIO()
+        call_command(
+            'import_posts', path, batch_size=9, media_from=media,
+            workers=2, stdout=out
+        )
+        counts = json.loads(out.getvalue())
+        self.assertEqual(counts['post'], 40)
+        self.assertEqual(counts['images'], 2)
+        self.assertEqual(counts['follow'], Follow.objects.count())
+        self.assertEqual(list(Post.objects.order_by('pk').values_list(
+            'pk', 'text', 'pub_date', 'updated', 'author_id', 'group_id',
+            'image', 'comments_count')), before)
+        self.assertEqual(Comment.objects.count(), counts['comment'])
+        self.assertFalse(User.objects.first().has_usable_password())
+        self.assertTrue(TimelineEntry.objects.exists())
+        self.assertEqual(
+            counters.recount(), {'userstats': 0, 'group': 0, 'post': 0})
+        # Последовательность id идёт после загруженных ключей
+        post = Post.objects.create(text='Новая', author=User.objects.first())
+        self.assertGreater(post.pk, before[-1][0])
+
+    def test_media_failures_reported(self):
+        """Путь вне хранилища и пропавший файл попадают в failed."""
+        media = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        with open(f'{media}/photo.jpg', 'wb') as file:
+            file.write(b'jpeg')
+        copier = transfer.MediaCopier(media, workers=2)
+        for name in ('photo.jpg', '../../etc/passwd', 'missing.jpg'):
+            copier.copy(name)
+        copier.close()
+        self.assertEqual(copier.copied, 1)
+        self.assertEqual(
+            sorted(copier.failed), ['../../etc/passwd', 'missing.jpg'])
+
+    def test_bad_line_reported(self):
+        path = f'{TEMP_MEDIA_ROOT}/bad.jsonl'
+        with open(path, 'w') as file:
+            file.write('{"type": "group", "id": 1, "title": "Г", '
+                       '"slug": "g", "description": ""}\n')
+            file.write('{"type": "post", "colour": "red"}\n')
+        with self.assertRaisesMessage(CommandError, 'строка 2'):
+            call_command('import_posts', path, stdout=StringIO())
+
+
+class BenchmarkCompareTest(TestCase):
+    def test_regressions_found(self):
+        baseline = {'scale': {'posts': 10}, 'drivers': {'client': {
+            'index': {'p99_ms': 10.0, 'queries': 3},
+            'profile': {'p99_ms': 10.0, 'queries': 5},
+        }}}
+        current = {'scale': {'posts': 10}, 'drivers': {'client': {
+            'index': {'p99_ms': 11.0, 'queries': 4},
+            'profile': {'p99_ms': 14.0, 'queries': 5},
+        }}}
+        problems = benchmark.compare(current, baseline, tolerance=0.25)
+        self.assertEqual(len(problems), 2)
+        self.assertIn('client/index', problems[0])
+        self.assertIn('client/profile', problems[1])
+        self.assertEqual(benchmark.compare(baseline, baseline, 0), [])
+        self.assertEqual(len(benchmark.compare(
+            {**current, 'scale': {'posts': 20}}, baseline, 0.25)), 1)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(benchmark.percentile(values, 0.5), 50)
+        self.assertEqual(benchmark.percentile(values, 0.99), 99)
+        self.assertEqual(benchmark.percentile([7], 0.99), 7)
+
+    def test_middleware_overhead(self):
+        result = benchmark.middleware_overhead(
+            '/', 'core.middleware.MetricsMiddleware', requests=3, warmup=1)
+        self.assertEqual(result['path'], '/')
+        self.assertGreater(result['with_ms'], 0)
+        self.assertGreater(result['without_ms'], 0)
@@ -1,12 +1,19 @@
+import os
+import resource
 import shutil
 import tempfile
+import unittest
+from io import BytesIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import ExifTags, Image
 
+from posts.forms import PostForm
+from posts.images import process_upload
 from posts.models import Comment, Group, Post
 
 User = get_user_model()
@@ -113,6 +120,108 @@ class PostCreateFormTests(TestCase):
         self.assertEqual(edited_post.text, form_data['text'])
 
 
+def make_jpeg(size, exif=None):
+    buffer = BytesIO()
+    image = Image.linear_gradient('L').resize(size).convert('RGB')
+    image.save(buffer, 'JPEG', exif=exif or Image.Exif())
+    return buffer.getvalue()
+
+
+def make_png(size):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'white').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def peak_rss_growth(func):
+    """Прирост пикового RSS (КБ) при вызове func в дочернем процессе."""
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            func()
+            after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            os.write(write_end, str(after - before).encode())
+        finally:
+            os._exit(0)
+    os.close(write_end)
+    os.waitpid(pid, 0)
+    with os.fdopen(read_end) as result:
+        return int(result.read())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='uploader')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def form(self, content, name='photo.jpg'):
+        return PostForm(
+            data={'text': 'Фото'},
+            files={'image': SimpleUploadedFile(name, content, 'image/jpeg')},
+        )
+
+    def test_image_reencoded_without_metadata(self):
+        """Картинка уменьшается, поворачивается и теряет EXIF."""
+        exif = Image.Exif()
+        exif[ExifTags.Base.Orientation] = 6
+        exif[ExifTags.Base.Make] = 'Камера'
+        form = self.form(make_jpeg((400, 200), exif))
+        with override_settings(POST_IMAGE_MAX_SIDE=100):
+            self.assertTrue(form.is_valid(), form.errors)
+        post = form.save(commit=False)
+        post.author = self.user
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (50, 100))
+        with Image.open(post.image) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (50, 100))
+            self.assertFalse(image.getexif())
+
+    def test_limits(self):
+        """Слишком большие и битые файлы отклоняются формой."""
+        cases = (
+            ({'POST_IMAGE_MAX_BYTES': 100}, make_jpeg((50, 50))),
+            ({'POST_IMAGE_MAX_PIXELS': 1000}, make_jpeg((50, 50))),
+            ({}, b'not an image'),
+        )
+        for limits, content in cases:
+            with self.subTest(limits=limits), override_settings(**limits):
+                form = self.form(content)
+                self.assertFalse(form.is_valid())
+                self.assertIn('image', form.errors)
+
+    def test_full_decode_formats_limited(self):
+        """PNG декодируется целиком, и лимит для него меньше, чем для JPEG."""
+        size = (5000, 3000)
+        self.assertTrue(self.form(make_jpeg(size)).is_valid())
+        form = self.form(make_png(size), name='big.png')
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()['image'][0].code,
+                         'too_many_pixels')
+        self.assertTrue(
+            self.form(make_png((2000, 1500)), name='small.png').is_valid())
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'нужен os.fork')
+    def test_peak_memory_bounded(self):
+        """Пик памяти много меньше полностью декодированного исходника."""
+        size = (6000, 4000)
+        upload = SimpleUploadedFile('big.jpg', make_jpeg(size), 'image/jpeg')
+        decoded_kb = size[0] * size[1] * 3 // 1024
+        with override_settings(POST_IMAGE_MAX_SIDE=800):
+            growth = peak_rss_growth(lambda: process_upload(upload))
+        self.assertLess(growth, decoded_kb // 2)
+
+
 class CommentCreateFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
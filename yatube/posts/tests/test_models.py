@@ -1,7 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-from posts.models import Group, Post
+from posts.counters import recount
+from posts.models import Comment, Follow, Group, Post, UserStats
 
 User = get_user_model()
 
@@ -55,3 +56,110 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_value)
+
+
+class CountersTest(TestCase):
+    """Денормализованные счётчики поддерживаются сигналами."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_counters(self):
+        post = Post.objects.create(
+            text='Запись', author=self.author, group=self.group)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        post.group = self.other_group
+        post.save()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 1)
+        post.delete()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 0)
+
+    def assertSummary(self, group, posts, authors, last):
+        group.refresh_from_db()
+        self.assertEqual(
+            (group.posts_count, group.authors_count, group.last_post_date),
+            (posts, authors, last))
+
+    def test_group_summary(self):
+        """Каталог групп: авторы и дата последней записи."""
+        first = Post.objects.create(
+            text='Первая', author=self.author, group=self.group)
+        second = Post.objects.create(
+            text='Вторая', author=self.author, group=self.group)
+        third = Post.objects.create(
+            text='Третья', author=self.reader, group=self.group)
+        self.assertSummary(self.group, 3, 2, third.pub_date)
+        third.group = self.other_group
+        third.save()
+        self.assertSummary(self.group, 2, 1, second.pub_date)
+        self.assertSummary(self.other_group, 1, 1, third.pub_date)
+        second.delete()
+        self.assertSummary(self.group, 1, 1, first.pub_date)
+        first.delete()
+        self.assertSummary(self.group, 0, 0, None)
+        self.assertEqual(
+            recount(), {'userstats': 0, 'group': 0, 'post': 0})
+
+    def test_comment_counter(self):
+        post = Post.objects.create(text='Запись', author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Коммент')
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_follow_counters(self):
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_delete_author_with_posts_and_followers(self):
+        """Удаление автора не воссоздаёт его счётчики из каскада."""
+        author = User.objects.create_user(username='leaving')
+        Post.objects.create(text='Запись', author=author, group=self.group)
+        Follow.objects.create(user=self.reader, author=author)
+        Follow.objects.create(user=author, author=self.author)
+        author.delete()
+        self.assertFalse(UserStats.objects.filter(user_id=author.pk).exists())
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertSummary(self.group, 0, 0, None)
+
+    def test_recount_repairs_drift(self):
+        post = Post.objects.create(
+            text='Запись', author=self.author, group=self.group)
+        UserStats.objects.filter(user=self.author).update(posts_count=42)
+        Post.objects.filter(pk=post.pk).update(comments_count=7)
+        UserStats.objects.filter(user=self.reader).delete()
+        Group.objects.filter(pk=self.group.pk).update(last_post_date=None)
+        Group.objects.filter(pk=self.other_group.pk).update(authors_count=3)
+        fixed = recount()
+        self.assertEqual(fixed['userstats'], 1)
+        self.assertEqual(fixed['post'], 1)
+        self.assertEqual(fixed['group'], 2)
+        self.assertSummary(self.group, 1, 1, post.pub_date)
+        self.assertSummary(self.other_group, 0, 0, None)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.reader).posts_count, 0)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from posts.models import Group, Post
@@ -36,3 +38,47 @@ class PaginatorViewsTest(TestCase):
             with self.subTest(page=page):
                 response = self.client.get(page, {'page': 2})
                 self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_cursor_navigation(self):
+        """Курсор ведёт на следующую и обратно на предыдущую страницу."""
+        for page in PaginatorViewsTest.pages:
+            with self.subTest(page=page):
+                first = self.client.get(page).context['page_obj']
+                cursor = first.paginator.next_cursor
+                second = self.client.get(page, {'cursor': cursor})
+                page_obj = second.context['page_obj']
+                self.assertEqual(len(page_obj), 3)
+                self.assertFalse(page_obj.has_next())
+                self.assertTrue(page_obj.has_previous())
+                back = self.client.get(
+                    page, {'cursor': page_obj.paginator.previous_cursor})
+                self.assertEqual(
+                    list(back.context['page_obj']), list(first))
+
+    def test_last_cursor_returns_tail(self):
+        """Курсор «Последняя» отдаёт хвост ленты."""
+        first = self.client.get(reverse('posts:index')).context['page_obj']
+        response = self.client.get(
+            reverse('posts:index'), {'cursor': first.paginator.last_cursor})
+        self.assertEqual(len(response.context['page_obj']), NUMBER_OF_POSTS)
+        self.assertFalse(response.context['page_obj'].has_next())
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        """Битый курсор открывает первую страницу."""
+        response = self.client.get(
+            reverse('posts:index'), {'cursor': 'not-a-cursor'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), NUMBER_OF_POSTS)
+        self.assertFalse(page_obj.has_previous())
+
+    def test_cursor_page_does_not_use_offset(self):
+        """Переход по курсору не выполняет OFFSET и COUNT(*)."""
+        first = self.client.get(reverse('posts:index')).context['page_obj']
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(
+                reverse('posts:index'),
+                {'cursor': first.paginator.next_cursor}
+            )
+        for query in queries.captured_queries:
+            self.assertNotIn('OFFSET', query['sql'])
+            self.assertNotIn('COUNT(', query['sql'])
@@ -0,0 +1,125 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from posts import search
+from posts.models import Comment, Post
+from posts.stemmer import stem
+
+User = get_user_model()
+
+
+class StemmerTest(SimpleTestCase):
+    def test_stems(self):
+        cases = {
+            'котами': 'кот',
+            'коты': 'кот',
+            'красивая': 'красив',
+            'программирование': 'программирован',
+            'нежнейшая': 'нежн',
+            'ёлки': 'елк',
+        }
+        for word, expected in cases.items():
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+    def test_stop_words_skipped(self):
+        self.assertEqual(search.terms('Кот и пёс на крыше'), [
+            'кот', 'пес', 'крыш'])
+
+
+class SearchTest(TestCase):
+    """Поиск по активному индексу (FTS5 на SQLite)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.in_text = Post.objects.create(
+            text='Коты гуляли по крышам', author=cls.user)
+        cls.in_comment = Post.objects.create(
+            text='Про собак', author=cls.user)
+        Comment.objects.create(
+            post=cls.in_comment, author=cls.user, text='А у меня кот')
+        cls.other = Post.objects.create(text='Про погоду', author=cls.user)
+
+    def found(self, query):
+        response = self.client.get(reverse('posts:search'), {'q': query})
+        return list(response.context['page_obj'])
+
+    def test_stemmed_match_and_ranking(self):
+        """Текст записи весит больше комментариев."""
+        self.assertEqual(
+            self.found('котами'), [self.in_text, self.in_comment])
+
+    def test_index_follows_changes(self):
+        self.other.text = 'Кот и дождь'
+        self.other.save()
+        Comment.objects.create(
+            post=self.other, author=self.user, text='Мокрая собака')
+        self.assertIn(self.other, self.found('кот'))
+        self.assertIn(self.other, self.found('собака'))
+        self.in_text.delete()
+        self.assertNotIn(self.in_text, self.found('кот'))
+
+    def test_comment_removed_from_index(self):
+        Comment.objects.filter(post=self.in_comment).delete()
+        self.assertEqual(self.found('кот'), [self.in_text])
+
+    def test_empty_queries(self):
+        for query in ('', 'и на', 'несуществующее'):
+            with self.subTest(query=query):
+                self.assertEqual(self.found(query), [])
+
+    def test_cursor_pagination(self):
+        """Курсор проходит все результаты без повторов и хранит запрос."""
+        Post.objects.bulk_create(
+            Post(text=f'Кот номер {number}', author=self.user)
+            for number in range(15)
+        )
+        search.rebuild()
+        response = self.client.get(reverse('posts:search'), {'q': 'кот'})
+        first = list(response.context['page_obj'])
+        self.assertContains(response, '?q=%D0%BA%D0%BE%D1%82&amp;cursor=')
+        cursor = response.context['page_obj'].paginator.next_cursor
+        second = list(self.client.get(
+            reverse('posts:search'), {'q': 'кот', 'cursor': cursor}
+        ).context['page_obj'])
+        self.assertEqual(len(first) + len(second), 17)
+        self.assertFalse(set(first) & set(second))
+
+    def test_window_limits_ranked_matches(self):
+        Post.objects.bulk_create(
+            Post(text=f'Кот номер {number}', author=self.user)
+            for number in range(5)
+        )
+        search.rebuild()
+        newest = list(Post.objects.order_by('-pk')[:3])
+        with mock.patch.object(search, 'SEARCH_WINDOW', 3):
+            self.assertCountEqual(self.found('кот'), newest)
+
+    def test_admin_uses_index(self):
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'котами'})
+        self.assertCountEqual(
+            response.context['cl'].result_list,
+            [self.in_text, self.in_comment]
+        )
+
+
+class PostingsSearchTest(SearchTest):
+    """Те же проверки на запасном индексе без FTS5."""
+
+    def setUp(self):
+        patcher = mock.patch.object(search, '_index', search.PostingsIndex())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        search.rebuild()
+
+    def test_window_limits_ranked_matches(self):
+        """Окно действует только для FTS5."""
@@ -1,14 +1,23 @@
 import shutil
 import tempfile
+from http import HTTPStatus
+from unittest import mock
 
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from posts.models import Follow, Group, Post
+from posts import cache as feed_cache
+from posts import thumbnails
+from posts.models import Comment, Follow, Group, Post, TimelineEntry
+from posts.tests.utils import assert_query_budget
+from posts.utils import NUMBER_OF_COMMENTS, NUMBER_OF_POSTS
 
 User = get_user_model()
 # Создаем временную папку для медиа-файлов;
@@ -149,12 +158,78 @@ class PostViewTest(TestCase):
         self.assertEqual(response.context['post'], PostViewTest.post)
         self.assertTrue(response.context['is_edit'])
 
+    def test_thumbnail_placeholder_until_generated(self):
+        """Пока миниатюра не создана, вместо неё выводится заглушка."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        self.assertIsNone(thumbnails.ready(self.post.image))
+        self.assertContains(self.client.get(url), 'Картинка готовится')
+        thumbnails.generate(self.post.image.name, self.author.pk)
+        thumbnail = thumbnails.ready(self.post.image)
+        self.assertIsNotNone(thumbnail)
+        self.assertContains(self.client.get(url), thumbnail.url)
+
+    def test_thumbnail_is_scheduled_after_commit(self):
+        """Сохранение записи с картинкой ставит миниатюру в очередь."""
+        with mock.patch.object(thumbnails, 'generate') as generate:
+            with mock.patch.object(thumbnails, 'ASYNC', False):
+                with self.captureOnCommitCallbacks(execute=True):
+                    post = Post.objects.create(
+                        text='С картинкой',
+                        author=self.author,
+                        image=SimpleUploadedFile(
+                            'other.gif', self.small_gif, 'image/gif')
+                    )
+        generate.assert_called_once_with(post.image.name, self.author.pk)
+
+    def test_post_card_links(self):
+        """Карточка записи выводит ссылки, нужные конкретной ленте."""
+        group_url = reverse('posts:group_list', args=['test-slug'])
+        author_url = reverse('posts:profile', args=['author'])
+        detail_url = reverse('posts:post_detail', args=[self.post.pk])
+        pages = {
+            reverse('posts:index'): (group_url, author_url),
+            reverse('posts:profile', args=['author']): (
+                group_url, detail_url),
+        }
+        for url, links in pages.items():
+            with self.subTest(url=url):
+                response = self.follower_clint.get(url)
+                for link in links:
+                    self.assertContains(response, f'href="{link}"')
+        response = self.follower_clint.get(group_url)
+        self.assertNotContains(response, 'все записи группы')
+        self.assertContains(response, 'Рандомные слова')
+
     def test_index_page_cache(self):
         """Проверка работы кеша главной страницы"""
         response = self.client.get(reverse('posts:index'))
+        # update() не шлёт сигналов, поэтому страница берётся из кеша
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        response_cached = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.content, response_cached.content)
         Post.objects.create(text='test', author=self.author)
         response_filled = self.client.get(reverse('posts:index'))
-        self.assertEqual(response.content, response_filled.content)
+        self.assertNotEqual(response.content, response_filled.content)
+        self.assertContains(response_filled, 'Тихая правка')
+
+    def test_follow_page_cache_is_per_user(self):
+        """Кеш ленты подписок не смешивает ленты разных читателей."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        response = self.follower_clint.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'Рандомные слова')
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertNotContains(response, 'Рандомные слова')
+
+    def test_follow_page_cache_invalidated_by_author_post(self):
+        """Новая запись автора сбрасывает кеш ленты подписчика."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.follower_clint.get(reverse('posts:follow_index'))
+        hits = feed_cache.stats()['hits']
+        self.follower_clint.get(reverse('posts:follow_index'))
+        self.assertEqual(feed_cache.stats()['hits'], hits + 1)
+        Post.objects.create(text='Свежая запись', author=self.author)
+        response = self.follower_clint.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'Свежая запись')
 
     def test_author_follow(self):
         """Тестирование функций подписок на авторов"""
@@ -184,3 +259,325 @@ class PostViewTest(TestCase):
         self.assertFalse(
             Follow.objects.filter(user=self.follower, author=self.author)
         )
+
+
+class FeedQueryBudgetTest(TestCase):
+    """Число запросов ленты не зависит от числа записей на странице."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        for number in range(NUMBER_OF_POSTS + 2):
+            author = User.objects.create_user(
+                username=f'author{number}', first_name=f'Имя{number}')
+            group = Group.objects.create(
+                title=f'Группа {number}', slug=f'group-{number}')
+            Post.objects.create(
+                text=f'Запись {number}', author=author, group=group)
+            Follow.objects.create(user=cls.reader, author=author)
+        cls.group = group
+        cls.author = author
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_feed_pages_fit_query_budget(self):
+        budgets = {
+            reverse('posts:index'): 3,
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}): 4,
+            reverse(
+                'posts:profile', kwargs={'username': self.author}): 5,
+            # ключи ленты, неразосланные записи, сами записи
+            # и список авторов при холодном кеше ленты
+            reverse('posts:follow_index'): 6,
+            reverse('posts:group_index'): 3,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                with assert_query_budget(self, budget):
+                    response = self.reader_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @mock.patch('posts.views.NUMBER_OF_GROUPS', 5)
+    def test_group_index_pages(self):
+        """Каталог групп листается курсором по названию без COUNT(*)."""
+        titles = []
+        url = reverse('posts:group_index')
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            for query in queries.captured_queries:
+                self.assertNotIn('COUNT(', query['sql'])
+            page_obj = response.context['page_obj']
+            titles += [group.title for group in page_obj]
+            url = page_obj.has_next() and (
+                reverse('posts:group_index') + '?cursor='
+                + page_obj.paginator.next_cursor)
+        self.assertEqual(titles, sorted(
+            Group.objects.values_list('title', flat=True)))
+        self.assertContains(
+            self.client.get(reverse('posts:group_index')),
+            'Записей: 1, авторов: 1')
+
+
+class TimelineTest(TestCase):
+    """Материализованная лента подписок."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.star = User.objects.create_user(username='star')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def feed(self, **params):
+        response = self.reader_client.get(
+            reverse('posts:follow_index'), params)
+        return response.context['page_obj']
+
+    def test_post_is_fanned_out_to_followers(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новая', author=self.author)
+        post.refresh_from_db()
+        self.assertTrue(post.in_timelines)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertIn(post, self.feed())
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        post = Post.objects.create(text='Старая', author=self.author)
+        self.reader_client.get(
+            reverse('posts:profile_follow', args=[self.author]))
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', args=[self.author]))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertNotIn(post, self.feed())
+
+    @mock.patch('posts.timeline.TIMELINE_FANOUT_LIMIT', 0)
+    def test_popular_author_posts_are_merged_on_read(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.star)
+        posts = []
+        for number in range(NUMBER_OF_POSTS + 3):
+            author = self.star if number % 2 else self.author
+            posts.append(
+                Post.objects.create(text=f'Запись {number}', author=author))
+        self.assertFalse(TimelineEntry.objects.exists())
+        first = self.feed()
+        self.assertEqual(list(first), posts[::-1][:NUMBER_OF_POSTS])
+        second = self.feed(cursor=first.paginator.next_cursor)
+        self.assertEqual(list(second), posts[::-1][NUMBER_OF_POSTS:])
+
+    def test_unpopular_authors_not_scanned_on_read(self):
+        """Записи читаются по автору только у популярных авторов."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.create(text='Своя', author=self.author)
+        Post.objects.create(text='Чужая', author=self.star)
+        Post.objects.update(in_timelines=False)
+        with CaptureQueriesContext(connection) as queries:
+            self.feed()
+        conditions = '\n'.join(
+            query['sql'].partition(' WHERE ')[2]
+            for query in queries.captured_queries)
+        self.assertNotIn('"posts_post"."author_id"', conditions)
+        self.assertNotIn('"posts_post"."in_timelines"', conditions)
+
+
+class CounterPagesTest(TestCase):
+    """Страницы профиля и записи не считают строки агрегатами."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Запись', author=cls.author)
+
+    def test_no_count_queries(self):
+        urls = [
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertContains(response, 'Всего постов')
+                for query in queries.captured_queries:
+                    self.assertNotIn('COUNT(', query['sql'])
+
+
+class CommentPagesTest(TestCase):
+    """Комментарии записи выводятся порциями по курсору."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        readers = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(5)
+        ]
+        cls.post = Post.objects.create(text='Запись', author=cls.author)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=readers[number % 5],
+                    text=f'Комментарий {number}')
+            for number in range(NUMBER_OF_COMMENTS * 2 + 5)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_first_page_capped(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        with assert_query_budget(self, 2):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['comments']), NUMBER_OF_COMMENTS)
+        self.assertContains(response, 'Комментарий 0<')
+        self.assertNotContains(response, f'Комментарий {NUMBER_OF_COMMENTS}<')
+        self.assertContains(response, 'id="comments-more"')
+
+    def test_json_pages(self):
+        """Порции из JSON продолжают первую страницу без повторов."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}))
+        url = response.context['comments'].paginator.next_cursor
+        url = reverse('posts:comments', args=[self.post.pk]) + '?cursor=' + url
+        texts = [comment.text for comment in response.context['comments']]
+        while url:
+            with assert_query_budget(self, 2):
+                data = self.client.get(url).json()
+            self.assertLessEqual(len(data['comments']), NUMBER_OF_COMMENTS)
+            texts += [comment['text'] for comment in data['comments']]
+            url = data['next']
+        self.assertEqual(texts, [
+            f'Комментарий {number}'
+            for number in range(NUMBER_OF_COMMENTS * 2 + 5)
+        ])
+        self.assertEqual(data['comments'][0]['author_url'], reverse(
+            'posts:profile', args=[data['comments'][0]['author']]))
+
+    def test_missing_post(self):
+        response = self.client.get(reverse('posts:comments', args=[10 ** 6]))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class ConditionalGetTest(TestCase):
+    """ETag и Last-Modified лент и страницы записи."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Запись', author=self.author, group=self.group)
+        self.other = Post.objects.create(text='Другая', author=self.author)
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def etags(self):
+        return {url: self.client.get(url)['ETag'] for url in self.urls}
+
+    def assertAllChanged(self, before):
+        for url, etag in self.etags().items():
+            with self.subTest(url=url):
+                self.assertNotEqual(etag, before[url])
+
+    def test_not_modified_without_rendering(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('no-cache', response['Cache-Control'])
+                with mock.patch('posts.conditional.render') as render:
+                    repeat = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(repeat.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(repeat['ETag'], response['ETag'])
+                render.assert_not_called()
+                modified = self.client.get(
+                    url,
+                    HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+                self.assertEqual(
+                    modified.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_edit_changes_validators(self):
+        before = self.etags()
+        self.author_client.post(
+            reverse('posts:edit', kwargs={'post_id': self.post.pk}),
+            {'text': 'Исправленная запись', 'group': self.group.pk},
+        )
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.updated, self.post.pub_date)
+        self.assertAllChanged(before)
+
+    def test_comment_changes_validators(self):
+        before = self.etags()
+        self.author_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий'},
+        )
+        self.assertAllChanged(before)
+        before = self.etags()
+        self.post.comments.all().delete()
+        self.assertAllChanged(before)
+
+    def test_delete_changes_validators(self):
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        later = feed_cache.time.time_ns() + 10 ** 10
+        with mock.patch.object(feed_cache.time, 'time_ns', return_value=later):
+            self.other.delete()
+        repeat = self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeat.status_code, HTTPStatus.OK)
+        modified = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(modified.status_code, HTTPStatus.OK)
+
+    def test_follow_changes_profile_last_modified(self):
+        """Число подписчиков и кнопка подписки не отдаются из 304."""
+        url = reverse('posts:profile', kwargs={'username': self.author})
+        reader_client = Client()
+        reader_client.force_login(self.reader)
+        response = reader_client.get(url)
+        later = feed_cache.time.time_ns() + 10 ** 10
+        with mock.patch.object(feed_cache.time, 'time_ns', return_value=later):
+            Follow.objects.create(user=self.reader, author=self.author)
+        for client in (self.client, reader_client):
+            with self.subTest(client=client):
+                modified = client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+                self.assertEqual(modified.status_code, HTTPStatus.OK)
+
+    def test_etag_depends_on_reader(self):
+        reader_client = Client()
+        reader_client.force_login(self.reader)
+        for url in self.urls:
+            with self.subTest(url=url):
+                anonymous = self.client.get(url)
+                response = reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=anonymous['ETag'])
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertIn('private', response['Cache-Control'])
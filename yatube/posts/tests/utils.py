@@ -0,0 +1,18 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@contextmanager
+def assert_query_budget(testcase, budget):
+    """Падает, если блок выполнил больше budget SQL-запросов."""
+    with CaptureQueriesContext(connection) as queries:
+        yield queries
+    executed = len(queries.captured_queries)
+    testcase.assertLessEqual(
+        executed,
+        budget,
+        f'Запросов: {executed}, бюджет: {budget}\n' + '\n'.join(
+            query['sql'] for query in queries.captured_queries)
+    )
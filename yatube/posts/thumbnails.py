@@ -0,0 +1,115 @@
+"""Фоновая подготовка миниатюр картинок записей.
+
+Миниатюры создаются пулом потоков после сохранения записи, а шаблоны
+только ищут готовую миниатюру в хранилище ключей sorl и, пока её нет,
+показывают заглушку. Так работа Pillow не попадает во время ответа.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.engines import pil_engine
+from sorl.thumbnail.images import ImageFile
+
+from . import cache as feed_cache
+
+logger = logging.getLogger(__name__)
+
+GEOMETRY = getattr(settings, 'POST_THUMBNAIL_GEOMETRY', '960x339')
+OPTIONS = getattr(
+    settings, 'POST_THUMBNAIL_OPTIONS', {'crop': 'center', 'upscale': True})
+WORKERS = getattr(settings, 'POST_THUMBNAIL_WORKERS', 2)
+ASYNC = getattr(settings, 'POST_THUMBNAIL_ASYNC', True)
+
+_executor = None
+
+
+class PillowEngine(pil_engine.Engine):
+    """Движок sorl для Pillow 10+, где убрана константа Image.ANTIALIAS."""
+
+    def _scale(self, image, width, height):
+        return image.resize((width, height), resample=Image.LANCZOS)
+
+
+class ReadyThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, умеющий искать миниатюру без её создания."""
+
+    def _normalize(self, source, options):
+        # Те же умолчания, что и в ThumbnailBackend.get_thumbnail,
+        # иначе имя файла миниатюры не совпадёт
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        return options
+
+    def ready_thumbnail(self, file_, geometry_string, **options):
+        """Готовая миниатюра или None, если её ещё не создали."""
+        source = ImageFile(file_)
+        options = self._normalize(source, options)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+backend = ReadyThumbnailBackend()
+
+
+def ready(image):
+    if not image:
+        return None
+    return backend.ready_thumbnail(image, GEOMETRY, **OPTIONS)
+
+
+def generate(name, author_id=None):
+    """Создаёт миниатюру картинки; вызывается вне цикла запроса.
+
+    Готовая миниатюра сбрасывает кеш лент автора, иначе в них
+    надолго осталась бы заглушка.
+    """
+    try:
+        backend.get_thumbnail(name, GEOMETRY, **OPTIONS)
+        if author_id is not None:
+            feed_cache.bump(
+                feed_cache.ALL_POSTS, feed_cache.author_scope(author_id))
+    except Exception:
+        logger.exception('Не удалось создать миниатюру %s', name)
+    finally:
+        close_old_connections()
+    return name
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=WORKERS, thread_name_prefix='thumbnails')
+    return _executor
+
+
+def schedule(post):
+    """Ставит создание миниатюры в очередь после фиксации транзакции."""
+    if not post.image:
+        return
+    args = (post.image.name, post.author_id)
+    if ASYNC:
+        transaction.on_commit(lambda: _get_executor().submit(generate, *args))
+    else:
+        transaction.on_commit(lambda: generate(*args))
+
+
+def shutdown():
+    """Дожидается поставленных в очередь миниатюр и закрывает пул."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -0,0 +1,150 @@
+"""Материализованная лента подписок (fan-out on write).
+
+Новая запись раскладывается в TimelineEntry каждого подписчика автора,
+и чтение ленты становится одним проходом по индексу
+(user, pub_date, post). Записи авторов, у которых подписчиков больше
+TIMELINE_FANOUT_LIMIT, не рассылаются (in_timelines=False) и
+подмешиваются при чтении.
+"""
+import asyncio
+
+from django.conf import settings
+
+from .models import Follow, Post, TimelineEntry
+from .utils import (NUMBER_OF_POSTS, CursorPaginator, aget_request_page,
+                    get_request_page)
+
+TIMELINE_FANOUT_LIMIT = getattr(settings, 'TIMELINE_FANOUT_LIMIT', 1000)
+BATCH_SIZE = 500
+
+
+def _bulk_add(user_ids, posts):
+    entries = (
+        TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for user_id in user_ids
+        for post_id, pub_date in posts
+    )
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def fan_out(post):
+    """Раскладывает новую запись по лентам подписчиков автора."""
+    follower_ids = list(
+        Follow.objects.filter(author_id=post.author_id).values_list(
+            'user_id', flat=True)[:TIMELINE_FANOUT_LIMIT + 1]
+    )
+    if len(follower_ids) > TIMELINE_FANOUT_LIMIT:
+        return
+    _bulk_add(follower_ids, [(post.pk, post.pub_date)])
+    Post.objects.filter(pk=post.pk).update(in_timelines=True)
+    post.in_timelines = True
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту нового подписчика разосланные записи автора."""
+    posts = Post.objects.filter(
+        author_id=author_id, in_timelines=True
+    ).values_list('pk', 'pub_date')
+    _bulk_add([user_id], posts.iterator(chunk_size=BATCH_SIZE))
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты читателя записи автора, от которого он отписался."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id).delete()
+
+
+def popular_authors(user):
+    """id авторов из подписок user, чьи записи не рассылаются."""
+    return Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=TIMELINE_FANOUT_LIMIT,
+    ).values_list('author_id', flat=True)
+
+
+class TimelinePaginator(CursorPaginator):
+    """Курсорный паджинатор ленты подписок.
+
+    Ключи (pub_date, id) берутся из материализованной ленты и из записей
+    популярных авторов, сливаются, и только выбранная страница
+    догружается из Post по первичному ключу.
+    """
+
+    def __init__(self, user, per_page):
+        self.user = user
+        super().__init__(
+            Post.objects.for_feed().filter(author__following__user=user),
+            per_page
+        )
+
+    def _keys(self, queryset, fields, position, backward, limit):
+        if position is not None:
+            queryset = queryset.filter(
+                self._seek(position, backward, fields))
+        ordering = [
+            name if self.descending == backward else f'-{name}'
+            for name in fields
+        ]
+        return queryset.order_by(*ordering).values_list(*fields)[:limit]
+
+    def _sources(self, author_ids, position, backward, limit):
+        """Ключи из ленты и из записей каждого популярного автора."""
+        return (
+            self._keys(
+                TimelineEntry.objects.filter(user=self.user),
+                ('pub_date', 'post_id'), position, backward, limit
+            ),
+            # Отдельный запрос на автора — проход по индексу
+            # (author, pub_date, id) не дальше limit строк; уже
+            # разосланные записи отбрасывает слияние
+            *(
+                self._keys(
+                    Post.objects.filter(author_id=author_id),
+                    ('pub_date', 'pk'), position, backward, limit
+                )
+                for author_id in author_ids
+            ),
+        )
+
+    def _merge(self, sources, backward, limit):
+        keys = sorted(
+            set().union(*sources), reverse=self.descending != backward
+        )[:limit]
+        if backward:
+            keys.reverse()
+        return keys
+
+    def _fetch(self, position, backward, limit):
+        sources = self._sources(
+            list(popular_authors(self.user)), position, backward, limit)
+        keys = self._merge([list(keys) for keys in sources], backward, limit)
+        posts = Post.objects.for_feed().in_bulk(
+            [post_id for _, post_id in keys])
+        return [posts[post_id] for _, post_id in keys if post_id in posts]
+
+    async def _afetch(self, position, backward, limit):
+        async def fetch(queryset):
+            return [row async for row in queryset]
+
+        author_ids = await fetch(popular_authors(self.user))
+        sources = await asyncio.gather(*map(
+            fetch, self._sources(author_ids, position, backward, limit)))
+        keys = self._merge(sources, backward, limit)
+        posts = await Post.objects.for_feed().ain_bulk(
+            [post_id for _, post_id in keys])
+        return [posts[post_id] for _, post_id in keys if post_id in posts]
+
+    def _fetch_offset(self, offset, limit):
+        return self._fetch(None, False, offset + limit)[offset:]
+
+    async def _afetch_offset(self, offset, limit):
+        return (await self._afetch(None, False, offset + limit))[offset:]
+
+
+def get_timeline_page(user, request, per_page=NUMBER_OF_POSTS):
+    return get_request_page(TimelinePaginator(user, per_page), request)
+
+
+async def aget_timeline_page(user, request, per_page=NUMBER_OF_POSTS):
+    return await aget_request_page(TimelinePaginator(user, per_page), request)
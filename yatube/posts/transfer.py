@@ -0,0 +1,208 @@
+"""Выгрузка и загрузка данных в JSON Lines.
+
+Каждая строка — объект с полем type (user, group, post, comment,
+follow) и полями модели. Типы идут в порядке зависимостей, строки
+одного типа — по возрастанию id. Первичные ключи сохраняются, поэтому
+загружать выгрузку нужно в пустую базу или с ignore_conflicts.
+
+Память не зависит от объёма: выгрузка читает базу iterator()
+порциями, загрузка держит одну пачку строк для bulk_create.
+Счётчики, ленты подписок и поисковый индекс после загрузки
+пересчитываются (seeding.finalize).
+"""
+import gzip
+import json
+import os
+import sys
+import threading
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Follow, Group, Post, User
+from .seeding import explicit_dates
+
+BATCH_SIZE = 5000
+CHUNK_SIZE = 2000
+
+Kind = namedtuple('Kind', 'name model fields dates')
+
+KINDS = (
+    Kind('user', User, (
+        'id', 'username', 'first_name', 'last_name', 'email', 'is_active',
+        'date_joined', 'password',
+    ), ('date_joined',)),
+    Kind('group', Group, ('id', 'title', 'slug', 'description'), ()),
+    Kind('post', Post, (
+        'id', 'text', 'pub_date', 'updated', 'author_id', 'group_id',
+        'image', 'image_width', 'image_height',
+    ), ('pub_date', 'updated')),
+    Kind('comment', Comment, (
+        'id', 'post_id', 'author_id', 'text', 'created',
+    ), ('created',)),
+    Kind('follow', Follow, ('id', 'user_id', 'author_id'), ()),
+)
+KINDS_BY_NAME = {kind.name: kind for kind in KINDS}
+
+
+@contextmanager
+def open_stream(path, mode):
+    """Файл, сжатый gzip файл (*.gz) или stdin/stdout для «-»."""
+    if path == '-':
+        yield sys.stdin if mode == 'r' else sys.stdout
+    elif path.endswith('.gz'):
+        with gzip.open(path, mode + 't', encoding='utf-8') as file:
+            yield file
+    else:
+        with open(path, mode, encoding='utf-8') as file:
+            yield file
+
+
+def _json_default(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} не сериализуется в JSON')
+
+
+def dump(stream, with_passwords=False, chunk_size=CHUNK_SIZE):
+    """Пишет все данные в stream; возвращает число строк по типам."""
+    counts = Counter()
+    for kind in KINDS:
+        fields = [
+            name for name in kind.fields
+            if with_passwords or name != 'password'
+        ]
+        rows = kind.model.objects.order_by('pk').values_list(*fields)
+        for values in rows.iterator(chunk_size=chunk_size):
+            record = {'type': kind.name, **dict(zip(fields, values))}
+            stream.write(json.dumps(
+                record, ensure_ascii=False, default=_json_default))
+            stream.write('\n')
+            counts[kind.name] += 1
+    return dict(counts)
+
+
+class MediaCopier:
+    """Копирует картинки записей в default_storage пулом потоков.
+
+    Очередь ограничена, так что память не растёт с числом картинок.
+    """
+
+    def __init__(self, source, workers):
+        self.source = source
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.slots = threading.BoundedSemaphore(workers * 4)
+        self.copied = 0
+        self.failed = []
+        self.lock = threading.Lock()
+
+    def _copy(self, name):
+        try:
+            if default_storage.exists(name):
+                return
+            path = os.path.join(self.source, name)
+            with open(path, 'rb') as file:
+                default_storage.save(name, File(file))
+        except Exception:
+            # Ошибка из пула иначе пропала бы вместе с future, в том
+            # числе SuspiciousFileOperation для пути вне хранилища
+            with self.lock:
+                self.failed.append(name)
+        else:
+            with self.lock:
+                self.copied += 1
+        finally:
+            self.slots.release()
+
+    def copy(self, name):
+        self.slots.acquire()
+        self.executor.submit(self._copy, name)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+class Loader:
+    """Загружает строки JSON Lines пачками через bulk_create.
+
+    counts — число прочитанных строк по типам: с ignore_conflicts
+    вставленных может быть меньше.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, ignore_conflicts=False,
+                 copier=None):
+        self.batch_size = batch_size
+        self.ignore_conflicts = ignore_conflicts
+        self.copier = copier
+        self.counts = Counter()
+        self.kind = None
+        self.batch = []
+        # Пароли без выгрузки хешей: войти по ним нельзя
+        self.unusable_password = make_password(None)
+
+    def build(self, kind, record):
+        unknown = set(record) - set(kind.fields)
+        if unknown:
+            raise ValueError(f'неизвестные поля {kind.name}: {unknown}')
+        for name in kind.dates:
+            if record.get(name) is not None:
+                record[name] = parse_datetime(record[name])
+        if kind.model is User:
+            record.setdefault('password', self.unusable_password)
+        if kind.model is Post and record.get('image') and self.copier:
+            self.copier.copy(record['image'])
+        return kind.model(**record)
+
+    def flush(self):
+        if not self.batch:
+            return
+        with transaction.atomic():
+            self.kind.model.objects.bulk_create(
+                self.batch, ignore_conflicts=self.ignore_conflicts)
+        # bulk_create с ignore_conflicts не сообщает, сколько вставил
+        self.counts[self.kind.name] += len(self.batch)
+        self.batch = []
+
+    def add(self, record):
+        kind = KINDS_BY_NAME.get(record.pop('type', None))
+        if kind is None:
+            raise ValueError('неизвестный type')
+        if kind is not self.kind:
+            self.flush()
+            self.kind = kind
+        self.batch.append(self.build(kind, record))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def load(self, stream):
+        dates = [
+            kind.model._meta.get_field(name)
+            for kind in KINDS for name in kind.dates
+        ]
+        with explicit_dates(*dates):
+            for number, line in enumerate(stream, 1):
+                if not line.strip():
+                    continue
+                try:
+                    self.add(json.loads(line))
+                except (ValueError, TypeError) as error:
+                    raise ValueError(f'строка {number}: {error}') from error
+            self.flush()
+        reset_sequences()
+        return dict(self.counts)
+
+
+def reset_sequences():
+    """Сдвигает последовательности id за загруженные ключи (PostgreSQL)."""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [kind.model for kind in KINDS])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
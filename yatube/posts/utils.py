@@ -1,10 +1,250 @@
-from django.core.paginator import Paginator
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 
 NUMBER_OF_POSTS = 10
+NUMBER_OF_GROUPS = 50
+# Комментарии на странице записи и в каждой догружаемой порции
+NUMBER_OF_COMMENTS = 20
+COMMENT_ORDERING = ('created', 'pk')
+# Порядок каталога групп, он же ключ курсора (индекс group_title_idx)
+GROUP_ORDERING = ('title', 'pk')
+# Сколько строк максимум просматривает приблизительный подсчёт
+APPROXIMATE_COUNT_LIMIT = 1000
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу (pub_date, id) без OFFSET.
+
+    Страница выбирается непрозрачным курсором из параметра ?cursor=,
+    поэтому время выборки не зависит от глубины страницы. Паджинатор
+    знает только текущее «окно», и number/num_pages подобраны так,
+    чтобы стандартные методы Page (has_next, has_previous) работали
+    без COUNT(*).
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-pk'),
+                 approximate_count=False):
+        self.ordering = ordering
+        self.approximate_count = approximate_count
+        self.cursor = ''
+        self.next_cursor = None
+        self.previous_cursor = None
+        self._number = 1
+        self._has_next = False
+        super().__init__(object_list.order_by(*ordering), per_page)
+
+    @property
+    def descending(self):
+        return self.ordering[0].startswith('-')
+
+    @property
+    def key_fields(self):
+        return [name.lstrip('-') for name in self.ordering]
+
+    @cached_property
+    def count(self):
+        if self.approximate_count:
+            return self.object_list[:APPROXIMATE_COUNT_LIMIT].count()
+        return super().count
+
+    @property
+    def count_is_approximate(self):
+        return (
+            self.approximate_count
+            and self.count >= APPROXIMATE_COUNT_LIMIT
+        )
+
+    @property
+    def num_pages(self):
+        return self._number + 1 if self._has_next else self._number
+
+    def encode_cursor(self, direction, position):
+        values = [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in position
+        ] if position is not None else None
+        payload = json.dumps([direction, values]).encode()
+        return urlsafe_base64_encode(payload)
+
+    def decode_cursor(self, cursor):
+        """Возвращает (направление, позиция) или None для битого курсора."""
+        try:
+            direction, values = json.loads(urlsafe_base64_decode(cursor))
+            if direction not in (FORWARD, BACKWARD):
+                return None
+            if values is None:
+                return direction, None
+            position = self.decode_position(values)
+        except (ValueError, TypeError, binascii.Error,
+                FieldDoesNotExist, ValidationError):
+            return None
+        if len(position) != len(self.key_fields):
+            return None
+        return direction, position
+
+    def decode_position(self, values):
+        meta = self.object_list.model._meta
+        fields = [
+            meta.pk if name == 'pk' else meta.get_field(name)
+            for name in self.key_fields
+        ]
+        return tuple(
+            field.to_python(value) for field, value in zip(fields, values)
+        )
+
+    def position_of(self, obj):
+        return tuple(getattr(obj, name) for name in self.key_fields)
+
+    def _seek(self, position, backward, fields=None):
+        """Условие «строго после позиции» в нужном направлении.
+
+        Избыточное условие first__lte/gte позволяет БД начать
+        сканирование индекса сразу с нужного места.
+        """
+        first, second = fields or self.key_fields
+        first_value, second_value = position
+        older = self.descending != backward
+        op, op_eq = ('lt', 'lte') if older else ('gt', 'gte')
+        return Q(**{f'{first}__{op_eq}': first_value}) & (
+            Q(**{f'{first}__{op}': first_value})
+            | Q(**{first: first_value, f'{second}__{op}': second_value})
+        )
+
+    def _fetch_queryset(self, position, backward):
+        queryset = self.object_list
+        if position is not None:
+            queryset = queryset.filter(self._seek(position, backward))
+        return queryset.reverse() if backward else queryset
+
+    def _fetch(self, position, backward, limit):
+        """Выбирает limit объектов после позиции в порядке вывода."""
+        objects = list(self._fetch_queryset(position, backward)[:limit])
+        return objects[::-1] if backward else objects
+
+    async def _afetch(self, position, backward, limit):
+        queryset = self._fetch_queryset(position, backward)[:limit]
+        objects = [obj async for obj in queryset]
+        return objects[::-1] if backward else objects
+
+    def _fetch_offset(self, offset, limit):
+        return list(self.object_list[offset:offset + limit])
+
+    async def _afetch_offset(self, offset, limit):
+        return [obj async for obj in self.object_list[offset:offset + limit]]
+
+    def _make_page(self, objects, number, has_next, has_previous):
+        self._number = max(number, 2 if has_previous else 1)
+        self._has_next = has_next
+        if objects and has_next:
+            self.next_cursor = self.encode_cursor(
+                FORWARD, self.position_of(objects[-1]))
+        if objects and has_previous:
+            self.previous_cursor = self.encode_cursor(
+                BACKWARD, self.position_of(objects[0]))
+        return Page(objects, self._number, self)
+
+    @property
+    def last_cursor(self):
+        return self.encode_cursor(BACKWARD, None)
+
+    def _decode_request(self, cursor):
+        decoded = self.decode_cursor(cursor) if cursor else None
+        if decoded is not None:
+            self.cursor = cursor
+        return decoded
+
+    def _cursor_result(self, objects, position, backward):
+        if not backward:
+            has_next = len(objects) > self.per_page
+            return self._make_page(
+                objects[:self.per_page], 2, has_next, True)
+        has_previous = len(objects) > self.per_page
+        return self._make_page(
+            objects[-self.per_page:], 1, position is not None, has_previous)
+
+    def cursor_page(self, cursor):
+        """Страница по курсору; битый курсор ведёт на первую страницу."""
+        decoded = self._decode_request(cursor)
+        if decoded is None:
+            return self.page(1)
+        direction, position = decoded
+        backward = direction == BACKWARD
+        objects = self._fetch(position, backward, self.per_page + 1)
+        return self._cursor_result(objects, position, backward)
+
+    async def acursor_page(self, cursor):
+        decoded = self._decode_request(cursor)
+        if decoded is None:
+            return await self.apage(1)
+        direction, position = decoded
+        backward = direction == BACKWARD
+        objects = await self._afetch(position, backward, self.per_page + 1)
+        return self._cursor_result(objects, position, backward)
+
+    def _page_offset(self, number):
+        try:
+            number = max(int(number), 1)
+        except (TypeError, ValueError):
+            number = 1
+        self.cursor = ''
+        return number, (number - 1) * self.per_page
+
+    def _number_result(self, objects, number):
+        has_next = len(objects) > self.per_page
+        return self._make_page(
+            objects[:self.per_page], number, has_next, number > 1)
+
+    def page(self, number):
+        """Старые ссылки ?page=N: OFFSET без COUNT(*)."""
+        number, offset = self._page_offset(number)
+        objects = self._fetch_offset(offset, self.per_page + 1)
+        if not objects and number > 1:
+            return self.cursor_page(self.last_cursor)
+        return self._number_result(objects, number)
+
+    async def apage(self, number):
+        number, offset = self._page_offset(number)
+        objects = await self._afetch_offset(offset, self.per_page + 1)
+        if not objects and number > 1:
+            return await self.acursor_page(self.last_cursor)
+        return self._number_result(objects, number)
+
+    def get_page(self, number):
+        return self.page(number)
+
+
+def get_paginator(queryset, request, approximate_count=False,
+                  per_page=NUMBER_OF_POSTS):
+    paginator = CursorPaginator(
+        queryset, per_page, approximate_count=approximate_count)
+    return get_request_page(paginator, request)
+
+
+def get_request_page(paginator, request):
+    """Страница по ?cursor=, а для старых ссылок — по ?page=."""
+    cursor = request.GET.get('cursor')
+    if cursor:
+        return paginator.cursor_page(cursor)
+    return paginator.get_page(request.GET.get('page'))
+
+
+async def aget_paginator(queryset, request, per_page=NUMBER_OF_POSTS):
+    return await aget_request_page(
+        CursorPaginator(queryset, per_page), request)
 
 
-def get_paginator(queryset, request):
-    paginator = Paginator(queryset, NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return page_obj
+async def aget_request_page(paginator, request):
+    """То же, что get_request_page, через асинхронный ORM."""
+    cursor = request.GET.get('cursor')
+    if cursor:
+        return await paginator.acursor_page(cursor)
+    return await paginator.apage(request.GET.get('page'))
@@ -1,23 +1,43 @@
+from urllib.parse import urlencode
+
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+
+from core.sqlite import save_files, serialized_write
+from core.throttling import throttle
 
+from . import cache as feed_cache
+from .conditional import (comment_validator, conditional_render,
+                          group_validator, page_validator, post_validator,
+                          stats_validator)
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
-from .utils import get_paginator
+from .models import Comment, Follow, Group, Post, User
+from .search import get_search_page
+from .timeline import get_timeline_page
+from .utils import (COMMENT_ORDERING, GROUP_ORDERING, NUMBER_OF_COMMENTS,
+                    NUMBER_OF_GROUPS, CursorPaginator, get_paginator,
+                    get_request_page)
 
 
 def index(request):
-    posts = Post.objects.all()
+    posts = Post.objects.for_feed()
     page_obj = get_paginator(posts, request)
     context = {
         'page_obj': page_obj
     }
-    return render(request, 'posts/index.html', context)
+    return conditional_render(
+        request, 'posts/index.html', context,
+        scopes=[feed_cache.ALL_POSTS, feed_cache.GROUPS],
+        validators=page_validator(page_obj),
+        modified=[post.updated for post in page_obj],
+    )
 
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    posts = group.posts.for_feed()
     page_obj = get_paginator(posts, request)
     title = f'Записи сообщества {group}'
     context = {
@@ -25,45 +45,131 @@ def group_posts(request, slug):
         'group': group,
         'page_obj': page_obj
     }
-    return render(request, 'posts/group_list.html', context)
+    return conditional_render(
+        request, 'posts/group_list.html', context,
+        scopes=[feed_cache.ALL_POSTS, feed_cache.GROUPS],
+        validators=(
+            group.title, group.description, page_validator(page_obj)),
+        modified=[post.updated for post in page_obj],
+    )
+
+
+def group_index(request):
+    """Каталог групп: сводка хранится в самих группах, страница — один
+    запрос без COUNT(*)."""
+    paginator = CursorPaginator(
+        Group.objects.all(), NUMBER_OF_GROUPS, ordering=GROUP_ORDERING)
+    page_obj = get_request_page(paginator, request)
+    context = {
+        'page_obj': page_obj
+    }
+    return conditional_render(
+        request, 'posts/group_index.html', context,
+        scopes=[feed_cache.ALL_POSTS, feed_cache.GROUPS],
+        validators=page_validator(page_obj, group_validator),
+        modified=[
+            group.last_post_date for group in page_obj
+            if group.last_post_date
+        ],
+    )
 
 
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    posts = user.posts.all()
+    user = get_object_or_404(
+        User.objects.select_related('stats'), username=username)
+    posts = user.posts.for_feed()
     page_obj = get_paginator(posts, request)
     following = False
+    scopes = [feed_cache.author_scope(user.pk), feed_cache.GROUPS]
     if request.user.is_authenticated:
         following = Follow.objects.filter(
             user=request.user, author=user).exists()
+        scopes.append(feed_cache.follows_scope(request.user.pk))
     context = {
         'posts': posts,
         'author': user,
         'page_obj': page_obj,
         'following': following
     }
-    return render(request, 'posts/profile.html', context)
+    return conditional_render(
+        request, 'posts/profile.html', context,
+        scopes=scopes,
+        validators=(
+            stats_validator(user), following, page_validator(page_obj)),
+        modified=[post.updated for post in page_obj],
+    )
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id)
+    comments = get_request_page(comments_paginator(post.pk), request)
     form = CommentForm()
     context = {
         'post': post,
         'form': form,
         'comments': comments
     }
-    return render(request, 'posts/post_detail.html', context)
+    return conditional_render(
+        request, 'posts/post_detail.html', context,
+        scopes=[
+            feed_cache.post_scope(post.pk),
+            feed_cache.author_scope(post.author_id),
+            feed_cache.GROUPS,
+        ],
+        validators=(
+            post_validator(post), stats_validator(post.author),
+            page_validator(comments, comment_validator)),
+        modified=[post.updated],
+    )
+
+
+def comments_paginator(post_id):
+    """Комментарии записи по курсору (created, id), от старых к новым."""
+    return CursorPaginator(
+        Comment.objects.filter(post_id=post_id).for_page(),
+        NUMBER_OF_COMMENTS, ordering=COMMENT_ORDERING)
+
+
+def comments_json(post_id, page_obj):
+    """Порция комментариев для догрузки и адрес следующей порции."""
+    next_url = None
+    if page_obj.has_next():
+        next_url = '{}?cursor={}'.format(
+            reverse('posts:comments', args=[post_id]),
+            page_obj.paginator.next_cursor)
+    return JsonResponse({
+        'comments': [
+            {
+                'id': comment.pk,
+                'author': comment.author.username,
+                'author_url': reverse(
+                    'posts:profile', args=[comment.author.username]),
+                'text': comment.text,
+                'created': comment.created.isoformat(),
+            }
+            for comment in page_obj
+        ],
+        'next': next_url,
+    })
+
+
+def comments(request, post_id):
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    page_obj = get_request_page(comments_paginator(post_id), request)
+    return comments_json(post_id, page_obj)
 
 
 @login_required
+@throttle('post_create')
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         form = form.save(commit=False)
         form.author = request.user
-        form.save()
+        save_files(form)
+        with serialized_write():
+            form.save()
         return redirect('posts:profile', username=form.author)
     return render(request, 'posts/create_post.html', {'form': form})
 
@@ -79,7 +185,10 @@ def post_edit(request, post_id):
         instance=post
     )
     if form.is_valid():
-        form.save()
+        post = form.save(commit=False)
+        save_files(post)
+        with serialized_write():
+            post.save()
         return redirect('posts:post_detail', post_id)
     context = {
         'is_edit': True,
@@ -90,6 +199,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@throttle('add_comment')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -97,14 +207,14 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with serialized_write():
+            comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = get_paginator(posts, request)
+    page_obj = get_timeline_page(request.user, request)
     context = {
         'page_obj': page_obj
     }
@@ -112,15 +222,29 @@ def follow_index(request):
 
 
 @login_required
+@throttle('follow', methods=('GET', 'POST'))
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        with serialized_write():
+            Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('posts:profile', username=username)
 
 
 @login_required
+@throttle('follow', methods=('GET', 'POST'))
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=author).delete()
+    with serialized_write():
+        Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    context = {
+        'query': query,
+        'page_obj': get_search_page(query, request),
+        'pagination_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
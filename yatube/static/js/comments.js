@@ -0,0 +1,41 @@
+// Догружает комментарии к записи порциями из JSON вместо перехода
+// по ссылке «Показать ещё»; без JavaScript ссылка работает как обычно
+document.addEventListener('DOMContentLoaded', function () {
+  var more = document.getElementById('comments-more');
+  var list = document.getElementById('comments');
+  if (!more || !list) {
+    return;
+  }
+  more.addEventListener('click', function (event) {
+    event.preventDefault();
+    more.classList.add('disabled');
+    fetch(more.dataset.url, {headers: {'Accept': 'application/json'}})
+      .then(function (response) { return response.json(); })
+      .then(function (data) {
+        data.comments.forEach(function (comment) {
+          var item = document.createElement('div');
+          item.className = 'media mb-4';
+          var body = document.createElement('div');
+          body.className = 'media-body';
+          var title = document.createElement('h5');
+          title.className = 'mt-0';
+          var link = document.createElement('a');
+          link.href = comment.author_url;
+          link.textContent = comment.author;
+          var text = document.createElement('p');
+          text.textContent = comment.text;
+          title.appendChild(link);
+          body.appendChild(title);
+          body.appendChild(text);
+          item.appendChild(body);
+          list.appendChild(item);
+        });
+        if (data.next) {
+          more.dataset.url = data.next;
+          more.classList.remove('disabled');
+        } else {
+          more.remove();
+        }
+      });
+  });
+});
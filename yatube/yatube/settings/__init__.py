@@ -0,0 +1,20 @@
+"""Настройки проекта по профилям.
+
+Профиль выбирается переменной окружения YATUBE_ENV: dev (по
+умолчанию) — отладка и панель DjDT, prod — без отладки, с общим
+кешем, сжатием ответов и статикой с хешами в именах. Профиль можно
+указать и напрямую: DJANGO_SETTINGS_MODULE=yatube.settings.prod.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+YATUBE_ENV = os.getenv('YATUBE_ENV', 'dev')
+
+if YATUBE_ENV == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif YATUBE_ENV == 'dev':
+    from .dev import *  # noqa: F401,F403
+else:
+    raise ImproperlyConfigured(
+        f'YATUBE_ENV={YATUBE_ENV!r}: ожидается dev или prod')
@@ -0,0 +1,291 @@
+"""Общие настройки; профили dev и prod дополняют их (см. __init__)."""
+import os
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# См. https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+# Ключ и адреса задаёт профиль: в prod — только из окружения
+
+SECRET_KEY = os.getenv('YATUBE_SECRET_KEY')
+
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'about.apps.AboutConfig',     # App for project description
+    'core.apps.CoreConfig',
+    'users.apps.UsersConfig',     # Application for 'Sign UP/Sign IN'
+    'posts.apps.PostsConfig',     # App for groups and posts
+    'api.apps.ApiConfig',         # JSON API for posts and groups
+    'django.contrib.admin',
+    'django.contrib.auth',        # Default application for 'Sign UP/Sign IN'
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'sorl.thumbnail',             # Image application
+]
+
+MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    # До сессий: сохранение сессии — тоже запись в базу
+    'core.middleware.ReplicaMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+# Адреса, при обращении с которых доступны DjDT (в dev) и /metrics/
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
+
+
+# yatube.asgi подставляет маршруты с асинхронными страницами
+ROOT_URLCONF = os.getenv('YATUBE_URLCONF', 'yatube.urls')
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [os.path.join(BASE_DIR, 'templates')],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',  # контекст-процессор
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+ASGI_APPLICATION = 'yatube.asgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+# Соединения живут CONN_MAX_AGE секунд и проверяются перед повторным
+# использованием; PRAGMA для SQLite — в core.sqlite
+DATABASE_CONN_MAX_AGE = int(os.getenv('YATUBE_DB_CONN_MAX_AGE', 60))
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv(
+            'YATUBE_DB_PATH', os.path.join(BASE_DIR, 'db.sqlite3')),
+        'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# Реплики только для чтения (core.routers): YATUBE_DB_REPLICAS — пути
+# к копиям базы через запятую. Локально копии обновляет команда
+# replicate_sqlite, в тестах реплики — зеркала default
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+        filter(None, os.getenv('YATUBE_DB_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Очередь коротких записей SQLite; PRAGMA новых соединений — в
+# core.sqlite.DEFAULT_PRAGMAS, SQLITE_PRAGMAS заменяет их целиком
+SQLITE_SERIALIZE_WRITES = True
+# Страницы, которые читают с реплик
+REPLICA_VIEWS = [
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+]
+# Сколько секунд после записи читатель читает только основную базу
+REPLICA_PIN_SECONDS = 5
+
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Раздача MEDIA_ROOT (core.media): только картинки записей и миниатюры.
+# MEDIA_SENDFILE передаёт отдачу файла прокси: 'x-accel-redirect'
+# (nginx, internal location MEDIA_ACCEL_PREFIX → MEDIA_ROOT) или
+# 'x-sendfile' (Apache, lighttpd); None — отдаёт сам процесс
+MEDIA_SERVE_PREFIXES = ('posts/', 'cache/')
+MEDIA_MAX_AGE = 60 * 60 * 24 * 7
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+STATIC_URL = '/static/'
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+# Сюда collectstatic собирает файлы для раздачи в prod
+STATIC_ROOT = os.getenv(
+    'YATUBE_STATIC_ROOT', os.path.join(BASE_DIR, 'static_root'))
+# Отдавать STATIC_ROOT из WSGI-обёртки core.static (yatube/wsgi.py)
+SERVE_STATIC = False
+
+
+# Страницы после входа в аккаунт и при выходе из него
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+# LOGOUT_REDIRECT_URL = 'posts:index
+
+
+# Эмуляция почтового сервера
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+# Имя view-функции, обрабатывающей ошибку 403
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+
+# Кеш выбирается переменной окружения YATUBE_CACHE: locmem — свой
+# у каждого процесса, file и redis — общий для всех воркеров
+# (для redis нужен пакет redis); YATUBE_CACHE_LOCATION задаёт
+# каталог или адрес сервера
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, '.cache'),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    },
+}
+
+
+def cache_settings(default):
+    """CACHES по YATUBE_CACHE; default — кеш профиля по умолчанию."""
+    backend = dict(CACHE_BACKENDS[os.getenv('YATUBE_CACHE', default)])
+    if os.getenv('YATUBE_CACHE_LOCATION'):
+        backend['LOCATION'] = os.getenv('YATUBE_CACHE_LOCATION')
+    return {'default': backend}
+
+
+CACHES = cache_settings('locmem')
+
+# Сколько живут фрагменты лент; устаревают они по сигналам
+FEED_CACHE_TIMEOUT = 60 * 60 * 4
+# Защита от одновременной пересборки: сколько держится блокировка
+# сборщика и сколько остальные ждут его результат (core.cache)
+CACHE_LOCK_TIMEOUT = 30
+CACHE_WAIT_TIMEOUT = 2
+
+# Записи авторов с большим числом подписчиков не раскладываются
+# по лентам при публикации, а подмешиваются при чтении
+TIMELINE_FANOUT_LIMIT = 1000
+
+# Миниатюры картинок записей создаются в фоне пулом потоков
+POST_THUMBNAIL_GEOMETRY = '960x339'
+POST_THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+POST_THUMBNAIL_WORKERS = 2
+POST_THUMBNAIL_ASYNC = True
+THUMBNAIL_ENGINE = 'posts.thumbnails.PillowEngine'
+
+# Загрузка картинок записей: крупные файлы пишутся во временный файл,
+# а не в память; лимиты проверяются до декодирования (posts.images)
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440
+POST_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 40_000_000
+# PNG, WebP и GIF декодируются целиком, без уменьшения при чтении
+POST_IMAGE_MAX_FULL_PIXELS = 12_000_000
+POST_IMAGE_MAX_SIDE = 1920
+POST_IMAGE_FORMAT = 'JPEG'
+POST_IMAGE_QUALITY = 85
+
+# Поиск: auto — FTS5, если он есть в SQLite, иначе таблица SearchPosting;
+# ранжируются только POST_SEARCH_WINDOW самых новых совпадений
+POST_SEARCH_BACKEND = 'auto'
+POST_SEARCH_WINDOW = 2000
+
+# Метрики запросов (core.middleware): медленные запросы пишутся в журнал
+# core.metrics, суммы сбрасываются в кеш раз в METRICS_FLUSH_INTERVAL
+# секунд и отдаются на /metrics/ по токену METRICS_TOKEN (заголовок
+# Authorization: Bearer), а без токена — адресам из METRICS_ALLOWED_IPS
+METRICS_SLOW_REQUEST_MS = 500
+METRICS_SERVER_TIMING = True
+METRICS_FLUSH_INTERVAL = 10
+METRICS_TOKEN = os.getenv('YATUBE_METRICS_TOKEN') or None
+METRICS_ALLOWED_IPS = INTERNAL_IPS
+
+# Ограничение частоты записи (core.throttling): сколько запросов
+# за период можно сделать одному пользователю или адресу в каждой
+# области; лишние получают 429. Между воркерами лимит общий,
+# только если общий кеш (YATUBE_CACHE=redis)
+THROTTLE_RATES = {
+    'post_create': '10/m',
+    'add_comment': '20/m',
+    'follow': '30/m',
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.metrics': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
@@ -0,0 +1,23 @@
+"""Разработка: отладка, панель DjDT, ключ из репозитория."""
+import copy
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import INSTALLED_APPS, MIDDLEWARE, TEMPLATES
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.getenv(
+    'YATUBE_SECRET_KEY',
+    'y$_81b&k)19=03cdgy@@mv7k(znk@u_zeow_@8zp^$1_@pz6kd')
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+INSTALLED_APPS = INSTALLED_APPS + ['debug_toolbar']
+# Панель отладки синхронная: под ASGI она выстроила бы все запросы
+# в один поток, поэтому подключается только при отладке
+MIDDLEWARE = MIDDLEWARE + ['debug_toolbar.middleware.DebugToolbarMiddleware']
+
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['OPTIONS']['context_processors'].insert(
+    0, 'django.template.context_processors.debug')
@@ -0,0 +1,78 @@
+"""Рабочий сервер: без отладки, ключ и адреса из окружения.
+
+Обязательны YATUBE_SECRET_KEY и YATUBE_ALLOWED_HOSTS (через запятую).
+Кеш по умолчанию общий (redis), ответы сжимаются, статика собирается
+collectstatic с хешами в именах и сжатыми копиями и раздаётся
+WSGI-обёрткой core.static.
+"""
+import copy
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import MIDDLEWARE, SECRET_KEY, TEMPLATES, cache_settings
+
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Не задан YATUBE_SECRET_KEY')
+
+ALLOWED_HOSTS = [
+    host for host in os.getenv('YATUBE_ALLOWED_HOSTS', '').split(',') if host
+]
+if not ALLOWED_HOSTS:
+    raise ImproperlyConfigured('Не задан YATUBE_ALLOWED_HOSTS')
+
+# Сжатие и условные ответы сразу после метрик: GZip видит готовое тело,
+# ConditionalGet считает ETag до сжатия
+_first = MIDDLEWARE.index('core.middleware.MetricsMiddleware') + 1
+MIDDLEWARE = MIDDLEWARE[:_first] + [
+    'core.middleware.GZipMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
+] + MIDDLEWARE[_first:]
+
+# Шаблоны разбираются один раз на процесс
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+# Общий для всех воркеров кеш: лимиты частоты и версии лент
+CACHES = cache_settings('redis')
+if CACHES['default']['BACKEND'].endswith('RedisCache'):
+    # Без клиента кеш упал бы на первом обращении, а не при запуске
+    try:
+        import redis  # noqa: F401
+    except ImportError:
+        raise ImproperlyConfigured(
+            'Кеш redis требует пакет redis (requirements.txt)')
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'core.storage.CompressedManifestStaticStorage',
+    },
+}
+# Статику отдаёт сам процесс; за nginx, который раздаёт STATIC_ROOT,
+# можно выключить: YATUBE_SERVE_STATIC=0
+SERVE_STATIC = os.getenv('YATUBE_SERVE_STATIC', '1') == '1'
+# Картинки записей отдаёт прокси: YATUBE_MEDIA_SENDFILE=x-accel-redirect
+MEDIA_SENDFILE = os.getenv('YATUBE_MEDIA_SENDFILE') or None
+
+# За прокси все клиенты приходят с 127.0.0.1, поэтому адрес ничего
+# не доказывает: /metrics/ открыт только с YATUBE_METRICS_TOKEN
+METRICS_ALLOWED_IPS = []
+
+# HTTPS за обратным прокси, который ставит X-Forwarded-Proto
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+SECURE_SSL_REDIRECT = os.getenv('YATUBE_SSL_REDIRECT', '1') == '1'
+SECURE_HSTS_SECONDS = int(os.getenv('YATUBE_HSTS_SECONDS', 60 * 60 * 24 * 30))
+SESSION_COOKIE_SECURE = True
+CSRF_COOKIE_SECURE = True
+SECURE_REFERRER_POLICY = 'same-origin'
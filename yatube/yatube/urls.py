@@ -1,8 +1,10 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from core import media
+from core.views import metrics_view
+
 handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
 handler403 = 'core.views.permission_denied'
@@ -13,15 +15,15 @@ urlpatterns = [
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('api/v1/', include('api.urls', namespace='api')),
+    path('metrics/', metrics_view, name='metrics'),
+    # Картинки записей и миниатюры (core.media), не только при отладке
+    path(settings.MEDIA_URL.lstrip('/') + '<path:path>', media.serve,
+         name='media'),
 ]
 
 # Когда сайт в режиме отладки (DEBUG = True).
 if settings.DEBUG:
     import debug_toolbar
 
-    # Этот код позволяет обращаться к файлам в директории,
-    # указанной в MEDIA_ROOT по имени, через префикс MEDIA_URL.
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)
@@ -0,0 +1,19 @@
+"""Корневые маршруты для ASGI (см. yatube.asgi).
+
+Адреса и имена те же, что в yatube.urls, но страницы чтения posts
+обслуживаются асинхронными представлениями.
+"""
+from django.urls import include, path
+
+from . import urls
+
+handler404 = urls.handler404
+handler500 = urls.handler500
+handler403 = urls.handler403
+
+urlpatterns = [
+    path('', include('posts.async_urls', namespace='posts')),
+] + [
+    pattern for pattern in urls.urlpatterns
+    if getattr(pattern, 'namespace', None) != 'posts'
+]
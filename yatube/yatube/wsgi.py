@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Собранная статика отдаётся до Django (core.static)
+if settings.SERVE_STATIC:
+    from core.static import StaticFilesApp
+    application = StaticFilesApp(application)